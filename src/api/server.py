@@ -0,0 +1,424 @@
+"""
+Headless HTTP/JSON API over App and DbManager, for POS terminals sharing
+one database owner.
+\nPlain asyncio (no web framework): HTTP/1.1 with keep-alive and
+Content-Length bodies. Every request runs on the AsyncDbManager executor,
+so concurrent requests share MassesDatabase's connection pool;
+`--write-queue` also group-commits their writes (see WriteQueue).
+
+GET  /saude                          pool and write queue stats
+GET  /produtos?term=&after_id=&limit=    search_product_info
+GET  /produtos/{id}                  get_product_info
+POST /produtos, PUT /produtos/{id}   try_add_product / try_update_product
+GET  /clientes?term=&after_id=&limit=    search_client_info
+GET  /clientes/{id}                  get_client_info
+GET  /clientes/{id}/saldo            get_client_balance
+POST /clientes, PUT /clientes/{id}   try_add_client / try_update_client
+GET  /transacoes?client_name=&start_date=&end_date=&t_type=&status=&after_id=&limit=
+POST /transacoes                     {"client_id", "t_type", "items", "date", "payment", "check_stock"}
+POST /transacoes/{id}/pagamentos     {"value", "date"}
+POST /producoes                      {"product_id", "amount", "date"}
+
+Form errors answer 422 with {"erros": {campo: mensagem}}. PUT /produtos/{id}
+takes an optional "estoque_carregado" (see App.try_update_product).
+
+Run from `src`: python -m api.server [--db PATH] [--host 127.0.0.1]
+[--port 8765] [--token SECRET] [--write-queue]
+"""
+import argparse
+import asyncio
+import datetime
+import hmac
+import json
+import logging
+import re
+import sqlite3
+from http import HTTPStatus
+from typing import Awaitable, Callable
+from urllib.parse import parse_qsl, urlsplit
+from application.app import App
+from application.async_app import AsyncApp
+from application.validation import RecordValidator
+from data.database import MassesDatabase, InsufficientStockError
+from data.db_manager import DbManager
+
+logger = logging.getLogger(__name__)
+
+MAX_BODY = 1024 * 1024  # bytes
+READ_TIMEOUT = 30.0  # seconds an idle keep-alive connection is kept open
+
+
+class ApiError(Exception):
+    def __init__(self, status: int, message: str):
+        self.status = status
+        super().__init__(message)
+
+
+class Request:
+    __slots__ = ("method", "path", "query", "headers", "body")
+
+    def __init__(self, method: str, target: str, headers: dict[str, str], body: bytes):
+        url = urlsplit(target)
+        self.method = method
+        self.path = url.path.rstrip("/") or "/"
+        self.query = dict(parse_qsl(url.query))
+        self.headers = headers
+        self.body = body
+
+    def json(self) -> dict:
+        try:
+            data = json.loads(self.body or b"{}")
+        except ValueError:
+            raise ApiError(400, "JSON inválido") from None
+        if not isinstance(data, dict):
+            raise ApiError(400, "O corpo deve ser um objeto JSON")
+        return data
+
+
+Handler = Callable[..., Awaitable[tuple[int, object]]]
+
+
+class ApiServer:
+    """
+    Serve `app` over HTTP. `token`, when set, is required as
+    `Authorization: Bearer <token>`.
+    """
+
+    def __init__(self, app: App, host: str = "127.0.0.1", port: int = 8765, token: str = None):
+        self.app = AsyncApp(app)
+        self.dbm = app.dbm
+        self.host = host
+        self.port = port
+        self.token = token
+        self.server: asyncio.Server | None = None
+
+        self.routes: list[tuple[str, re.Pattern, Handler]] = [
+            (method, re.compile(f"^{pattern}$"), handler)
+            for method, pattern, handler in (
+                ("GET", r"/saude", self.health),
+                ("GET", r"/(produtos|clientes)", self.search),
+                ("GET", r"/(produtos|clientes)/(\d+)", self.get_info),
+                ("GET", r"/clientes/(\d+)/saldo", self.client_balance),
+                ("POST", r"/(produtos|clientes)", self.add),
+                ("PUT", r"/(produtos|clientes)/(\d+)", self.update),
+                ("GET", r"/transacoes", self.search_transactions),
+                ("POST", r"/transacoes", self.register_transaction),
+                ("POST", r"/transacoes/(\d+)/pagamentos", self.register_payment),
+                ("POST", r"/producoes", self.register_production),
+            )
+        ]
+
+    async def start(self) -> asyncio.Server:
+        self.server = await asyncio.start_server(self._serve_client, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]  # the real one for port 0
+        return self.server
+
+    async def close(self):
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
+        self.app.close(wait=True)
+
+    # ↓ HANDLERS ↓
+
+    async def health(self, request: Request):
+        write_queue = self.dbm.write_queue
+        return 200, {
+            "pool": self.dbm.db.pool.stats(),
+            "fila_escrita": write_queue.stats() if write_queue else None,
+        }
+
+    async def search(self, request: Request, table: str):
+        search = (
+            self.app.search_product_info if table == "produtos"
+            else self.app.search_client_info
+        )
+        return 200, await search(
+            request.query.get("term"),
+            self._int(request.query, "after_id"),
+            self._int(request.query, "limit") or 50,
+        )
+
+    async def get_info(self, request: Request, table: str, row_id: str):
+        row = await self.app.adbm.get_by_id(int(row_id), table)
+        if row is None:
+            raise ApiError(404, "Registro inexistente")
+        get_info = self.app.get_product_info if table == "produtos" else self.app.get_client_info
+        return 200, await get_info(row)
+
+    async def client_balance(self, request: Request, client_id: str):
+        return 200, await self.app.get_client_balance(int(client_id))
+
+    async def add(self, request: Request, table: str):
+        try_add = self.app.try_add_product if table == "produtos" else self.app.try_add_client
+        return self._form_result(await try_add(**request.json()), 201)
+
+    async def update(self, request: Request, table: str, row_id: str):
+        id_column = "id_produto" if table == "produtos" else "id_cliente"
+        try_update = (
+            self.app.try_update_product if table == "produtos"
+            else self.app.try_update_client
+        )
+        data = {**request.json(), id_column: int(row_id)}
+        return self._form_result(await try_update(**data), 200)
+
+    async def search_transactions(self, request: Request):
+        query = request.query
+        rows = await self.app.search_transactions(
+            query.get("client_name"),
+            query.get("start_date"),
+            query.get("end_date"),
+            query.get("t_type"),
+            query.get("status"),
+            self._int(query, "after_id"),
+            self._int(query, "limit") or 50,
+        )
+        return 200, [dict(row) for row in rows]
+
+    async def register_transaction(self, request: Request):
+        data = request.json()
+        if data.get("t_type") not in ("P", "V"):
+            raise ApiError(400, "t_type: Deve ser P ou V")
+        if not isinstance(data.get("items"), list) or not data["items"]:
+            raise ApiError(400, "items: Deve ser uma lista não vazia")
+
+        items = []
+        for i, item in enumerate(data["items"]):
+            if not isinstance(item, dict):
+                raise ApiError(400, f"items[{i}]: Deve ser um objeto")
+            items.append({
+                "item_id": self._number(item, "item_id", False, label=f"items[{i}].item_id"),
+                "item_amount": self._number(
+                    item, "item_amount", False, label=f"items[{i}].item_amount"
+                ),
+                "unit_value": self._number(
+                    item, "unit_value", positive=False, label=f"items[{i}].unit_value"
+                ),
+            })
+        client_id = (
+            None if data.get("client_id") is None
+            else self._number(data, "client_id", is_float=False)
+        )
+        payment = (
+            0 if data.get("payment") in (None, "", 0)
+            else self._number(data, "payment")
+        )
+
+        transaction_id = await self.app.adbm.register_transaction(
+            client_id, data["t_type"], items, self._date(data), payment,
+            bool(data.get("check_stock")),
+        )
+        return 201, {"id_transacao": transaction_id}
+
+    async def register_payment(self, request: Request, transaction_id: str):
+        data = request.json()
+        payment_id = await self.app.adbm.register_payment(
+            int(transaction_id), self._number(data, "value"), self._date(data)
+        )
+        return 201, {"id_pagamento": payment_id}
+
+    async def register_production(self, request: Request):
+        data = request.json()
+        production_id = await self.app.adbm.register_production(
+            self._number(data, "product_id", is_float=False),
+            self._number(data, "amount", is_float=False),
+            self._date(data),
+        )
+        return 201, {"id_producao": production_id}
+
+    # ↓ HTTP ↓
+
+    async def _serve_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(self._read_request(reader), READ_TIMEOUT)
+                except ApiError as e:
+                    await self._respond(writer, e.status, {"erro": str(e)}, keep_alive=False)
+                    break
+                if request is None:
+                    break
+
+                status, payload = await self._dispatch(request)
+                keep_alive = request.headers.get("connection", "").lower() != "close"
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.TimeoutError, ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Request | None:
+        line = await self._read_line(reader)
+        if not line:
+            return None  # client closed the keep-alive connection
+        try:
+            method, target, _ = line.decode("latin-1").split(" ", 2)
+        except ValueError:
+            raise ApiError(400, "Requisição inválida") from None
+
+        headers = {}
+        while (line := await self._read_line(reader)) not in (b"\r\n", b"\n", b""):
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        if "transfer-encoding" in headers:
+            raise ApiError(411, "Envie o corpo com Content-Length")
+        try:
+            length = int(headers.get("content-length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            raise ApiError(400, "Content-Length inválido")
+        if length > MAX_BODY:
+            raise ApiError(413, "Corpo grande demais")
+        body = await reader.readexactly(length) if length else b""
+        return Request(method.upper(), target, headers, body)
+
+    @staticmethod
+    async def _read_line(reader: asyncio.StreamReader) -> bytes:
+        """A line of the request head; ApiError past the reader's limit"""
+        try:
+            return await reader.readline()
+        except (asyncio.LimitOverrunError, ValueError):
+            # readline reports an overrun as ValueError
+            raise ApiError(400, "Cabeçalho grande demais") from None
+
+    async def _dispatch(self, request: Request) -> tuple[int, object]:
+        # constant time; bytes because compare_digest rejects non-ASCII str
+        if self.token and not hmac.compare_digest(
+            request.headers.get("authorization", "").encode(),
+            f"Bearer {self.token}".encode(),
+        ):
+            return 401, {"erro": "Não autorizado"}
+
+        path_matched = False
+        for method, pattern, handler in self.routes:
+            if not (match := pattern.match(request.path)):
+                continue
+            path_matched = True
+            if method != request.method:
+                continue
+            try:
+                return await handler(request, *match.groups())
+            except ApiError as e:
+                return e.status, {"erro": str(e)}
+            except InsufficientStockError as e:
+                return 409, {"erro": str(e), "produtos": e.product_ids}
+            except sqlite3.IntegrityError as e:
+                return 409, {"erro": f"Violação de integridade: {e}"}
+            except (TypeError, ValueError) as e:
+                return 400, {"erro": str(e)}
+            except Exception:
+                # details stay in the server log, clients only learn it failed
+                logger.exception("%s %s falhou", request.method, request.path)
+                return 500, {"erro": "Erro interno"}
+        if path_matched:
+            return 405, {"erro": "Método não permitido"}
+        return 404, {"erro": "Rota inexistente"}
+
+    @staticmethod
+    async def _respond(
+        writer: asyncio.StreamWriter, status: int, payload: object, keep_alive: bool
+    ):
+        body = json.dumps(payload, ensure_ascii=False, default=str).encode()
+        head = (
+            f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\n"
+            "Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+    # ↓ HELPERS ↓
+
+    @staticmethod
+    def _form_result(errors: dict[str, str], success_status: int) -> tuple[int, object]:
+        if any(errors.values()):
+            return 422, {"erros": {field: msg for field, msg in errors.items() if msg}}
+        return success_status, {"erros": {}}
+
+    @staticmethod
+    def _int(query: dict[str, str], name: str) -> int | None:
+        value = query.get(name)
+        if value in (None, ""):
+            return None
+        try:
+            return int(value)
+        except ValueError:
+            raise ApiError(400, f"{name} deve ser um número inteiro") from None
+
+    @staticmethod
+    def _number(
+        data: dict,
+        name: str,
+        is_float: bool = True,
+        positive: bool = True,
+        label: str = None,
+    ) -> int | float:
+        """
+        `data[name]` converted like the forms do (RecordValidator), so
+        never negative; with `positive` also never zero. ApiError if invalid.
+        """
+        value = data.get(name)
+        if isinstance(value, bool) or not isinstance(value, (str, int, float, type(None))):
+            value = "inválido"
+        elif not is_float and isinstance(value, float) and not value.is_integer():
+            value = "inválido"
+
+        num, msg = RecordValidator.convert_number(value, is_float)
+        if not msg and positive and num <= 0:
+            msg = "Deve ser maior que zero"
+        if msg:
+            raise ApiError(400, f"{label or name}: {msg}")
+        return float(num) if is_float else int(num)
+
+    @staticmethod
+    def _date(data: dict) -> datetime.date | None:
+        """Optional `date` field (default today, see DbManager)"""
+        if data.get("date") in (None, ""):
+            return None
+        try:
+            return datetime.date.fromisoformat(str(data["date"]).strip())
+        except ValueError:
+            raise ApiError(400, "date: Data inválida (use AAAA-MM-DD)") from None
+
+
+async def serve(args: argparse.Namespace):
+    db = MassesDatabase(args.db, pool_size=args.pool_size)
+    dbm = DbManager(db)
+    if args.write_queue:
+        dbm.enable_write_queue()
+
+    server = ApiServer(App(dbm), args.host, args.port, args.token)
+    await server.start()
+    print(f"Servindo em http://{server.host}:{server.port}", flush=True)
+    try:
+        await server.server.serve_forever()
+    finally:
+        await server.close()
+        dbm.disable_write_queue()
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--db", default="..\\database\\masses.db")
+    parser.add_argument("--host", default="127.0.0.1",
+                        help="0.0.0.0 to serve the local network (use --token)")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--token", help="required Bearer token")
+    parser.add_argument("--pool-size", type=int, default=8)
+    parser.add_argument("--write-queue", action="store_true",
+                        help="group-commit concurrent writes")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
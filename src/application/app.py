@@ -1,179 +1,170 @@
 from data.db_manager import DbManager
-from data.table_classes import ProductColumns, ClientColumns
-from typing import Literal, get_args
-from sqlite3 import Row
+from data.table_classes import ProductColumns, ClientColumns, ProductInfo, ClientInfo
+from typing import Literal
+from data.records import Record
+from application.validation import RecordValidator
 
 
 class App:
     def __init__(self, dbm: DbManager):
         self.dbm = dbm
+        self.validator = RecordValidator(dbm)
 
     # PRODUCT & CLIENT
 
     def try_add_product(self, **data):
         """Returns a dict with errors assigned to each field"""
-        error_messages = {}
-        for arg in get_args(ProductColumns)[1:-1]:
-            error_messages[arg] = ""
-
-        error_messages["nome"] = self._validate_name("produtos", data["nome"])
-        error_messages["tipo"] = "Obrigatório" if not data["tipo"] else ""
-
-        prod_price_val, error_messages["preco_producao"] = (
-            self._validate_and_convert_num(data["preco_producao"], is_float=True)
-        )
-        sale_price_val, error_messages["preco_venda"] = self._validate_and_convert_num(
-            data["preco_venda"], is_float=True
-        )
-        min_stock_val, error_messages["estoque_min"] = self._validate_and_convert_num(
-            data["estoque_min"], is_float=False
-        )
-        curr_stock_val, error_messages["estoque_atual"] = (
-            self._validate_and_convert_num(data["estoque_atual"], is_float=False)
-        )
+        error_messages, values = self.validator.validate_one("produtos", data)
 
         if not any(error_messages.values()):
             self.dbm.add_product(
-                str(data["nome"]),
-                str(data["tipo"]),
-                prod_price_val,
-                sale_price_val,
-                min_stock_val,
-                curr_stock_val,
+                values["nome"],
+                values["tipo"],
+                values["preco_producao"],
+                values["preco_venda"],
+                values["estoque_min"],
+                values["estoque_atual"],
             )
 
         return error_messages
 
     def try_update_product(self, **data):
-        """Returns a dict with errors assigned to each field"""
-        error_messages = {}
-        for arg in get_args(ProductColumns)[1:-1]:
-            error_messages[arg] = ""
-
-        error_messages["nome"] = self._validate_name(
-            "produtos", data["nome"], instance_id=data["id_produto"]
-        )
-
-        prod_price_val, error_messages["preco_producao"] = (
-            self._validate_and_convert_num(data["preco_producao"], is_float=True)
-        )
-        sale_price_val, error_messages["preco_venda"] = self._validate_and_convert_num(
-            data["preco_venda"], is_float=True
-        )
-        min_stock_val, error_messages["estoque_min"] = self._validate_and_convert_num(
-            data["estoque_min"], is_float=False
-        )
-        curr_stock_val, error_messages["estoque_atual"] = (
-            self._validate_and_convert_num(data["estoque_atual"], is_float=False)
-        )
+        """
+        Returns a dict with errors assigned to each field.
+        \nPass `estoque_carregado`, the stock shown when the form was filled,
+        to only record what the user changed; without it `estoque_atual`
+        overwrites the stock.
+        """
+        loaded_stock = data.pop("estoque_carregado", None)
+        error_messages, values = self.validator.validate_one("produtos", data)
 
         if not any(error_messages.values()):
             self.dbm.update_product(
                 int(data["id_produto"]),
-                str(data["nome"]),
-                str(data["tipo"]),
-                prod_price_val,
-                sale_price_val,
-                min_stock_val,
-                curr_stock_val,
+                values["nome"],
+                values["tipo"],
+                values["preco_producao"],
+                values["preco_venda"],
+                values["estoque_min"],
+                values["estoque_atual"],
+                loaded_stock=None if loaded_stock in (None, "") else int(loaded_stock),
             )
 
         return error_messages
 
     def try_add_client(self, **data):
         """Returns a dict with errors assigned to each field"""
-        error_messages = {}
-        for arg in get_args(ClientColumns)[1:-1]:
-            error_messages[arg] = ""
-
-        error_messages["nome"] = self._validate_name("clientes", data["nome"])
+        error_messages, values = self.validator.validate_one("clientes", data)
 
         if not any(error_messages.values()):
-            self.dbm.add_client(str(data["nome"]), str(data["contato"]))
+            self.dbm.add_client(values["nome"], values["contato"])
 
         return error_messages
 
     def try_update_client(self, **data):
         """Returns a dict with errors assigned to each field"""
-        error_messages = {}
-        for arg in get_args(ClientColumns)[1:-1]:
-            error_messages[arg] = ""
-
-        error_messages["nome"] = self._validate_name(
-            "clientes", data["nome"], instance_id=data["id_cliente"]
-        )
+        error_messages, values = self.validator.validate_one("clientes", data)
 
         if not any(error_messages.values()):
             self.dbm.update_client(
-                int(data["id_cliente"]), str(data["nome"]), str(data["contato"])
+                int(data["id_cliente"]), values["nome"], values["contato"]
             )
 
         return error_messages
 
+    def validate_records(
+        self, table: Literal["produtos", "clientes"], records: list[dict]
+    ) -> list[tuple[dict[str, str], dict]]:
+        """(errors, converted values) of each form-like record, in one db query"""
+        return self.validator.validate(table, records)
+
     def get_product_info(
-        self, product_id_or_row: int | Row, column: ProductColumns = "all"
+        self, product_id_or_row: int | Record, column: ProductColumns = "all"
     ):
         return self.dbm.get_table_row_info("produtos", product_id_or_row, column)
 
     def get_client_info(
-        self, client_id_or_row: int | Row, column: ClientColumns = "all"
+        self, client_id_or_row: int | Record, column: ClientColumns = "all"
     ):
         return self.dbm.get_table_row_info("clientes", client_id_or_row, column)
 
-    # SEARCHS
+    def get_client_balance(self, client_id: int):
+        return self.dbm.get_client_balance(client_id)
 
-    def search_product(self, term: str = None):
-        if not term:
-            return self.dbm.get_by_table("produtos")
-        return self.dbm.get_by_text("produtos", term)
-
-    def search_client(self, term: str = None):
-        if not term:
-            return self.dbm.get_by_table("clientes")
-        return self.dbm.get_by_text("clientes", term)
-
-    # VALIDATIONS
+    # SEARCHS
 
-    def _validate_and_convert_num(
-        self, value: str, is_float: bool
-    ) -> tuple[float | int | None, str]:
+    def search_product(self, term: str = None, after_id: int = None, limit: int = None):
         """
-        Try to convert and validate the number.
-        \nTuple: (Value converted, Error message)
+        No term: whole table, or a page after `after_id` when `limit` is given.
+        \nWith a term: the best matches, paginated the same way.
         """
-        if value == "":
-            return None, "Obrigatório"
-
-        if isinstance(value, (float, int)):
-            return value, ""
-
-        try:
-            if is_float:
-                num = float(value.replace(",", "."))
-            else:
-                num = int(value)
+        return self._search("produtos", term, after_id, limit)
 
-            if num < 0:
-                return None, "Não pode ser negativo"
-
-            return num, ""
+    def search_client(self, term: str = None, after_id: int = None, limit: int = None):
+        """
+        No term: whole table, or a page after `after_id` when `limit` is given.
+        \nWith a term: the best matches, paginated the same way.
+        """
+        return self._search("clientes", term, after_id, limit)
+
+    def search_product_info(
+        self, term: str = None, after_id: int = None, limit: int = None
+    ) -> list[ProductInfo]:
+        """search_product, with every row already as ProductInfo"""
+        return [row.as_dict() for row in self.search_product(term, after_id, limit)]
+
+    def search_client_info(
+        self, term: str = None, after_id: int = None, limit: int = None
+    ) -> list[ClientInfo]:
+        """search_client, with every row already as ClientInfo plus its open balance"""
+        infos = [row.as_dict() for row in self.search_client(term, after_id, limit)]
+        balances = self.dbm.get_client_balances([info["id_cliente"] for info in infos])
+        for info in infos:
+            info["saldo_aberto"] = balances[info["id_cliente"]]["saldo_aberto"]
+        return infos
+
+    def stream_products(self, term: str = None):
+        """Yield products one by one without loading them all"""
+        if not term:
+            return self.dbm.iter_by_table("produtos")
+        return self.dbm.iter_by_text("produtos", term)
 
-        except ValueError:
-            return None, "Deve ser um número válido"
+    def stream_clients(self, term: str = None):
+        """Yield clients one by one without loading them all"""
+        if not term:
+            return self.dbm.iter_by_table("clientes")
+        return self.dbm.iter_by_text("clientes", term)
 
-    def _validate_name(
+    def _search(
         self,
         table: Literal["produtos", "clientes"],
-        name: str,
-        instance_id: int = None,
+        term: str,
+        after_id: int,
+        limit: int,
     ):
-        if existing_row := self.dbm.get_by_name(table, name):
-            if instance_id and instance_id != self.dbm.get_table_row_info(
-                table,
-                existing_row,
-                ("id_produto" if table == "produtos" else "id_cliente"),
-            ):
-                return "Nome existente"
-        elif not name:
-            return "Obrigatório"
-        return ""
+        if term:
+            return self.dbm.get_by_text(table, term, limit, after_id)
+        if limit is None:
+            return self.dbm.get_by_table(table)
+        return self.dbm.get_page(table, after_id, limit)
+
+    def search_transactions(
+        self,
+        client_name: str = None,
+        start_date: str = None,
+        end_date: str = None,
+        t_type: Literal["P", "V"] = None,
+        status: Literal["aberto", "fechado", "cancelado"] = None,
+        after_id: int = None,
+        limit: int = 50,
+    ):
+        """Transactions of the client (by exact name) in the date range, paginated"""
+        client_id = None
+        if client_name:
+            if not (client := self.dbm.get_by_name("clientes", client_name)):
+                return []
+            client_id = client["id_cliente"]
+
+        return self.dbm.search_transactions(
+            client_id, start_date, end_date, t_type, status, after_id, limit or 50
+        )
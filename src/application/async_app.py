@@ -0,0 +1,23 @@
+from application.app import App
+from data.async_db_manager import AsyncDbManager
+
+
+class AsyncApp:
+    """
+    Awaitable version of every public App method, for async Flet handlers:
+    `errors = await app.try_add_product(**data)`.
+    \nValidation and db work run on the AsyncDbManager executor.
+    """
+
+    def __init__(self, app: App, adbm: AsyncDbManager = None):
+        self.app = app
+        self.adbm = adbm or AsyncDbManager(app.dbm)
+
+    def __getattr__(self, name: str):
+        return self.adbm.wrap(getattr(self.app, name))
+
+    async def run(self, func, *args, **kwargs):
+        return await self.adbm.run(func, *args, **kwargs)
+
+    def close(self, wait: bool = True):
+        self.adbm.close(wait)
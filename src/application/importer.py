@@ -0,0 +1,326 @@
+"""
+Streaming import of products, clients and historical transactions from
+CSV or JSON-lines files.
+\nRows are read and validated `chunk_size` at a time (same rules as the
+forms, see RecordValidator) and every chunk of valid rows is written in one
+db transaction, so memory stays bounded whatever the file size. Invalid rows
+are skipped and reported as (line, field, message).
+
+Transactions: JSON-lines objects like
+{"data": "2024-01-31", "cliente": "Ana", "tipo": "V", "pagamento": 10,
+"itens": [{"produto": "Nhoque", "quantidade": 2, "valor_unitario": 15}]}
+or CSV with one item per line and the columns transacao, data, cliente,
+tipo, pagamento, produto, quantidade, valor_unitario; consecutive lines with
+the same `transacao` are one transaction. Clients and products are given by
+exact name.
+
+Run from `src`: python -m application.importer produtos arquivo.csv
+[--db PATH] [--errors erros.csv] [--chunk 5000] [--profile balanced]
+"""
+import argparse
+import csv
+import datetime
+import io
+import json
+import os
+import time
+from contextlib import nullcontext
+from itertools import groupby, islice
+from typing import Callable, Iterator, Literal
+from application.app import App
+from application.validation import RecordValidator, ID_COLUMNS
+from data.database import MassesDatabase
+from data.db_manager import DbManager
+from data.table_classes import TransactionData
+
+ImportKind = Literal["produtos", "clientes", "transacoes"]
+RowError = tuple[int, str, str]  # (line, field, message)
+
+
+class ImportReport:
+    """Totals of an import plus its first `max_errors` row errors"""
+
+    def __init__(self, max_errors: int = 1000):
+        self.max_errors = max_errors
+        self.read = 0
+        self.imported = 0
+        self.failed = 0
+        self.errors: list[RowError] = []
+        self.seconds = 0.0
+
+    def add_errors(self, errors: list[RowError]):
+        self.errors += errors[:self.max_errors - len(self.errors)]
+
+    def __repr__(self):
+        return (
+            f"ImportReport(lidos={self.read}, importados={self.imported}, "
+            f"com_erro={self.failed}, segundos={self.seconds:.1f})"
+        )
+
+
+class Importer:
+    """
+    Import files through `app`'s validation and DbManager's bulk writes.
+    \n`on_progress(report, fraction_of_file_read)` is called after every chunk.
+    """
+
+    def __init__(
+        self,
+        app: App,
+        chunk_size: int = 5000,
+        on_progress: Callable[[ImportReport, float], None] = None,
+        encoding: str = "utf-8-sig",
+        max_errors: int = 1000,
+    ):
+        self.app = app
+        self.dbm = app.dbm
+        self.chunk_size = chunk_size
+        self.on_progress = on_progress
+        self.encoding = encoding
+        self.max_errors = max_errors
+
+    def run(self, kind: ImportKind, path: str, errors_path: str = None) -> ImportReport:
+        """Import the whole file; every row error also goes to `errors_path` (CSV)"""
+        if kind not in ("produtos", "clientes", "transacoes"):
+            raise ValueError(f"Tipo de importação inválido: {kind}")
+
+        report = ImportReport(self.max_errors)
+        start = time.perf_counter()
+
+        errors_out = (
+            open(errors_path, "w", newline="", encoding="utf-8")
+            if errors_path else nullcontext()
+        )
+        with open(path, "rb") as raw, errors_out:
+            errors_file = csv.writer(errors_out) if errors_path else None
+            if errors_file:
+                errors_file.writerow(("linha", "campo", "mensagem"))
+
+            size = os.fstat(raw.fileno()).st_size or 1
+            text = io.TextIOWrapper(raw, encoding=self.encoding, newline="")
+            rows = self._read_rows(text, path)
+            if kind == "transacoes":
+                rows = self._group_transactions(rows)
+
+            while chunk := list(islice(rows, self.chunk_size)):
+                unreadable = [(line, "linha", row["_erro"]) for line, row in chunk if "_erro" in row]
+                readable = [(line, row) for line, row in chunk if "_erro" not in row]
+
+                if kind == "transacoes":
+                    imported, errors = self._import_transactions(readable)
+                else:
+                    imported, errors = self._import_records(kind, readable)
+                errors = unreadable + errors
+
+                report.read += len(chunk)
+                report.imported += imported
+                report.failed += len(chunk) - imported
+                report.add_errors(errors)
+                if errors_file:
+                    errors_file.writerows(errors)
+
+                report.seconds = time.perf_counter() - start
+                if self.on_progress:
+                    self.on_progress(report, min(raw.tell() / size, 1.0))
+
+        report.seconds = time.perf_counter() - start
+        return report
+
+    # ↓ CHUNK WRITERS ↓
+
+    def _import_records(
+        self, table: Literal["produtos", "clientes"], chunk: list[tuple[int, dict]]
+    ) -> tuple[int, list[RowError]]:
+        # ids in the file are ignored: every row is a new record
+        id_column = ID_COLUMNS[table]
+        records = [{k: v for k, v in row.items() if k != id_column} for _, row in chunk]
+        results = self.app.validate_records(table, records)
+
+        valid, errors = [], []
+        for (line, _), (row_errors, values) in zip(chunk, results):
+            if any(row_errors.values()):
+                errors += [(line, field, msg) for field, msg in row_errors.items() if msg]
+            else:
+                valid.append(values)
+
+        if table == "produtos":
+            self.dbm.add_products_bulk([
+                (v["nome"], v["tipo"], v["preco_producao"], v["preco_venda"],
+                 v["estoque_min"], v["estoque_atual"])
+                for v in valid
+            ])
+        else:
+            self.dbm.add_clients_bulk([(v["nome"], v["contato"] or None) for v in valid])
+        return len(valid), errors
+
+    def _import_transactions(
+        self, chunk: list[tuple[int, dict]]
+    ) -> tuple[int, list[RowError]]:
+        client_ids = self.dbm.get_ids_by_names(
+            "clientes", list({t["cliente"] for _, t in chunk if self._is_name(t.get("cliente"))})
+        )
+        product_ids = self.dbm.get_ids_by_names(
+            "produtos",
+            list({
+                i["produto"] for _, t in chunk for i in self._items(t)
+                if self._is_name(i.get("produto"))
+            })
+        )
+
+        valid, errors = [], []
+        for line, transaction in chunk:
+            data, row_errors = self._check_transaction(transaction, client_ids, product_ids)
+            if row_errors:
+                errors += [(line, field, msg) for field, msg in row_errors]
+            else:
+                valid.append(data)
+
+        self.dbm.register_transactions_bulk(valid)
+        return len(valid), errors
+
+    # ↓ HELPERS ↓
+
+    def _check_transaction(
+        self,
+        transaction: dict,
+        client_ids: dict[str, int],
+        product_ids: dict[str, int],
+    ) -> tuple[TransactionData, list[tuple[str, str]]]:
+        errors = []
+        convert = RecordValidator.convert_number
+
+        try:
+            date = datetime.date.fromisoformat(str(transaction.get("data")).strip())
+        except ValueError:
+            date = None
+            errors.append(("data", "Data inválida (use AAAA-MM-DD)"))
+
+        t_type = str(transaction.get("tipo") or "").strip().upper()
+        if t_type not in ("P", "V"):
+            errors.append(("tipo", "Deve ser P ou V"))
+
+        client_id, client_name = None, transaction.get("cliente")
+        if client_name:
+            if self._is_name(client_name):
+                client_id = client_ids.get(client_name)
+            if client_id is None:
+                errors.append(("cliente", f"Cliente não encontrado: {client_name}"))
+
+        payment = 0
+        if transaction.get("pagamento") not in (None, ""):
+            payment, msg = convert(transaction["pagamento"], is_float=True)
+            if msg: errors.append(("pagamento", msg))
+
+        items = []
+        if not isinstance(transaction.get("itens"), list):
+            errors.append(("itens", "Deve ser uma lista de itens"))
+        elif not transaction["itens"]:
+            errors.append(("itens", "Obrigatório"))
+        elif len(self._items(transaction)) < len(transaction["itens"]):
+            errors.append(("itens", "Cada item deve ser um objeto JSON"))
+        for item in self._items(transaction):
+            name = item.get("produto")
+            product_id = product_ids.get(name) if self._is_name(name) else None
+            if product_id is None:
+                errors.append(("produto", f"Produto não encontrado: {item.get('produto')}"))
+            amount, msg = convert(item.get("quantidade"), is_float=False)
+            if msg or not amount:
+                errors.append(("quantidade", msg or "Deve ser maior que zero"))
+            unit_value, msg = convert(item.get("valor_unitario"), is_float=True)
+            if msg: errors.append(("valor_unitario", msg))
+            items.append(
+                {"item_id": product_id, "item_amount": amount, "unit_value": unit_value}
+            )
+
+        data: TransactionData = {
+            "client_id": client_id, "t_type": t_type, "items": items,
+            "date": date, "payment": payment,
+        }
+        return data, errors
+
+    def _read_rows(self, text: io.TextIOWrapper, path: str) -> Iterator[tuple[int, dict]]:
+        """(line number, row dict) of a .csv or JSON-lines file"""
+        if path.lower().endswith(".csv"):
+            sample = text.read(8 * 1024)  # the Sniffer is slow on large samples
+            text.seek(0)
+            try:
+                dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+            except csv.Error:
+                dialect = csv.excel
+            reader = csv.DictReader(text, dialect=dialect)
+            for row in reader:
+                yield reader.line_num, {k.strip(): v for k, v in row.items() if k}
+            return
+
+        for line_number, line in enumerate(text, 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError:
+                row = {"_erro": "JSON inválido"}
+            if not isinstance(row, dict):
+                row = {"_erro": "Linha deve ser um objeto JSON"}
+            yield line_number, row
+
+    @staticmethod
+    def _items(transaction: dict) -> list[dict]:
+        """The well-formed entries of `itens` (the rest is reported by _check_transaction)"""
+        items = transaction.get("itens")
+        return [i for i in items if isinstance(i, dict)] if isinstance(items, list) else []
+
+    @staticmethod
+    def _is_name(value) -> bool:
+        return isinstance(value, str) and bool(value)
+
+    @staticmethod
+    def _group_transactions(
+        rows: Iterator[tuple[int, dict]]
+    ) -> Iterator[tuple[int, dict]]:
+        """Merge consecutive one-item CSV lines of the same `transacao`"""
+        for key, lines in groupby(rows, key=lambda r: r[1].get("transacao", r[0])):
+            lines = list(lines)
+            line, first = lines[0]
+            if "itens" in first or "_erro" in first:  # JSON-lines: one transaction per row
+                yield from lines
+                continue
+            yield line, {
+                **first,
+                "itens": [
+                    {k: row.get(k) for k in ("produto", "quantidade", "valor_unitario")}
+                    for _, row in lines if row.get("produto")
+                ],
+            }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("kind", choices=["produtos", "clientes", "transacoes"])
+    parser.add_argument("path")
+    parser.add_argument("--db", default="..\\database\\masses.db")
+    parser.add_argument("--errors", help="CSV file for the rows with errors")
+    parser.add_argument("--chunk", type=int, default=5000)
+    parser.add_argument("--encoding", default="utf-8-sig")
+    parser.add_argument(
+        "--profile", choices=["safe", "balanced", "throughput"], default="balanced",
+        help="throughput (synchronous=OFF) is faster but a crash or power loss "
+             "may corrupt the db: only use it on a copy",
+    )
+    args = parser.parse_args()
+
+    def show(report: ImportReport, fraction: float):
+        print(
+            f"\r{fraction:6.1%}  lidos {report.read:,}  importados {report.imported:,}"
+            f"  com erro {report.failed:,}  {report.seconds:6.1f}s",
+            end="", flush=True,
+        )
+
+    db = MassesDatabase(args.db, profile=args.profile)
+    importer = Importer(App(DbManager(db)), args.chunk, show, args.encoding)
+    report = importer.run(args.kind, args.path, args.errors)
+    db.close()
+    print(f"\n{report}")
+
+
+if __name__ == "__main__":
+    main()
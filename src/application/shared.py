@@ -0,0 +1,84 @@
+import os
+import threading
+from typing import Literal
+from application.app import App
+from application.async_app import AsyncApp
+from data.database import MassesDatabase
+from data.db_manager import DbManager
+
+
+class SharedDataLayer:
+    """
+    One MassesDatabase, DbManager, App and AsyncApp for every session of the
+    process (Flet web mode opens a session per browser tab).
+    \nThe schema check runs once, the connection pool, entity caches and db
+    executor are shared, and a write from one session invalidates the cache
+    for all of them. Each session only builds its own views:
+    `UI(layer.open_session())`.
+    """
+
+    def __init__(
+        self,
+        path: str = None,
+        pool_size: int = 5,
+        profile: Literal["safe", "balanced", "throughput"] = "balanced",
+        write_queue: bool = False,
+    ):
+        self.db = MassesDatabase(path, pool_size, profile)
+        self.dbm = DbManager(self.db)
+        if write_queue:
+            self.dbm.enable_write_queue()
+        self.app = App(self.dbm)
+        self.async_app = AsyncApp(self.app)
+
+        self._lock = threading.Lock()
+        self.sessions = 0
+
+    def open_session(self) -> AsyncApp:
+        """Register a new session and hand it the shared AsyncApp"""
+        with self._lock:
+            self.sessions += 1
+        return self.async_app
+
+    def close_session(self, e=None):
+        """Call when a session ends (usable as page.on_disconnect)"""
+        with self._lock:
+            self.sessions = max(self.sessions - 1, 0)
+
+    def close(self):
+        self.async_app.close(wait=True)
+        self.dbm.disable_write_queue()
+        self.db.close()
+
+
+_layers: dict[str, SharedDataLayer] = {}
+_layers_lock = threading.Lock()
+
+
+def shared_layer(path: str = None, **options) -> SharedDataLayer:
+    """
+    The process-wide layer of the db at `path` (None: one shared in-memory
+    db), created on first call. `options` only apply to that first call.
+    """
+    key = _layer_key(path)
+    # held while creating: sessions starting together must not each build one
+    with _layers_lock:
+        if (layer := _layers.get(key)) is None:
+            layer = _layers[key] = SharedDataLayer(path, **options)
+    return layer
+
+
+def _layer_key(path: str) -> str:
+    """The file MassesDatabase opens for `path`, the same for every spelling of it"""
+    resolved = MassesDatabase._get_path(path)
+    if resolved == ":memory:":
+        return resolved
+    return os.path.normcase(os.path.realpath(resolved))
+
+
+def close_shared_layers():
+    with _layers_lock:
+        layers = list(_layers.values())
+        _layers.clear()
+    for layer in layers:
+        layer.close()
@@ -0,0 +1,144 @@
+from data.db_manager import DbManager
+from data.entity_cache import MISSING
+from typing import Literal
+
+FieldRule = Literal["name", "required", "text", "float", "int"]
+
+# form fields of each table and how they are checked/converted
+FIELD_RULES: dict[str, dict[str, FieldRule]] = {
+    "produtos": {
+        "nome": "name",
+        "tipo": "required",
+        "preco_producao": "float",
+        "preco_venda": "float",
+        "estoque_min": "int",
+        "estoque_atual": "int",
+    },
+    "clientes": {
+        "nome": "name",
+        "contato": "text",
+    },
+}
+ID_COLUMNS = {"produtos": "id_produto", "clientes": "id_cliente"}
+
+
+class RecordValidator:
+    """
+    Validate product/client forms, one or a whole batch at a time.
+    \nField rules run in Python; every name uniqueness (and, for updates,
+    row existence) check of the batch is a single query. Names repeated
+    inside the batch are also rejected. A single form whose name is in
+    DbManager's entity cache is answered from it; anything the cache can't
+    confirm (including a name cached as absent) goes through the same query
+    as a batch.
+    """
+
+    def __init__(self, dbm: DbManager):
+        self.dbm = dbm
+
+    def validate(
+        self,
+        table: Literal["produtos", "clientes"],
+        records: list[dict],
+    ) -> list[tuple[dict[str, str], dict]]:
+        """
+        (errors, values) of each record, in order.
+        \nErrors hold one message per form field ("" when valid); values are
+        the converted fields. A record carrying its id column is an update.
+        """
+        id_column = ID_COLUMNS[table]
+        results = [self._check_fields(table, record) for record in records]
+
+        to_check = [
+            i for i, (errors, values) in enumerate(results)
+            if values["nome"] and not errors["nome"]
+        ]
+        entries = [
+            (results[i][1]["nome"], self._row_id(records[i], id_column)) for i in to_check
+        ]
+        conflicts = None
+        if len(records) == 1 and entries:
+            conflicts = self._cached_conflict(table, *entries[0])
+        if conflicts is None:
+            conflicts = self.dbm.find_name_conflicts(table, entries)
+
+        first_use: dict[str, int] = {}
+        for i, (conflict_id, exists) in zip(to_check, conflicts):
+            errors, values = results[i]
+            if not exists:
+                errors["nome"] = "Registro inexistente"
+            elif conflict_id is not None:
+                errors["nome"] = "Nome existente"
+            elif values["nome"] in first_use:
+                errors["nome"] = f"Nome repetido (linha {first_use[values['nome']] + 1})"
+            else:
+                first_use[values["nome"]] = i
+
+        return results
+
+    def validate_one(
+        self, table: Literal["produtos", "clientes"], record: dict
+    ) -> tuple[dict[str, str], dict]:
+        return self.validate(table, [record])[0]
+
+    # ↓ HELPERS ↓
+
+    def _check_fields(self, table: str, record: dict) -> tuple[dict[str, str], dict]:
+        errors, values = {}, {}
+        for field, rule in FIELD_RULES[table].items():
+            raw = record.get(field)
+            if rule in ("float", "int"):
+                values[field], errors[field] = self.convert_number(raw, rule == "float")
+            else:
+                values[field] = "" if raw is None else str(raw)
+                errors[field] = (
+                    "Obrigatório" if rule != "text" and not values[field].strip() else ""
+                )
+        return errors, values
+
+    def _cached_conflict(
+        self, table: Literal["produtos", "clientes"], name: str, row_id: int | None
+    ) -> list[tuple[int | None, bool]] | None:
+        """
+        find_name_conflicts of one entry when a cached row settles it: the
+        name is taken (new record) or belongs to this very row (update).
+        
+None otherwise, to ask the db: an absent name may have been taken by
+        another process since, and a conflicting update still needs its row
+        checked.
+        """
+        row = self.dbm.cache[table].get_by_name(name)
+        if row is MISSING or row is None:
+            return None
+        row_id_found = row[ID_COLUMNS[table]]
+        if row_id is None:
+            return [(row_id_found, True)]
+        if row_id == row_id_found:
+            return [(None, True)]
+        return None
+
+    @staticmethod
+    def _row_id(record: dict, id_column: str) -> int | None:
+        row_id = record.get(id_column)
+        return None if row_id in (None, "") else int(row_id)
+
+    @staticmethod
+    def convert_number(value: str | float | int | None, is_float: bool):
+        """
+        Try to convert and validate the number.
+        \nTuple: (Value converted, Error message)
+        """
+        if value is None or value == "":
+            return None, "Obrigatório"
+
+        if isinstance(value, (float, int)):
+            num = value
+        else:
+            try:
+                num = float(value.replace(",", ".")) if is_float else int(value)
+            except (AttributeError, TypeError, ValueError):  # e.g. a list from JSON
+                return None, "Deve ser um número válido"
+
+        if num < 0:
+            return None, "Não pode ser negativo"
+        return num, ""
@@ -0,0 +1,55 @@
+"""
+Connections per second: a fresh sqlite3.connect per call (old get_connection)
+versus a checkout from MassesDatabase's pool.
+\nRun from `src`: python -m benchmarks.bench_connections [-n 20000]
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+from data.database import MassesDatabase
+
+
+def legacy_checkouts_per_sec(path: str, n: int) -> float:
+    start = time.perf_counter()
+    for _ in range(n):
+        conn = sqlite3.connect(path)
+        conn.execute("PRAGMA foreign_keys = ON")
+        conn.row_factory = sqlite3.Row
+        with conn:
+            conn.execute("SELECT 1").fetchone()
+        conn.close()
+    return n / (time.perf_counter() - start)
+
+
+def pooled_checkouts_per_sec(db: MassesDatabase, n: int) -> float:
+    start = time.perf_counter()
+    for _ in range(n):
+        with db.get_connection() as conn:
+            conn.execute("SELECT 1").fetchone()
+    return n / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("-n", type=int, default=20000, help="checkouts per run")
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    try:
+        db = MassesDatabase(path)
+        before = legacy_checkouts_per_sec(path, args.n)
+        after = pooled_checkouts_per_sec(db, args.n)
+        db.close()
+    finally:
+        os.remove(path)
+
+    print(f"sqlite3.connect por chamada: {before:12,.0f} conexões/s")
+    print(f"pool de conexões:            {after:12,.0f} conexões/s")
+    print(f"ganho:                       {after / before:12.1f}x")
+
+
+if __name__ == "__main__":
+    main()
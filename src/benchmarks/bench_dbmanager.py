@@ -0,0 +1,252 @@
+"""
+Latency percentiles and throughput of every public DbManager and App method
+on synthetic databases of 1k, 100k and 1M transactions.
+\narchive_transactions runs last (it moves old transactions out of the main
+file, into a temporary archive for :memory:). Maintenance and async methods
+(backups, write queue, instrumentation, AsyncDbManager) have their own
+benchmarks.
+\nRun from `src`: python -m benchmarks.bench_dbmanager [--scales 1k 100k 1m]
+[--db PATH] [-n 200] [--only REGEX] [--json FILE]
+"""
+import argparse
+import datetime
+import itertools
+import json
+import os
+import random
+import re
+import statistics
+import tempfile
+import time
+from typing import Callable
+from application.app import App
+from benchmarks.synthetic import populate
+from data.database import MassesDatabase
+from data.db_manager import DbManager
+
+SCALES = {"1k": 1_000, "10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+
+# operations that touch every row are run fewer times
+HEAVY_CASES = {"take_stock_snapshot": 5, "get_by_table(clientes)": 20,
+               "iter_by_table(clientes)": 20, "App.stream_clients": 20,
+               "archive_transactions": 5}
+
+Case = tuple[str, Callable[[random.Random], object]]
+
+
+def build_cases(app: App, ids: dict[str, int], archive_path: str = None) -> list[Case]:
+    """(name, call) pairs; every call picks its arguments from `rng`"""
+    dbm = app.dbm
+    names = itertools.count(1)
+    today = datetime.date.today()
+
+    def product(rng): return rng.randint(1, ids["produtos"])
+    def client(rng): return rng.randint(1, ids["clientes"])
+    def client_name(rng): return dbm.get_by_id(client(rng), "clientes")["nome"]
+    def product_name(rng): return dbm.get_by_id(product(rng), "produtos")["nome"]
+    def day(rng): return today - datetime.timedelta(days=rng.randint(0, 729))
+    def items(rng): return [
+        {"item_id": product(rng), "item_amount": rng.randint(1, 10), "unit_value": 10}
+        for _ in range(rng.randint(1, 4))
+    ]
+    def product_data(rng, product_id=None): return {
+        "id_produto": product_id, "nome": f"Produto benchmark {next(names)}",
+        "tipo": "massa", "preco_producao": "3,5", "preco_venda": "9.9",
+        "estoque_min": "5", "estoque_atual": str(rng.randint(0, 100)),
+    }
+    def client_data(client_id=None): return {
+        "id_cliente": client_id, "nome": f"Cliente benchmark {next(names)}",
+        "contato": "(11) 90000-0000",
+    }
+    def consume(iterator):
+        for _ in iterator: pass
+    # every archive run moves the next 30 days, oldest first
+    archive_cutoffs = (today - datetime.timedelta(days=d) for d in itertools.count(700, -30))
+
+    reads: list[Case] = [
+        ("get_by_id(produtos)", lambda rng: dbm.get_by_id(product(rng), "produtos")),
+        ("get_by_id(clientes)", lambda rng: dbm.get_by_id(client(rng), "clientes")),
+        ("get_by_id(transacoes)",
+         lambda rng: dbm.get_by_id(rng.randint(1, ids["transacoes"]), "transacoes")),
+        ("get_by_name(clientes)", lambda rng: dbm.get_by_name("clientes", client_name(rng))),
+        ("get_by_text(produtos)",
+         lambda rng: dbm.get_by_text("produtos", product_name(rng).split()[0], 50)),
+        ("get_by_text(clientes)",
+         lambda rng: dbm.get_by_text("clientes", client_name(rng).split()[-2], 50)),
+        ("iter_by_text(clientes)",
+         lambda rng: consume(dbm.iter_by_text("clientes", client_name(rng).split()[0]))),
+        ("get_by_table(produtos)", lambda rng: dbm.get_by_table("produtos")),
+        ("get_by_table(clientes)", lambda rng: dbm.get_by_table("clientes")),
+        ("iter_by_table(clientes)", lambda rng: consume(dbm.iter_by_table("clientes"))),
+        ("get_page(clientes)", lambda rng: dbm.get_page("clientes", client(rng), 50)),
+        ("get_table_row_info", lambda rng: dbm.get_table_row_info("produtos", product(rng), "all")),
+        ("search_transactions(cliente)",
+         lambda rng: dbm.search_transactions(client_id=client(rng))),
+        ("search_transactions(período)",
+         lambda rng: dbm.search_transactions(start_date=day(rng), t_type="V")),
+        ("get_stock_on", lambda rng: dbm.get_stock_on(day(rng), product(rng))),
+        ("get_client_balance", lambda rng: dbm.get_client_balance(client(rng))),
+        ("get_client_balances(50)",
+         lambda rng: dbm.get_client_balances([client(rng) for _ in range(50)])),
+        ("get_ids_by_names(100)", lambda rng: dbm.get_ids_by_names(
+            "produtos", [product_name(rng) for _ in range(100)])),
+        ("find_name_conflicts(100)", lambda rng: dbm.find_name_conflicts(
+            "clientes", [(client_name(rng), None) for _ in range(100)])),
+        ("App.get_product_info", lambda rng: app.get_product_info(product(rng))),
+        ("App.get_client_info", lambda rng: app.get_client_info(client(rng))),
+        ("App.get_client_balance", lambda rng: app.get_client_balance(client(rng))),
+        ("App.search_product", lambda rng: app.search_product(product_name(rng)[:4])),
+        ("App.search_client", lambda rng: app.search_client(client_name(rng)[:4], limit=50)),
+        ("App.search_product_info", lambda rng: app.search_product_info()),
+        ("App.search_client_info",
+         lambda rng: app.search_client_info(after_id=client(rng), limit=50)),
+        ("App.stream_products", lambda rng: consume(app.stream_products())),
+        ("App.stream_clients", lambda rng: consume(app.stream_clients())),
+        ("App.search_transactions",
+         lambda rng: app.search_transactions(client_name(rng), start_date=day(rng))),
+        ("App.validate_records(100)", lambda rng: app.validate_records(
+            "produtos", [product_data(rng) for _ in range(100)])),
+    ]
+    writes: list[Case] = [
+        ("add_product", lambda rng: dbm.add_product(
+            f"Produto benchmark {next(names)}", "massa", 3.5, 9.9, 5, 10)),
+        ("add_client", lambda rng: dbm.add_client(f"Cliente benchmark {next(names)}")),
+        ("add_products_bulk(100)", lambda rng: dbm.add_products_bulk([
+            (f"Produto benchmark {next(names)}", "massa", 3.5, 9.9, 5, 10)
+            for _ in range(100)
+        ])),
+        ("add_clients_bulk(100)", lambda rng: dbm.add_clients_bulk([
+            (f"Cliente benchmark {next(names)}", None) for _ in range(100)
+        ])),
+        ("update_product", lambda rng: dbm.update_product(
+            product(rng), f"Produto benchmark {next(names)}", "massa", 3.5, 9.9, 5,
+            rng.randint(0, 100))),
+        ("update_client", lambda rng: dbm.update_client(
+            client(rng), f"Cliente benchmark {next(names)}", "")),
+        ("register_transaction",
+         lambda rng: dbm.register_transaction(client(rng), "V", items(rng), payment=5)),
+        ("register_transactions_bulk(100)", lambda rng: dbm.register_transactions_bulk([
+            {"client_id": client(rng), "t_type": "V", "items": items(rng)}
+            for _ in range(100)
+        ])),
+        ("register_payment",
+         lambda rng: dbm.register_payment(rng.randint(1, ids["transacoes"]), 1)),
+        ("register_production",
+         lambda rng: dbm.register_production(product(rng), rng.randint(1, 50))),
+        ("register_productions_bulk(20)", lambda rng: dbm.register_productions_bulk(
+            [(product(rng), rng.randint(1, 50)) for _ in range(20)])),
+        ("adjust_stock", lambda rng: dbm.adjust_stock(product(rng), -1)),
+        ("take_stock_snapshot", lambda rng: dbm.take_stock_snapshot()),
+        ("App.try_add_product", lambda rng: app.try_add_product(**product_data(rng))),
+        ("App.try_update_product",
+         lambda rng: app.try_update_product(**product_data(rng, product(rng)))),
+        ("App.try_add_client", lambda rng: app.try_add_client(**client_data())),
+        ("App.try_update_client",
+         lambda rng: app.try_update_client(**client_data(client(rng)))),
+        ("archive_transactions",
+         lambda rng: dbm.archive_transactions(next(archive_cutoffs), archive_path)),
+    ]
+    return reads + writes
+
+
+def measure(call: Callable[[random.Random], object], iterations: int, seed: int):
+    """Run `call` `iterations` times; latencies in ms, throughput in ops/s"""
+    rng = random.Random(seed)
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        call(rng)
+        latencies.append((time.perf_counter() - t0) * 1000)
+    total = time.perf_counter() - start
+
+    cuts = statistics.quantiles(latencies, n=100, method="inclusive") if len(latencies) > 1 else latencies * 99
+    return {
+        "n": iterations,
+        "p50": cuts[49],
+        "p95": cuts[94],
+        "p99": cuts[98],
+        "max": max(latencies),
+        "ops_s": iterations / total,
+    }
+
+
+def open_database(path: str | None, scale: str) -> MassesDatabase:
+    """`path=None` is :memory:; otherwise one file per scale, created if missing"""
+    if path is None:
+        return MassesDatabase(pool_size=1)
+    root, ext = os.path.splitext(os.path.abspath(path))
+    file_path = f"{root}_{scale}{ext or '.db'}"
+    open(file_path, "a").close()
+    return MassesDatabase(file_path)
+
+
+def row_counts(dbm: DbManager) -> dict[str, int]:
+    with dbm.db.get_connection() as conn:
+        return {
+            table: conn.execute(f"SELECT count(*) FROM {table}").fetchone()[0]
+            for table in ("produtos", "clientes", "transacoes")
+        }
+
+
+def run_scale(scale: str, args) -> dict[str, dict]:
+    db = open_database(args.db, scale)
+    dbm = DbManager(db)
+    app = App(dbm)
+
+    ids = row_counts(dbm)
+    if not ids["transacoes"]:
+        print(f"gerando {SCALES[scale]:,} transações...")
+        populate(dbm, SCALES[scale], seed=args.seed, verbose=True)
+        ids = row_counts(dbm)
+
+    print(f"\n== {scale} transações ({'arquivo' if args.db else ':memory:'}) ==")
+    print(f"{'método':34} {'n':>6} {'p50 ms':>9} {'p95 ms':>9}"
+          f" {'p99 ms':>9} {'max ms':>9} {'ops/s':>11}")
+    only = re.compile(args.only) if args.only else None
+    results = {}
+    # a file db archives next to itself (masses_arquivo.db), :memory: to a temp file
+    archive_dir = tempfile.TemporaryDirectory() if args.db is None else None
+    archive_path = os.path.join(archive_dir.name, "arquivo.db") if archive_dir else None
+    try:
+        for name, call in build_cases(app, ids, archive_path):
+            if only and not only.search(name):
+                continue
+            iterations = min(args.n, HEAVY_CASES.get(name, args.n))
+            results[name] = measure(call, iterations, args.seed)
+            print_row(name, results[name])
+    finally:
+        db.close()
+        if archive_dir:
+            archive_dir.cleanup()
+    return results
+
+
+def print_row(name: str, result: dict):
+    print(
+        f"{name:34} {result['n']:>6} {result['p50']:>9.3f} {result['p95']:>9.3f}"
+        f" {result['p99']:>9.3f} {result['max']:>9.3f} {result['ops_s']:>11,.0f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scales", nargs="+", choices=SCALES, default=["1k", "100k"])
+    parser.add_argument("--db", help="database file (one per scale); default :memory:")
+    parser.add_argument("-n", type=int, default=200, help="calls per method")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--only", help="regex of the methods to run")
+    parser.add_argument("--json", help="also save the results to this file")
+    args = parser.parse_args()
+
+    report = {}
+    for scale in args.scales:
+        report[scale] = run_scale(scale, args)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Simultaneous Flet web sessions: a data layer per session (the old
+testes.py) versus the process-wide SharedDataLayer.
+\nEvery session runs, as a task of one event loop like Flet does, what a
+browser tab does against the data layer: open it, load the first page of
+each tab, then `--actions` searches and sales. The UI itself isn't built.
+\nRun from `src`: python -m benchmarks.bench_sessions [-s 50] [--actions 20]
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+from application.app import App
+from application.async_app import AsyncApp
+from application.shared import SharedDataLayer
+from benchmarks.synthetic import populate
+from data.database import MassesDatabase
+from data.db_manager import DbManager
+
+
+async def session(
+    open_layer, index: int, ids: dict[str, int], actions: int, times: dict[str, list]
+):
+    rng = random.Random(index)
+    start = time.perf_counter()
+    app: AsyncApp = await asyncio.to_thread(open_layer)
+    opened = time.perf_counter()
+
+    await app.search_product_info(None, None, 50)
+    await app.search_client_info(None, None, 50)
+    await app.search_transactions(limit=50)
+    times["open"].append((opened - start) * 1000)
+    times["first_load"].append((time.perf_counter() - start) * 1000)
+
+    for _ in range(actions):
+        t0 = time.perf_counter()
+        if rng.random() < 0.8:
+            await app.search_client_info(None, rng.randint(0, ids["clientes"]), 50)
+        else:
+            await app.adbm.register_transaction(
+                rng.randint(1, ids["clientes"]), "V",
+                [{"item_id": rng.randint(1, ids["produtos"]), "item_amount": 1, "unit_value": 10}],
+            )
+        times["action"].append((time.perf_counter() - t0) * 1000)
+
+
+def run(open_layer, sessions: int, ids: dict, actions: int) -> tuple[dict, float]:
+    times = {"open": [], "first_load": [], "action": []}
+
+    async def main():
+        await asyncio.gather(*(
+            session(open_layer, i, ids, actions, times) for i in range(sessions)
+        ))
+
+    start = time.perf_counter()
+    asyncio.run(main())
+    return times, time.perf_counter() - start
+
+
+def report(label: str, times: dict, total: float, threads: int, connections: int):
+    def p(values, q):
+        return statistics.quantiles(values, n=100, method="inclusive")[q - 1]
+
+    print(f"{label}: {total:.2f}s no total, {threads} threads, {connections} conexões")
+    for name, values in times.items():
+        print(f"  {name:11} p50 {p(values, 50):8.1f} ms   p95 {p(values, 95):8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("-s", "--sessions", type=int, default=50)
+    parser.add_argument("--actions", type=int, default=20, help="per session")
+    parser.add_argument("--transactions", type=int, default=10_000)
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    try:
+        db = MassesDatabase(path)
+        dbm = DbManager(db)
+        populate(dbm, args.transactions)
+        ids = {table: len(dbm.get_by_table(table)) for table in ("produtos", "clientes")}
+        db.close()
+
+        # old testes.py: every session builds its own stack
+        stacks: list[AsyncApp] = []
+        lock = threading.Lock()
+
+        def open_own_stack() -> AsyncApp:
+            app = AsyncApp(App(DbManager(MassesDatabase(path))))
+            with lock:
+                stacks.append(app)
+            return app
+
+        baseline_threads = threading.active_count()
+        times, total = run(open_own_stack, args.sessions, ids, args.actions)
+        threads = threading.active_count() - baseline_threads
+        connections = sum(app.app.dbm.db.pool.stats()["created"] for app in stacks)
+        for app in stacks:
+            app.close()
+            app.app.dbm.db.close()
+        report("uma camada por sessão", times, total, threads, connections)
+
+        layer = SharedDataLayer(path)
+        baseline_threads = threading.active_count()
+        times, total = run(layer.open_session, args.sessions, ids, args.actions)
+        threads = threading.active_count() - baseline_threads
+        connections = layer.db.pool.stats()["created"]
+        layer.close()
+        report("camada compartilhada", times, total, threads, connections)
+    finally:
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+
+if __name__ == "__main__":
+    main()
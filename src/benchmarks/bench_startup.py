@@ -0,0 +1,148 @@
+"""
+Cold start: import time of the app's modules, MassesDatabase startup on a
+new and on an up-to-date file and, when Flet is installed, UI construction
+(eager vs lazy tabs) and time to first frame.
+\nRun from `src`: python -m benchmarks.bench_startup [-n 10] [--first-frame]
+"""
+import argparse
+import importlib.util
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from benchmarks.synthetic import populate
+from data.database import MassesDatabase
+from data.db_manager import DbManager
+
+SRC = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODULES = ["data.database", "data.db_manager", "application.async_app", "flet", "ui.interface"]
+
+_IMPORT_SNIPPET = (
+    "import time; start = time.perf_counter(); import {module}; "
+    "print((time.perf_counter() - start) * 1000)"
+)
+
+
+def import_ms(module: str, n: int) -> tuple[float, float]:
+    """Median (import, whole process) ms of `import module` in a fresh interpreter"""
+    imports, processes = [], []
+    for _ in range(n):
+        start = time.perf_counter()
+        out = subprocess.run(
+            [sys.executable, "-c", _IMPORT_SNIPPET.format(module=module)],
+            cwd=SRC, capture_output=True, text=True, check=True,
+        ).stdout
+        processes.append((time.perf_counter() - start) * 1000)
+        imports.append(float(out))
+    return statistics.median(imports), statistics.median(processes)
+
+
+def db_open_ms(path: str, n: int) -> float:
+    """Median ms of MassesDatabase(path) plus its first checkout"""
+    times = []
+    for _ in range(n):
+        start = time.perf_counter()
+        db = MassesDatabase(path)
+        with db.get_connection():
+            pass
+        times.append((time.perf_counter() - start) * 1000)
+        db.close()
+    return statistics.median(times)
+
+
+def ui_build_ms(path: str, lazy: bool, n: int) -> float:
+    """Median ms of building the UI controls (no page, no list loads)"""
+    from application.app import App
+    from ui.interface import UI
+
+    db = MassesDatabase(path)
+    app = App(DbManager(db))
+    times = []
+    for _ in range(n):
+        start = time.perf_counter()
+        UI(app, lazy=lazy)
+        times.append((time.perf_counter() - start) * 1000)
+    db.close()
+    return statistics.median(times)
+
+
+def first_frame_ms(path: str, lazy: bool) -> float:
+    """Process start until `page.add(ui)` returned, in a fresh interpreter"""
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_startup", "--frame-child", path]
+        + ([] if lazy else ["--eager"]),
+        cwd=SRC, capture_output=True, text=True, check=True,
+    )
+    return (time.perf_counter() - start) * 1000
+
+
+def _frame_child(path: str, lazy: bool):
+    """Open the real window, show the first frame and close it"""
+    import flet as ft
+    from application.app import App
+    from ui.interface import UI
+
+    async def main(page: ft.Page):
+        ui = UI(App(DbManager(MassesDatabase(path))), lazy=lazy)
+        page.add(ui)
+        await ui.start()
+        await page.window.destroy_async()
+
+    ft.app(target=main)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("-n", type=int, default=10, help="runs per measurement")
+    parser.add_argument("--first-frame", action="store_true",
+                        help="also open the real window (needs a display)")
+    parser.add_argument("--frame-child", metavar="DB", help=argparse.SUPPRESS)
+    parser.add_argument("--eager", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.frame_child:
+        _frame_child(args.frame_child, lazy=not args.eager)
+        return
+
+    has_flet = importlib.util.find_spec("flet") is not None
+
+    print("import (processo novo)             import ms   processo ms")
+    for module in MODULES:
+        if module in ("flet", "ui.interface") and not has_flet:
+            continue
+        imported, process = import_ms(module, args.n)
+        print(f"  {module:32} {imported:10.1f} {process:12.1f}")
+
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    try:
+        start = time.perf_counter()
+        db = MassesDatabase(path)
+        print(f"\nbanco novo (tabelas + migrações):   {(time.perf_counter() - start) * 1000:8.1f} ms")
+        populate(DbManager(db), 1000)
+        db.close()
+        print(f"banco atualizado (só user_version): {db_open_ms(path, args.n):8.1f} ms")
+
+        if not has_flet:
+            print("\nflet não instalado: medições da interface puladas")
+            return
+
+        eager = ui_build_ms(path, lazy=False, n=args.n)
+        lazy = ui_build_ms(path, lazy=True, n=args.n)
+        print(f"\nUI com todas as abas:      {eager:8.1f} ms")
+        print(f"UI só com a aba visível:   {lazy:8.1f} ms  ({eager / lazy:.1f}x)")
+
+        if args.first_frame:
+            print(f"\nprimeiro quadro, todas as abas:    {first_frame_ms(path, False):8.0f} ms")
+            print(f"primeiro quadro, só a aba visível: {first_frame_ms(path, True):8.0f} ms")
+    finally:
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Committed sales per second with several threads selling at once: one
+transaction (and commit) per sale versus DbManager's group-committing
+write queue.
+\nRun from `src`: python -m benchmarks.bench_write_queue [-t 8] [-n 500]
+[--profile safe]
+"""
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+from benchmarks.synthetic import populate
+from data.database import MassesDatabase, PERFORMANCE_PROFILES
+from data.db_manager import DbManager
+
+
+def sales_per_sec(dbm: DbManager, threads: int, sales: int, seed: int) -> float:
+    """`threads` threads registering `sales` sales each"""
+    products = len(dbm.get_by_table("produtos"))
+    clients = len(dbm.get_by_table("clientes"))
+
+    def sell(worker: int):
+        rng = random.Random(seed + worker)
+        for _ in range(sales):
+            dbm.register_transaction(
+                rng.randint(1, clients),
+                "V",
+                [{"item_id": rng.randint(1, products), "item_amount": 1, "unit_value": 10}],
+                payment=10,
+            )
+
+    workers = [threading.Thread(target=sell, args=(i,)) for i in range(threads)]
+    start = time.perf_counter()
+    for worker in workers: worker.start()
+    for worker in workers: worker.join()
+    return threads * sales / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("-t", "--threads", type=int, default=8)
+    parser.add_argument("-n", type=int, default=500, help="sales per thread")
+    parser.add_argument("--profile", default="balanced", choices=list(PERFORMANCE_PROFILES))
+    parser.add_argument("--window", type=float, default=0.0, help="seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    try:
+        db = MassesDatabase(path, pool_size=args.threads + 1, profile=args.profile)
+        dbm = DbManager(db)
+        populate(dbm, 1000, seed=args.seed)
+
+        direct = sales_per_sec(dbm, args.threads, args.n, args.seed)
+        write_queue = dbm.enable_write_queue(args.window)
+        queued = sales_per_sec(dbm, args.threads, args.n, args.seed)
+        stats = write_queue.stats()
+        dbm.disable_write_queue()
+        db.close()
+    finally:
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+    print(f"perfil {args.profile}, {args.threads} threads x {args.n} vendas")
+    print(f"um commit por venda: {direct:10,.0f} vendas/s")
+    print(f"fila de escrita:     {queued:10,.0f} vendas/s"
+          f"  ({stats['per_batch']:.1f} vendas por commit)")
+    print(f"ganho:               {queued / direct:10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""
+Load test of the HTTP API (api.server): `-c` terminals, each on its own
+keep-alive connection, send a POS-like mix of searches, sales, payments and
+productions for `-d` seconds. Prints latency percentiles and requests/s per
+route.
+\nRun from `src`: python -m benchmarks.load_api [--url http://127.0.0.1:8765]
+[-c 20] [-d 10] [--token SECRET]
+Without --url a server is started on a temporary synthetic database
+(add --write-queue to group-commit its writes).
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from urllib.parse import urlsplit
+from benchmarks.synthetic import populate
+from data.database import MassesDatabase
+from data.db_manager import DbManager
+
+SRC = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (weight, route name) of what a terminal does
+MIX = [(40, "GET /produtos"), (25, "GET /clientes"), (10, "GET /transacoes"),
+       (15, "POST /transacoes"), (5, "POST /pagamentos"), (5, "POST /producoes")]
+
+
+class Terminal:
+    """One keep-alive HTTP connection"""
+
+    def __init__(self, host: str, port: int, token: str = None):
+        self.host, self.port, self.token = host, port, token
+        self.reader: asyncio.StreamReader = None
+        self.writer: asyncio.StreamWriter = None
+
+    async def request(self, method: str, path: str, data: dict = None) -> tuple[int, object]:
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+        body = json.dumps(data).encode() if data is not None else b""
+        head = f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\nContent-Length: {len(body)}\r\n"
+        if self.token:
+            head += f"Authorization: Bearer {self.token}\r\n"
+        self.writer.write(head.encode() + b"\r\n" + body)
+        await self.writer.drain()
+
+        status = int((await self.reader.readline()).split()[1])
+        length = 0
+        while (line := await self.reader.readline()) not in (b"\r\n", b""):
+            name, _, value = line.decode().partition(":")
+            if name.lower() == "content-length":
+                length = int(value)
+        return status, json.loads(await self.reader.readexactly(length))
+
+    def close(self):
+        if self.writer:
+            self.writer.close()
+
+
+async def run_terminal(
+    terminal: Terminal,
+    ids: dict[str, int],
+    deadline: float,
+    seed: int,
+    latencies: dict[str, list[float]],
+    statuses: dict[str, dict[int, int]],
+):
+    rng = random.Random(seed)
+    weights, routes = zip(*MIX)
+    transaction_ids = []
+
+    while time.perf_counter() < deadline:
+        route = rng.choices(routes, weights)[0]
+        product = rng.randint(1, ids["produtos"])
+        if route == "GET /produtos":
+            request = ("GET", f"/produtos?term=massa&limit=20", None)
+        elif route == "GET /clientes":
+            request = ("GET", f"/clientes?after_id={rng.randint(0, ids['clientes'])}&limit=20", None)
+        elif route == "GET /transacoes":
+            request = ("GET", f"/transacoes?limit=20&after_id={rng.randint(1, ids['transacoes'])}", None)
+        elif route == "POST /transacoes":
+            request = ("POST", "/transacoes", {
+                "client_id": rng.randint(1, ids["clientes"]), "t_type": "V", "payment": 5,
+                "items": [{"item_id": product, "item_amount": rng.randint(1, 3), "unit_value": 10}],
+            })
+        elif route == "POST /pagamentos":
+            t_id = rng.choice(transaction_ids) if transaction_ids else rng.randint(1, ids["transacoes"])
+            request = ("POST", f"/transacoes/{t_id}/pagamentos", {"value": 1})
+        else:
+            request = ("POST", "/producoes", {"product_id": product, "amount": rng.randint(1, 20)})
+
+        start = time.perf_counter()
+        status, payload = await terminal.request(*request)
+        latencies[route].append((time.perf_counter() - start) * 1000)
+        statuses[route][status] += 1
+        if route == "POST /transacoes" and status == 201:
+            transaction_ids.append(payload["id_transacao"])
+    terminal.close()
+
+
+async def load(host: str, port: int, ids: dict, clients: int, duration: float, token: str, seed: int):
+    latencies: dict[str, list[float]] = defaultdict(list)
+    statuses: dict[str, dict[int, int]] = defaultdict(lambda: defaultdict(int))
+    deadline = time.perf_counter() + duration
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        run_terminal(Terminal(host, port, token), ids, deadline, seed + i, latencies, statuses)
+        for i in range(clients)
+    ))
+    elapsed = time.perf_counter() - start
+
+    total = sum(len(values) for values in latencies.values())
+    print(f"{clients} terminais, {elapsed:.1f}s: {total:,} requisições, {total / elapsed:,.0f} req/s\n")
+    print(f"{'rota':20} {'n':>7} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}  status")
+    for _, route in MIX:
+        values = latencies.get(route)
+        if not values:
+            continue
+        cuts = statistics.quantiles(values, n=100, method="inclusive") if len(values) > 1 else values * 99
+        codes = " ".join(f"{code}:{n}" for code, n in sorted(statuses[route].items()))
+        print(
+            f"{route:20} {len(values):7,} {len(values) / elapsed:8,.0f} {cuts[49]:8.2f}"
+            f" {cuts[94]:8.2f} {cuts[98]:8.2f} {max(values):8.2f}  {codes}"
+        )
+
+
+async def fetch_ids(host: str, port: int, token: str) -> dict[str, int]:
+    """Highest product/client/transaction id, read through the API itself"""
+    terminal = Terminal(host, port, token)
+    ids = {}
+    for table, id_column in (("produtos", "id_produto"), ("clientes", "id_cliente")):
+        _, rows = await terminal.request("GET", f"/{table}?limit=100000")
+        ids[table] = max(row[id_column] for row in rows)
+    _, rows = await terminal.request("GET", "/transacoes?limit=1")
+    ids["transacoes"] = rows[0]["id_transacao"]
+    terminal.close()
+    return ids
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", help="running server; default: start one")
+    parser.add_argument("-c", "--clients", type=int, default=20)
+    parser.add_argument("-d", "--duration", type=float, default=10.0, help="seconds")
+    parser.add_argument("--token")
+    parser.add_argument("--write-queue", action="store_true")
+    parser.add_argument("--transactions", type=int, default=10_000,
+                        help="size of the temporary database")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    server, path = None, None
+    if args.url:
+        url = urlsplit(args.url)
+        host, port = url.hostname, url.port or 80
+    else:
+        fd, path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        db = MassesDatabase(path)
+        populate(DbManager(db), args.transactions, seed=args.seed)
+        db.close()
+        server = subprocess.Popen(
+            [sys.executable, "-m", "api.server", "--db", path, "--port", "0"]
+            + (["--write-queue"] if args.write_queue else []),
+            cwd=SRC, stdout=subprocess.PIPE, text=True,
+        )
+        # "Servindo em http://host:port"
+        url = urlsplit(server.stdout.readline().split()[-1])
+        host, port = url.hostname, url.port
+
+    try:
+        async def run():
+            ids = await fetch_ids(host, port, args.token)
+            await load(host, port, ids, args.clients, args.duration, args.token, args.seed)
+        asyncio.run(run())
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Reproducible synthetic data for benchmarks: products, clients, transactions
+(with items and payments) and productions, spread over the last `days` days.
+\nThe same arguments and seed always generate the same rows.
+"""
+import datetime
+import random
+import time
+from data.db_manager import DbManager
+from data.table_classes import TransactionData
+
+PRODUCT_TYPES = ["massa", "molho", "recheio", "congelado", "doce"]
+PRODUCT_NAMES = [
+    "Lasanha", "Nhoque", "Ravióli", "Capeletti", "Talharim", "Canelone",
+    "Fettuccine", "Pão de queijo", "Pastel", "Coxinha", "Torta", "Sonho",
+]
+FIRST_NAMES = [
+    "Ana", "João", "Maria", "José", "Antônio", "Francisca", "Carlos", "Paulo",
+    "Lúcia", "Pedro", "Luiz", "Márcia", "Fernanda", "Rafael", "Conceição",
+]
+LAST_NAMES = [
+    "Silva", "Santos", "Oliveira", "Souza", "Lima", "Pereira", "Ferreira",
+    "Costa", "Rodrigues", "Almeida", "Nascimento", "Gonçalves", "Araújo",
+]
+
+# share of sales paid in full / partially / left open (the rest)
+PAYMENT_SPLIT = (0.6, 0.25)
+SALE_RATIO = 0.85
+# weights of 1, 2, 3... items per transaction
+ITEMS_WEIGHTS = (40, 25, 15, 10, 6, 4)
+
+
+def populate(
+    dbm: DbManager,
+    transactions: int = 1000,
+    products: int = None,
+    clients: int = None,
+    productions_per_day: int = None,
+    days: int = 730,
+    seed: int = 0,
+    chunk_size: int = 5000,
+    verbose: bool = False,
+) -> dict[str, int | float]:
+    """
+    Fill the database behind `dbm` and return the generated volumes.
+    \nProducts, clients and daily productions default to sizes that grow
+    with `transactions`; the database is expected to start empty.
+    """
+    rng = random.Random(seed)
+    products = products or max(20, min(2000, transactions // 500))
+    clients = clients or max(50, transactions // 50)
+    productions_per_day = productions_per_day or max(1, min(products, transactions // days))
+    start = time.perf_counter()
+
+    product_ids = _add_products(dbm, rng, products)
+    client_ids = _add_clients(dbm, rng, clients)
+    prices = {
+        row["id_produto"]: row["preco_venda"] for row in dbm.get_by_table("produtos")
+    }
+    _log(verbose, f"{products} produtos e {clients} clientes", start)
+
+    today = datetime.date.today()
+    dates = [today - datetime.timedelta(days=d) for d in range(days - 1, -1, -1)]
+
+    for day in dates:
+        dbm.register_productions_bulk(
+            [
+                (rng.choice(product_ids), rng.randint(10, 200))
+                for _ in range(productions_per_day)
+            ],
+            day,
+        )
+    _log(verbose, f"{productions_per_day * days} produções", start)
+
+    done = 0
+    while done < transactions:
+        size = min(chunk_size, transactions - done)
+        # transactions are generated in date order, like real usage
+        chunk = [
+            _transaction(rng, dates[(done + i) * days // transactions],
+                         product_ids, client_ids, prices)
+            for i in range(size)
+        ]
+        dbm.register_transactions_bulk(chunk)
+        done += size
+        _log(verbose, f"{done} transações", start)
+
+    for cache in dbm.cache.values():
+        cache.clear()
+
+    return {
+        "produtos": products,
+        "clientes": clients,
+        "transacoes": transactions,
+        "producoes": productions_per_day * days,
+        "segundos": time.perf_counter() - start,
+    }
+
+
+# ↓ HELPERS ↓
+
+def _add_products(dbm: DbManager, rng: random.Random, count: int) -> list[int]:
+    with dbm.db.get_connection() as conn:
+        cursor = conn.cursor()
+        return [
+            dbm.db.add_product(
+                cursor,
+                f"{rng.choice(PRODUCT_NAMES)} {rng.choice(LAST_NAMES)} {n}",
+                rng.choice(PRODUCT_TYPES),
+                round(rng.uniform(2, 30), 2),
+                round(rng.uniform(5, 60), 2),
+                rng.randint(0, 50),
+                rng.randint(0, 500),
+            )
+            for n in range(1, count + 1)
+        ]
+
+
+def _add_clients(dbm: DbManager, rng: random.Random, count: int) -> list[int]:
+    with dbm.db.get_connection() as conn:
+        cursor = conn.cursor()
+        for n in range(1, count + 1):
+            dbm.db.add_client(
+                cursor,
+                f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {n}",
+                f"(11) 9{rng.randint(1000, 9999)}-{rng.randint(1000, 9999)}",
+            )
+        cursor.execute("SELECT id_cliente FROM clientes ORDER BY id_cliente")
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _transaction(
+    rng: random.Random,
+    date: datetime.date,
+    product_ids: list[int],
+    client_ids: list[int],
+    prices: dict[int, float],
+) -> TransactionData:
+    amount_of_items = rng.choices(range(1, len(ITEMS_WEIGHTS) + 1), ITEMS_WEIGHTS)[0]
+    items = [
+        {"item_id": p_id, "item_amount": rng.randint(1, 20), "unit_value": prices[p_id]}
+        for p_id in rng.sample(product_ids, min(amount_of_items, len(product_ids)))
+    ]
+    t_type = "V" if rng.random() < SALE_RATIO else "P"
+
+    payment = 0
+    if t_type == "V":
+        total = sum(item["item_amount"] * item["unit_value"] for item in items)
+        draw = rng.random()
+        if draw < PAYMENT_SPLIT[0]:
+            payment = total
+        elif draw < sum(PAYMENT_SPLIT):
+            payment = round(total * rng.uniform(0.1, 0.9), 2)
+
+    return {
+        "client_id": rng.choice(client_ids),
+        "t_type": t_type,
+        "items": items,
+        "date": date,
+        "payment": payment,
+    }
+
+
+def _log(verbose: bool, message: str, start: float):
+    if verbose:
+        print(f"  [{time.perf_counter() - start:7.1f}s] {message}")
@@ -0,0 +1,121 @@
+import os
+import sqlite3
+
+ARCHIVE_SCHEMA = "arquivo"  # name the archive file is attached as
+ARCHIVED_TABLES = ("transacoes", "itens_transacao", "pagamentos")
+
+# only finished transactions are archived, open ones may still get payments
+ARCHIVABLE = "estado IN ('fechado', 'cancelado')"
+
+_ARCHIVE_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS arquivo.idx_transacoes_data ON transacoes(data)",
+    "CREATE INDEX IF NOT EXISTS arquivo.idx_transacoes_cliente_data "
+    "ON transacoes(id_cliente, data)",
+    "CREATE INDEX IF NOT EXISTS arquivo.idx_itens_transacao_transacao "
+    "ON itens_transacao(id_transacao)",
+    "CREATE INDEX IF NOT EXISTS arquivo.idx_pagamentos_transacao "
+    "ON pagamentos(id_transacao)",
+)
+
+
+def attach_archive(
+    conn: sqlite3.Connection, path: str, schema: dict[str, list[str]]
+) -> None:
+    """
+    ATTACH the archive file to `conn` (once per connection), creating its
+    tables on first use.
+    \nSQLite can't ATTACH inside a transaction and this commits, so a
+    connection with pending writes is refused instead of having them
+    committed behind the caller's back. Foreign keys are dropped: they can't
+    point across database files.
+    """
+    attached = getattr(conn, "archive_attached", None)
+    if attached and (
+        attached == path or os.path.realpath(attached) == os.path.realpath(path)
+    ):
+        return
+    if conn.in_transaction:
+        raise sqlite3.OperationalError(
+            "O arquivo de transações só pode ser anexado fora de uma transação"
+        )
+
+    if attached:  # another file: never copy into or read from the wrong one
+        conn.execute(f"DETACH DATABASE {ARCHIVE_SCHEMA}")
+        conn.archive_attached = None
+    conn.execute(f"ATTACH DATABASE ? AS {ARCHIVE_SCHEMA}", (path,))
+    for table in ARCHIVED_TABLES:
+        columns = [c for c in schema[table] if not c.startswith("FOREIGN KEY")]
+        conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {ARCHIVE_SCHEMA}.{table} ({','.join(columns)})"
+        )
+    for statement in _ARCHIVE_INDEXES:
+        conn.execute(statement)
+    conn.commit()
+    conn.archive_attached = path
+
+
+def union_source(table: str) -> str:
+    """Subquery reading `table` from both files (ids never overlap)"""
+    return (
+        f"(SELECT * FROM main.{table} "
+        f"UNION ALL SELECT * FROM {ARCHIVE_SCHEMA}.{table})"
+    )
+
+
+def copy_batch(cursor: sqlite3.Cursor, before: str, after_id: int, limit: int) -> int:
+    """
+    Copy up to `limit` archivable transactions dated before `before` (and
+    with id > `after_id`), their items and payments into the archive.
+    \nOnly writes to the archive file, so it commits atomically on its own;
+    INSERT OR IGNORE makes a retry after a crash harmless. Returns the last
+    copied id, 0 when there was nothing left.
+    """
+    cursor.execute("CREATE TEMP TABLE IF NOT EXISTS a_arquivar (id INTEGER PRIMARY KEY)")
+    cursor.execute("DELETE FROM temp.a_arquivar")
+    cursor.execute(
+        f"""
+        INSERT INTO temp.a_arquivar
+        SELECT id_transacao FROM main.transacoes
+        WHERE data < :before AND {ARCHIVABLE} AND id_transacao > :after_id
+        ORDER BY id_transacao
+        LIMIT :limit
+        """,
+        {"before": before, "after_id": after_id, "limit": limit}
+    )
+    for table in ARCHIVED_TABLES:
+        cursor.execute(
+            f"""
+            INSERT OR IGNORE INTO {ARCHIVE_SCHEMA}.{table}
+            SELECT * FROM main.{table}
+            WHERE id_transacao IN (SELECT id FROM temp.a_arquivar)
+            """
+        )
+    cursor.execute("SELECT coalesce(max(id), 0) FROM temp.a_arquivar")
+    return cursor.fetchone()[0]
+
+
+def delete_copied(cursor: sqlite3.Cursor) -> int:
+    """
+    Delete from the main file the batch `copy_batch` just copied, children
+    first. Only rows really present in the archive are removed.
+    \nThe last purchase date of the deleted rows is kept in
+    compras_arquivadas: the balance triggers can't read the archive file.
+    """
+    archived = f"""
+        SELECT id FROM temp.a_arquivar
+        WHERE id IN (SELECT id_transacao FROM {ARCHIVE_SCHEMA}.transacoes)
+    """
+    cursor.execute(
+        f"""
+        INSERT INTO main.compras_arquivadas (id_cliente, ultima_compra)
+        SELECT id_cliente, max(data) FROM main.transacoes
+        WHERE id_transacao IN ({archived})
+          AND id_cliente IS NOT NULL AND estado != 'cancelado'
+        GROUP BY id_cliente
+        ON CONFLICT(id_cliente) DO UPDATE SET
+            ultima_compra = max(ultima_compra, excluded.ultima_compra)
+        """
+    )
+    for table in ("pagamentos", "itens_transacao", "transacoes"):
+        cursor.execute(f"DELETE FROM main.{table} WHERE id_transacao IN ({archived})")
+    return cursor.rowcount
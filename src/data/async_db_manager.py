@@ -0,0 +1,46 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial, wraps
+from typing import Callable
+from data.db_manager import DbManager
+
+
+class AsyncDbManager:
+    """
+    Awaitable version of every public DbManager method:
+    `rows = await adbm.get_by_text("produtos", "pizza")`.
+    \nThe work runs on a dedicated thread pool, so the caller's event loop
+    (the Flet UI) never waits on SQLite. Streaming methods (iter_*) still
+    return plain generators, prefer get_page from async code.
+    """
+
+    def __init__(self, dbm: DbManager, max_workers: int = None):
+        self.dbm = dbm
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers or dbm.db.pool.size,
+            thread_name_prefix="db",
+        )
+
+    def __getattr__(self, name: str):
+        return self.wrap(getattr(self.dbm, name))
+
+    async def run(self, func: Callable, *args, **kwargs):
+        """Run any blocking callable on the db executor and await its result"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor, partial(func, *args, **kwargs)
+        )
+
+    def wrap(self, attr):
+        """Awaitable wrapper for public methods, anything else as is"""
+        if not callable(attr) or attr.__name__.startswith("_"):
+            return attr
+
+        @wraps(attr)
+        async def method(*args, **kwargs):
+            return await self.run(attr, *args, **kwargs)
+
+        return method
+
+    def close(self, wait: bool = True):
+        self.executor.shutdown(wait=wait)
@@ -0,0 +1,192 @@
+import datetime
+import os
+import sqlite3
+import threading
+from typing import Callable, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from data.database import MassesDatabase
+
+# (pages copied, total pages) after every step
+ProgressCallback = Callable[[int, int], None]
+
+# sorts chronologically; microseconds keep copies made in the same second apart
+BACKUP_NAME_FORMAT = "%Y%m%d-%H%M%S-%f"
+
+
+class BackupError(RuntimeError):
+    pass
+
+
+class DatabaseBackup:
+    """
+    Online copies of a MassesDatabase through sqlite3's backup API.
+    \nThe live db is copied `pages` pages at a time with a `sleep` between
+    steps. In WAL mode the copy reads one snapshot held open for the whole
+    run, so concurrent writers never wait for it and never force it to
+    restart; with a rollback journal writers only wait for one step. Copies
+    are named `<name>-YYYYmmdd-HHMMSS-ffffff.db` inside `directory` and only
+    the newest `keep` are kept.
+    """
+
+    def __init__(
+        self,
+        db: "MassesDatabase",
+        directory: str,
+        keep: int = 7,
+        pages: int = 256,
+        sleep: float = 0.05,
+    ):
+        if db.path == ":memory:":
+            raise BackupError("Banco em memória não tem arquivo para copiar")
+        if keep < 1:
+            raise ValueError("A retenção deve manter ao menos uma cópia")
+
+        self.db = db
+        self.directory = directory
+        self.keep = keep
+        self.pages = pages
+        self.sleep = sleep
+        self.name = os.path.splitext(os.path.basename(db.path))[0]
+
+        self._lock = threading.Lock()  # one backup at a time
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def run(
+        self,
+        check_integrity: bool = True,
+        on_progress: ProgressCallback = None,
+    ) -> str:
+        """
+        Copy the db now and return the new file's path.
+        \nThe copy is written to a temporary name and only renamed (then the
+        old copies rotated) once it is complete and, if asked, passed
+        PRAGMA integrity_check.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+
+        with self._lock:
+            # named inside the lock, so concurrent runs never share a name
+            stamp = datetime.datetime.now().strftime(BACKUP_NAME_FORMAT)
+            final_path = os.path.join(self.directory, f"{self.name}-{stamp}.db")
+            partial_path = final_path + ".parcial"
+
+            # a connection of its own: the copy must not hold a pooled one
+            source = sqlite3.connect(self.db.path, check_same_thread=False)
+            target = sqlite3.connect(partial_path)
+            try:
+                self._hold_snapshot(source)
+                source.backup(
+                    target,
+                    pages=self.pages,
+                    progress=self._progress(on_progress),
+                    sleep=self.sleep,
+                )
+                if check_integrity:
+                    self._check_integrity(target)
+            except BaseException:
+                target.close()
+                os.remove(partial_path)
+                raise
+            finally:
+                source.close()
+            target.close()
+
+            os.replace(partial_path, final_path)
+            self.rotate()
+        return final_path
+
+    def rotate(self) -> list[str]:
+        """Delete all but the newest `keep` copies; returns the deleted paths"""
+        removed = self.list_backups()[self.keep:]
+        for path in removed:
+            os.remove(path)
+        return removed
+
+    def list_backups(self) -> list[str]:
+        """Paths of the existing copies, newest first"""
+        if not os.path.isdir(self.directory):
+            return []
+        prefix = f"{self.name}-"
+        names = [
+            name for name in os.listdir(self.directory)
+            if name.startswith(prefix) and name.endswith(".db")
+        ]
+        # the timestamp in the name sorts chronologically
+        return [os.path.join(self.directory, name) for name in sorted(names, reverse=True)]
+
+    # ↓ SCHEDULING ↓
+
+    def start_schedule(
+        self,
+        interval: float,
+        check_integrity: bool = True,
+        on_done: Callable[[str | None, Exception | None], None] = None,
+    ):
+        """
+        Run a backup every `interval` seconds on a daemon thread until
+        `stop_schedule`. `on_done(path, error)` is called after every run;
+        a failed run doesn't stop the schedule.
+        """
+        if self._thread and self._thread.is_alive():
+            raise BackupError("Backup agendado já está em execução")
+
+        def loop():
+            while not self._stop.wait(interval):
+                try:
+                    path, error = self.run(check_integrity), None
+                except Exception as e:
+                    path, error = None, e
+                if on_done:
+                    on_done(path, error)
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=loop, name="backup", daemon=True)
+        self._thread.start()
+
+    def stop_schedule(self, wait: bool = True):
+        self._stop.set()
+        if wait and self._thread:
+            self._thread.join()
+        self._thread = None
+
+    # ↓ HELPERS ↓
+
+    @staticmethod
+    def _hold_snapshot(source: sqlite3.Connection):
+        """
+        In WAL mode open a read transaction so every backup step sees the
+        same snapshot: otherwise any write from another connection restarts
+        the backup, which may then never finish on a busy db.
+        """
+        if source.execute("PRAGMA journal_mode").fetchone()[0].lower() == "wal":
+            source.execute("BEGIN")
+            source.execute("SELECT count(*) FROM sqlite_master").fetchone()
+
+    @staticmethod
+    def _check_integrity(conn: sqlite3.Connection):
+        result = [row[0] for row in conn.execute("PRAGMA integrity_check").fetchall()]
+        if result != ["ok"]:
+            raise BackupError(f"Cópia corrompida: {'; '.join(result[:5])}")
+
+    @staticmethod
+    def _progress(on_progress: ProgressCallback | None):
+        if on_progress is None:
+            return None
+
+        def progress(status: int, remaining: int, total: int):
+            on_progress(total - remaining, total)
+        return progress
+
+
+def restore_check(path: str) -> bool:
+    """True if the copy at `path` opens and passes PRAGMA quick_check"""
+    try:
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            return conn.execute("PRAGMA quick_check").fetchone()[0] == "ok"
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return False
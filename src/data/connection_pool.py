@@ -0,0 +1,201 @@
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from queue import LifoQueue, Empty
+from typing import Callable, Iterator
+from data.instrumentation import Instrumentation, InstrumentedCursor
+
+
+class PooledConnection(sqlite3.Connection):
+    """
+    sqlite3 connection that remembers which SQL texts it already prepared.
+    \nWhile `instrumentation` is set its cursors time every statement.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared_statements: set[str] = set()
+        self.instrumentation: Instrumentation | None = None
+
+    def cursor(self, factory=None):
+        if factory is None:
+            if self.instrumentation is None:
+                return super().cursor()
+            factory = InstrumentedCursor
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        if self.instrumentation is None:
+            return super().execute(sql, parameters)
+        return self.cursor().execute(sql, parameters)
+
+
+class ConnectionPool:
+    """
+    Keeps up to `size` open connections and lends them to threads.
+    \nA thread that already holds a connection gets the same one back, so
+    nested calls share one transaction and only the outermost block commits.
+    \nA connection is only pinged before reuse when its last checkout raised
+    a sqlite3.Error or it sat idle for over `idle_check` seconds; a broken one
+    is replaced, unless `replaceable` is False (the data of a ":memory:" db
+    lives in its only connection, a new one would be empty).
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], sqlite3.Connection],
+        size: int = 5,
+        timeout: float = 5.0,
+        idle_check: float = 60.0,
+        replaceable: bool = True,
+    ):
+        if size < 1:
+            raise ValueError("O tamanho do pool deve ser maior que zero")
+
+        self.size = size
+        self.timeout = timeout
+        self.idle_check = idle_check
+        self.replaceable = replaceable
+
+        self._connect = connect
+        # (connection, monotonic time it was given back, its checkout failed)
+        self._idle: LifoQueue[tuple[sqlite3.Connection, float, bool]] = LifoQueue(
+            maxsize=size
+        )
+        self._created = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._closed = False
+
+        # optional Instrumentation handed to every checked out connection
+        self.instrumentation: Instrumentation | None = None
+        # optional setup run on every outermost checkout, before the transaction
+        self.on_checkout: Callable[[sqlite3.Connection], None] | None = None
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Checkout a connection: commit on success, rollback on error, give it back."""
+        local = self._local
+        if getattr(local, "conn", None) is not None:
+            local.depth += 1
+            try:
+                yield local.conn
+            finally:
+                local.depth -= 1
+            return
+
+        instrumentation = self.instrumentation
+        if instrumentation is None:
+            conn = self._acquire()
+        else:
+            start = time.perf_counter()
+            conn = self._acquire()
+            instrumentation.record_checkout((time.perf_counter() - start) * 1000)
+        if isinstance(conn, PooledConnection):
+            conn.instrumentation = instrumentation
+        if self.on_checkout is not None:
+            try:
+                self.on_checkout(conn)
+            except BaseException:
+                self._release(conn, failed=True)
+                raise
+        local.conn, local.depth = conn, 1
+        failed = False
+        try:
+            with conn:
+                yield conn
+        except sqlite3.Error:
+            failed = True
+            raise
+        finally:
+            local.conn = None
+            if isinstance(conn, PooledConnection):
+                conn.instrumentation = None
+            self._release(conn, failed)
+
+    def held_connection(self) -> sqlite3.Connection | None:
+        """The connection the calling thread has checked out, if any"""
+        return getattr(self._local, "conn", None)
+
+    def close(self):
+        """Close idle connections now and the borrowed ones when they come back."""
+        self._closed = True
+        while True:
+            try:
+                conn, _, _ = self._idle.get_nowait()
+            except Empty:
+                break
+            self._discard(conn)
+
+    def stats(self) -> dict[str, int]:
+        idle = self._idle.qsize()
+        return {"size": self.size, "created": self._created,
+                "idle": idle, "in_use": self._created - idle}
+
+    # ↓ HELPERS ↓
+
+    def _acquire(self) -> sqlite3.Connection:
+        while True:
+            if self._closed:
+                raise sqlite3.ProgrammingError("Pool de conexões fechado")
+
+            try:
+                conn, idle_since, failed = self._idle.get_nowait()
+            except Empty:
+                if (conn := self._create()) is not None:
+                    return conn
+                conn, idle_since, failed = self._wait()
+
+            if not (failed or time.monotonic() - idle_since > self.idle_check):
+                return conn
+            if self._is_healthy(conn) or not self.replaceable:
+                return conn
+            self._discard(conn)
+
+    def _release(self, conn: sqlite3.Connection, failed: bool = False):
+        if self._closed:
+            self._discard(conn)
+            return
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:  # e.g. closed: pinged (and replaced) on checkout
+            failed = True
+        self._idle.put_nowait((conn, time.monotonic(), failed))
+
+    def _create(self) -> sqlite3.Connection | None:
+        with self._lock:
+            if self._created >= self.size:
+                return None
+            self._created += 1
+        try:
+            return self._connect()
+        except Exception:
+            with self._lock:
+                self._created -= 1
+            raise
+
+    def _wait(self) -> tuple[sqlite3.Connection, float, bool]:
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except Empty:
+            raise TimeoutError(
+                f"Nenhuma conexão livre após {self.timeout}s (pool de {self.size})"
+            ) from None
+
+    def _discard(self, conn: sqlite3.Connection):
+        with self._lock:
+            self._created -= 1
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+    @staticmethod
+    def _is_healthy(conn: sqlite3.Connection) -> bool:
+        try:
+            conn.execute("SELECT 1").fetchone()
+        except sqlite3.Error:
+            return False
+        return True
@@ -1,12 +1,109 @@
 import sqlite3
-from data.table_classes import DataBaseTables, ProductColumns, ClientColumns
-from typing import Literal, get_args
+import json
+import re
+from data import archive
+from data.backup import DatabaseBackup
+from data.connection_pool import ConnectionPool, PooledConnection
+from data.instrumentation import Instrumentation
+from data.records import Record, make_record_class
+from data.migrations import migrate, ensure_search_index
+from data.statements import StatementRegistry
+from data.table_classes import DataBaseTables, ProductColumns, ClientColumns, TableColumn
+from typing import Iterator, Literal
 from os import path as Path
 
 
+# PRAGMAs applied once to every new connection, see MassesDatabase(profile=...)
+PERFORMANCE_PROFILES = {
+    # SQLite defaults: rollback journal and a fsync on every commit
+    "safe": {
+        "journal_mode": "DELETE",
+        "synchronous": "FULL",
+        "cache_size": -2000,  # negative = KiB
+        "mmap_size": 0,
+        "temp_store": "DEFAULT",
+        "busy_timeout": 5000,  # ms
+    },
+    # readers don't block the writer, fsync only at checkpoints
+    "balanced": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -16000,
+        "mmap_size": 64 * 1024 * 1024,
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,
+    },
+    # no fsync at all: an OS crash or power loss may lose recent commits AND
+    # corrupt the file. Only for bulk loads into a copy that can be rebuilt
+    "throughput": {
+        "journal_mode": "WAL",
+        "synchronous": "OFF",
+        "cache_size": -64000,
+        "mmap_size": 256 * 1024 * 1024,
+        "temp_store": "MEMORY",
+        "busy_timeout": 10000,
+    },
+}
+
+# per-connection prepared statement cache, must fit every registered statement
+STATEMENT_CACHE_SIZE = 256
+
+# Stock of each product (or only :product_id) at the end of :date. Movements
+# count when they are newer than the snapshot's day or were registered after it
+# (backdated ones), so a snapshot never has to be rebuilt.
+_STOCK_ON_DATE = """
+    SELECT
+        produtos.id_produto,
+        coalesce(snapshot.estoque, 0) + coalesce((
+            SELECT SUM(mov.quantidade)
+            FROM movimentos_estoque AS mov
+            WHERE mov.id_produto = produtos.id_produto
+              AND mov.data <= :date
+              AND (
+                  snapshot.id_snapshot IS NULL
+                  OR mov.data > snapshot.data
+                  OR mov.id_movimento > snapshot.id_ultimo_movimento
+              )
+        ), 0) AS estoque
+    FROM produtos
+    LEFT JOIN snapshots_estoque AS snapshot ON snapshot.id_snapshot = (
+        SELECT id_snapshot FROM snapshots_estoque
+        WHERE id_produto = produtos.id_produto AND data <= :date
+        ORDER BY data DESC, id_snapshot DESC
+        LIMIT 1
+    )
+    WHERE :product_id IS NULL OR produtos.id_produto = :product_id
+"""
+
+
+class InsufficientStockError(ValueError):
+    """A sale would leave the listed products with negative stock."""
+
+    def __init__(self, product_ids: list[int]):
+        self.product_ids = product_ids
+        super().__init__(f"Estoque insuficiente para os produtos: {product_ids}")
+
+
 class MassesDatabase:
-    def __init__(self, path: str = None):
+    def __init__(
+        self,
+        path: str = None,
+        pool_size: int = 5,
+        profile: Literal["safe", "balanced", "throughput"] = "balanced",
+        search_mode: Literal["fts", "like"] = "fts",
+    ):
+        if profile not in PERFORMANCE_PROFILES:
+            raise ValueError(
+                f"Perfil inválido: {profile}. Use um de {list(PERFORMANCE_PROFILES)}"
+            )
+
         self.path = self._get_path(path)
+        self.profile = profile
+        self.search_mode = search_mode
+        self.fts_enabled = False
+        # set once transactions are archived (read back from arquivo_transacoes)
+        self.archive_path: str | None = None
+        self.archive_cutoff: str | None = None
 
         self.schema = {
             # products and clients
@@ -73,28 +170,153 @@ class MassesDatabase:
             ],
         }
         
-        self.memory_conn = None
+        self.statements = StatementRegistry(self.schema)
+        # rows of `SELECT * FROM table` reads, see data.records
+        self.records: dict[DataBaseTables, type[Record]] = {
+            table: make_record_class(table, columns)
+            for table, columns in self.statements.columns.items()
+        }
+
+        # a ":memory:" db only lives inside its single connection
+        in_memory = self.path == ":memory:"
+        self.pool = ConnectionPool(
+            self._open_connection, 1 if in_memory else pool_size,
+            replaceable=not in_memory,
+        )
+        self.pool.on_checkout = self._attach_archive_if_set
         self._create_db_structure()
 
     # INIT ↑
 
     def get_connection(self):
-        """Return a connection to the db activating FK and Row Factory."""
-        conn = self.memory_conn if self.memory_conn else sqlite3.connect(self.path)
+        """
+        Borrow a pooled connection (FK and Row Factory already active).
+        \nUse it in a `with` block: commits on success, rolls back on error
+        and goes back to the pool.
+        """
+        return self.pool.connection()
+
+    def close(self):
+        """Close every pooled connection."""
+        self.pool.close()
+
+    def get_pragma_settings(self) -> dict[str, int | str]:
+        """Read back the PRAGMAs of the active profile (for diagnostics)."""
+        settings = {}
+        with self.get_connection() as conn:
+            for pragma in PERFORMANCE_PROFILES[self.profile]:
+                # some PRAGMAs return nothing for ":memory:" (e.g. mmap_size)
+                row = conn.execute(f"PRAGMA {pragma}").fetchone()
+                settings[pragma] = row[0] if row else None
+        return settings
+
+    def statement_cache_stats(self) -> dict[str, int | float]:
+        """
+        First uses vs reuses of the registered statements per connection
+        (see StatementRegistry), not measured statement cache hits.
+        """
+        return self.statements.stats()
+
+    @property
+    def instrumentation(self) -> Instrumentation | None:
+        return self.pool.instrumentation
+
+    def enable_instrumentation(self, slow_ms: float = 100.0) -> Instrumentation:
+        """
+        Start timing statements and checkouts (see Instrumentation).
+        \nConnections pick it up on their next checkout.
+        """
+        if self.pool.instrumentation is None:
+            self.pool.instrumentation = Instrumentation(slow_ms)
+        return self.pool.instrumentation
+
+    def disable_instrumentation(self):
+        self.pool.instrumentation = None
+
+    # ↓ BACKUP ↓
+
+    def backups(
+        self, directory: str, keep: int = 7, pages: int = 256, sleep: float = 0.05
+    ) -> DatabaseBackup:
+        """
+        Online backups of this db into `directory` (see DatabaseBackup):
+        `.run()` now, `.start_schedule(seconds)` periodically.
+        """
+        return DatabaseBackup(self, directory, keep, pages, sleep)
+
+    # ↓ ARCHIVE ↓
+
+    def default_archive_path(self) -> str:
+        """masses.db -> masses_arquivo.db, next to the main file"""
+        if self.path == ":memory:":
+            raise ValueError("Informe o caminho do arquivo morto para um banco em memória")
+        root, ext = Path.splitext(self.path)
+        return f"{root}_arquivo{ext}"
+
+    def attach_archive(self, conn: sqlite3.Connection, path: str = None):
+        archive.attach_archive(conn, path or self.archive_path, self.schema)
+
+    def _attach_archive_if_set(self, conn: sqlite3.Connection):
+        """Pool checkout hook: attach while the connection is still idle"""
+        if self.archive_path and getattr(conn, "archive_attached", None) != self.archive_path:
+            self.attach_archive(conn)
+
+    def set_archive_state(self, cursor: sqlite3.Cursor, path: str, cutoff: str):
+        """Record the archive file and cutoff, keeping the latest cutoff"""
+        cursor.execute(
+            """
+            INSERT INTO arquivo_transacoes (id, caminho, data_corte) VALUES (1, :path, :cutoff)
+            ON CONFLICT(id) DO UPDATE SET
+                caminho = excluded.caminho,
+                data_corte = max(data_corte, excluded.data_corte),
+                atualizado_em = datetime('now')
+            """,
+            {"path": path, "cutoff": cutoff}
+        )
+        cursor.execute("SELECT caminho, data_corte FROM arquivo_transacoes")
+        self.archive_path, self.archive_cutoff = cursor.fetchone()
+
+    def transaction_sources(
+        self, cursor: sqlite3.Cursor, start_date: str = None
+    ) -> dict[str, str]:
+        """
+        FROM-clause source of transacoes, itens_transacao and pagamentos for
+        a query starting at `start_date` (None: from the beginning).
+        \nThe plain tables while the range is after the archive cutoff;
+        otherwise main + archive. Checkouts attach the archive; the call here
+        only covers a connection checked out before the archive existed.
+        """
+        if self.archive_cutoff is None or (
+            start_date and str(start_date) >= self.archive_cutoff
+        ):
+            return {table: table for table in archive.ARCHIVED_TABLES}
+
+        self.attach_archive(cursor.connection)
+        return {table: archive.union_source(table) for table in archive.ARCHIVED_TABLES}
+
+    def _open_connection(self):
+        conn = sqlite3.connect(
+            self.path,
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE,
+            factory=PooledConnection,
+        )
+        for pragma, value in PERFORMANCE_PROFILES[self.profile].items():
+            conn.execute(f"PRAGMA {pragma} = {value}")
         conn.execute("PRAGMA foreign_keys = ON")
         conn.row_factory = sqlite3.Row
         return conn
     
     def _create_db_structure(self): 
-        conn = self.get_connection()
-        for table, columns in self.schema.items():
-                conn.execute(
-                    f"CREATE TABLE IF NOT EXISTS {table} ({','.join(columns)})"
-                )
-        conn.commit()
+        """Create the tables and apply pending migrations (no-op when current)."""
+        with self.get_connection() as conn:
+            migrate(conn, self.schema)
 
-        if self.path == ':memory:': self.memory_conn = conn
-        else: conn.close()
+            self.fts_enabled = self.search_mode == "fts" and ensure_search_index(conn)
+
+            row = conn.execute("SELECT caminho, data_corte FROM arquivo_transacoes").fetchone()
+            if row:
+                self.archive_path, self.archive_cutoff = row
 
     # --- ↑ CREATE ↑ ---
     # --- ↓ DB MANIPULATION METHODS ↓ ---
@@ -110,7 +332,7 @@ class MassesDatabase:
         min_stock: int,
         current_stock: int = 0,
     ):
-        """Add a product and return its id"""
+        """Add a product and return its id. The initial stock is an adjustment movement"""
         db_cursor.execute(
             """
             INSERT INTO produtos (
@@ -127,7 +349,7 @@ class MassesDatabase:
                 :production_price,
                 :sell_price,
                 :min_stock,
-                :current_stock
+                0
             )
             """,
             {
@@ -136,10 +358,13 @@ class MassesDatabase:
                 "production_price": production_price,
                 "sell_price": sell_price,
                 "min_stock": min_stock,
-                "current_stock": current_stock,
             },
         )
-        return db_cursor.lastrowid
+        product_id = db_cursor.lastrowid
+
+        if current_stock:
+            self.add_stock_movement(db_cursor, product_id, "ajuste", current_stock)
+        return product_id
 
     def add_client(self, db_cursor: sqlite3.Cursor, name: str, contact: str = None):
         """Add client and return its id"""
@@ -284,9 +509,119 @@ class MassesDatabase:
         )
         return db_cursor.lastrowid
     
+    # --- ↓ BULK ADD/REGISTER ↓ ---
+
+    def add_products_many(
+        self,
+        db_cursor: sqlite3.Cursor,
+        rows: list[tuple[str, str, float, float, int, int]],
+    ) -> list[int]:
+        """
+        Add (name, p_type, production_price, sell_price, min_stock,
+        current_stock) rows with executemany and return their ids in order.
+        \nNon-zero initial stocks become adjustment movements, like add_product.
+        """
+        db_cursor.executemany(
+            """
+            INSERT INTO produtos
+            (nome, tipo, preco_producao, preco_venda, estoque_min, estoque_atual)
+            VALUES (?, ?, ?, ?, ?, 0)
+            """,
+            [row[:5] for row in rows]
+        )
+        product_ids = self._inserted_ids(db_cursor, len(rows))
+
+        db_cursor.executemany(
+            """
+            INSERT INTO movimentos_estoque (id_produto, data, tipo, quantidade)
+            VALUES (?, date('now', 'localtime'), 'ajuste', ?)
+            """,
+            [(p_id, row[5]) for p_id, row in zip(product_ids, rows) if row[5]]
+        )
+        return product_ids
+
+    def add_clients_many(
+        self,
+        db_cursor: sqlite3.Cursor,
+        rows: list[tuple[str, str | None]],
+    ) -> list[int]:
+        """Add (name, contact) rows with executemany and return their ids in order"""
+        db_cursor.executemany(
+            "INSERT INTO clientes (nome, contato) VALUES (?, ?)", rows
+        )
+        return self._inserted_ids(db_cursor, len(rows))
+
+    def register_transactions_many(
+        self,
+        db_cursor: sqlite3.Cursor,
+        rows: list[tuple[int, str, str, str, float, float]],
+    ) -> list[int]:
+        """
+        Register (client_id, date, t_type, status, total_value, open_value)
+        rows with executemany and return their ids in order
+        """
+        db_cursor.executemany(
+            """
+            INSERT INTO transacoes
+            (id_cliente, data, tipo, estado, valor_total, valor_aberto)
+            VALUES (?, ?, ?, ?, ?, ?)
+            """,
+            rows
+        )
+        return self._inserted_ids(db_cursor, len(rows))
+
+    def register_transaction_items_many(
+        self,
+        db_cursor: sqlite3.Cursor,
+        rows: list[tuple[int, int, int, float]],
+    ) -> list[int]:
+        """
+        Register (transaction_id, product_id, amount, unit_value) rows with
+        executemany and return their ids in order
+        """
+        db_cursor.executemany(
+            """
+            INSERT INTO itens_transacao
+            (id_transacao, id_produto, quantidade, valor_unitario)
+            VALUES (?, ?, ?, ?)
+            """,
+            rows
+        )
+        return self._inserted_ids(db_cursor, len(rows))
+
+    def register_payments_many(
+        self,
+        db_cursor: sqlite3.Cursor,
+        rows: list[tuple[int, str, float]],
+    ) -> list[int]:
+        """
+        Register (transaction_id, date, value) rows with executemany and
+        return their ids in order
+        """
+        db_cursor.executemany(
+            "INSERT INTO pagamentos (id_transacao, data, valor) VALUES (?, ?, ?)",
+            rows
+        )
+        return self._inserted_ids(db_cursor, len(rows))
+
+    def register_productions_many(
+        self,
+        db_cursor: sqlite3.Cursor,
+        rows: list[tuple[int, str, int]],
+    ) -> list[int]:
+        """
+        Register (product_id, date, amount) rows with executemany and
+        return their ids in order
+        """
+        db_cursor.executemany(
+            "INSERT INTO producoes (id_produto, data, quantidade) VALUES (?, ?, ?)",
+            rows
+        )
+        return self._inserted_ids(db_cursor, len(rows))
+
     # --- ↑ ADD/REGISTER ↑ ---
     # --- ↓ UPDATE ↓ ---
- 
+
     def update_product(
         self,
         db_cursor: sqlite3.Cursor,
@@ -296,9 +631,34 @@ class MassesDatabase:
         production_price: float,
         sell_price: float,
         min_stock: int,
-        current_stock: int = 0,
+        current_stock: int = None,
         is_active: int = 1,
+        loaded_stock: int = None,
     ):
+        """
+        Update a product. The stock only changes through an adjustment
+        movement, and only when `current_stock` is given:
+        \nWith `loaded_stock` (the stock the user was shown) the adjustment is
+        `current_stock - loaded_stock`, so sales and productions registered
+        since then are kept. Without it `current_stock` is the new absolute
+        stock.
+        """
+        if current_stock is None or current_stock == loaded_stock:
+            pass
+        elif loaded_stock is not None:
+            self.add_stock_movement(
+                db_cursor, product_id, "ajuste", current_stock - loaded_stock
+            )
+        else:
+            db_cursor.execute(
+                """
+                INSERT INTO movimentos_estoque (id_produto, data, tipo, quantidade)
+                SELECT id_produto, date('now', 'localtime'), 'ajuste', :current_stock - estoque_atual
+                FROM produtos
+                WHERE id_produto = :product_id AND estoque_atual != :current_stock
+                """,
+                {"product_id": product_id, "current_stock": current_stock}
+            )
         db_cursor.execute(
             """
             UPDATE produtos
@@ -308,7 +668,6 @@ class MassesDatabase:
                 preco_producao = :production_price,
                 preco_venda = :sell_price,
                 estoque_min = :min_stock,
-                estoque_atual = :current_stock,
                 ativo = :is_active
             WHERE id_produto = :product_id
             """, 
@@ -318,7 +677,6 @@ class MassesDatabase:
                 "production_price": production_price,
                 "sell_price": sell_price,
                 "min_stock": min_stock,
-                "current_stock": current_stock,
                 "product_id": product_id,
                 "is_active": is_active,
             }
@@ -342,6 +700,105 @@ class MassesDatabase:
             }
         )
 
+    def subtract_products_stock(
+        self,
+        db_cursor: sqlite3.Cursor,
+        amounts: list[tuple[int, int, str, int]],
+        allow_negative: bool = True,
+    ):
+        """
+        Register (product_id, amount, date, transaction_id) sales as stock
+        movements with one INSERT; the ledger trigger lowers estoque_atual.
+        \nRepeated lines are summed. With `allow_negative=False` raises
+        InsufficientStockError before changing anything.
+        """
+        amounts_cte = """
+            WITH lines AS (
+                SELECT
+                    json_extract(value, '$[0]') AS id,
+                    json_extract(value, '$[1]') AS amount,
+                    json_extract(value, '$[2]') AS date,
+                    json_extract(value, '$[3]') AS transaction_id
+                FROM json_each(:amounts)
+            ),
+            amounts(id, amount) AS (SELECT id, SUM(amount) FROM lines GROUP BY id)
+        """
+        params = {
+            "amounts": json.dumps(
+                [(p_id, amount, str(date), t_id) for p_id, amount, date, t_id in amounts]
+            )
+        }
+
+        if not allow_negative:
+            db_cursor.execute(
+                amounts_cte + """
+                SELECT id_produto FROM produtos
+                JOIN amounts ON id_produto = amounts.id
+                WHERE estoque_atual < amounts.amount
+                """,
+                params
+            )
+            if short := [row[0] for row in db_cursor.fetchall()]:
+                raise InsufficientStockError(short)
+
+        db_cursor.execute(
+            amounts_cte + """
+            INSERT INTO movimentos_estoque (id_produto, data, tipo, quantidade, id_origem)
+            SELECT id, date, 'venda', -SUM(amount), transaction_id
+            FROM lines
+            GROUP BY id, date, transaction_id
+            """,
+            params
+        )
+
+    def add_stock_movement(
+        self,
+        db_cursor: sqlite3.Cursor,
+        product_id: int,
+        m_type: Literal["producao", "venda", "ajuste"],
+        amount: int,
+        date: str = None,
+        origin_id: int = None,
+    ):
+        """Append a signed stock movement (the trigger updates estoque_atual) and return its id"""
+        db_cursor.execute(
+            """
+            INSERT INTO movimentos_estoque (id_produto, data, tipo, quantidade, id_origem)
+            VALUES (
+                :product_id,
+                coalesce(:date, date('now', 'localtime')),
+                :m_type,
+                :amount,
+                :origin_id
+            )
+            """,
+            {
+                "product_id": product_id,
+                "date": str(date) if date else None,
+                "m_type": m_type,
+                "amount": amount,
+                "origin_id": origin_id,
+            }
+        )
+        return db_cursor.lastrowid
+
+    def take_stock_snapshot(self, db_cursor: sqlite3.Cursor, date: str):
+        """Store every product's stock on `date` and the last movement it includes"""
+        db_cursor.execute(
+            """
+            INSERT INTO snapshots_estoque (id_produto, data, estoque, id_ultimo_movimento)
+            SELECT
+                stock.id_produto,
+                :date,
+                stock.estoque,
+                (SELECT coalesce(max(id_movimento), 0) FROM movimentos_estoque)
+            FROM ("""
+            + _STOCK_ON_DATE +
+            """) AS stock
+            """,
+            {"date": str(date), "product_id": None}
+        )
+
     def update_transaction(
         self,
         db_cursor: sqlite3.Cursor,
@@ -457,6 +914,28 @@ class MassesDatabase:
             }
         )
 
+    def apply_payment(
+        self,
+        db_cursor: sqlite3.Cursor,
+        transaction_id: int,
+        value: float,
+    ):
+        """Lower the transaction's open value, closing it when fully paid"""
+        db_cursor.execute(
+            """
+            UPDATE transacoes
+            SET
+                valor_aberto = max(valor_aberto - :value, 0),
+                estado = CASE
+                    WHEN estado = 'aberto' AND valor_aberto - :value <= 0 THEN 'fechado'
+                    ELSE estado
+                END,
+                atualizado_em = datetime('now')
+            WHERE id_transacao = :transaction_id
+            """,
+            {"transaction_id": transaction_id, "value": value}
+        )
+
     # --- ↑ UPDATE ↑ ---
     # --- ↓ GET_METHODS ↓ ---
 
@@ -466,70 +945,56 @@ class MassesDatabase:
         table: Literal["produtos", "clientes", "transacoes",
                        "itens_transacao", "pagamentos", "producoes"],
         row_id: int
-    ) -> sqlite3.Row | None:
-        id_names = {
-            "produtos": "id_produto",
-            "clientes": "id_cliente",
-            "transacoes": "id_transacao",
-            "itens_transacao": "id_item",
-            "pagamentos": "id_pagamento",
-            "producoes": "id_producao",
-        }
-
-        cursor.execute(
-            f"""
-            SELECT * FROM {table}
-            WHERE {id_names[table]} = :row_id
-            """,{"row_id": row_id}
-        )
-        return cursor.fetchone()
+    ) -> Record | None:
+        cursor = self._record_cursor(cursor, table)
+        self.statements.execute(cursor, "by_id", table, {"row_id": row_id})
+        return self._record(table, cursor.fetchone())
 
     def get_by_text(
         self, 
         cursor: sqlite3.Cursor, 
         table: Literal["produtos", "clientes"], 
-        term: str
-    ) -> list[sqlite3.Row | None]:
+        term: str,
+        limit: int = None,
+        after_id: int = None,
+    ) -> list[Record]:
         """Returns a near result to the input.\n
-        WHERE ... LIKE \%term\%"""
+        With FTS5: words prefix-matched, accent-insensitive, best match first.
+        \nOtherwise: WHERE ... LIKE %term%, by id.
+        \nPass the id of the last row of a page as `after_id` for the next
+        one (keyset on rank and id; empty if that row no longer matches)."""
+        cursor = self._record_cursor(cursor, table)
+        self._execute_text_search(cursor, table, term, limit, after_id)
+        return self.records[table].from_rows(cursor.fetchall())
 
-        term = f"%{term}%"
-        
-        if table == "produtos":
-            where_clause = "WHERE nome LIKE :term OR tipo LIKE :term"
-        elif table == 'clientes':
-            where_clause = "WHERE nome LIKE :term"
-
-        cursor.execute(
-            f"""
-            SELECT * FROM {table}
-            {where_clause}
-            """, 
-            {"term": term}
-        )
-        return cursor.fetchall()
+    def iter_by_text(
+        self,
+        cursor: sqlite3.Cursor,
+        table: Literal["produtos", "clientes"],
+        term: str,
+        batch_size: int = 500,
+    ) -> Iterator[Record]:
+        """Same as get_by_text, yielding rows `batch_size` at a time"""
+        cursor = self._record_cursor(cursor, table)
+        self._execute_text_search(cursor, table, term)
+        yield from self._iter_cursor(cursor, batch_size, self.records[table])
 
     def get_by_name(
         self,
         cursor: sqlite3.Cursor,
         table: Literal["produtos", "clientes"], 
         name: str
-    ) -> sqlite3.Row | None:
+    ) -> Record | None:
         """Get by exact name"""
-        cursor.execute(
-            f"""
-            SELECT * FROM {table}
-            WHERE nome = :name
-            """,
-            {"name": name}
-        )
-        return cursor.fetchone()
+        cursor = self._record_cursor(cursor, table)
+        self.statements.execute(cursor, "by_name", table, {"name": name})
+        return self._record(table, cursor.fetchone())
     
     def get_table_row_info(
         self,
         cursor: sqlite3.Cursor,
         table: DataBaseTables,
-        id_or_row: int | sqlite3.Row,
+        id_or_row: int | Record,
         column: ProductColumns | ClientColumns
     ) -> dict | int | float | str:
         if isinstance(id_or_row, int):
@@ -538,34 +1003,261 @@ class MassesDatabase:
             row = id_or_row
 
         if column == "all":
-            info = {}
-
-            table_columns = {
-                "produtos": ProductColumns,
-                "clientes": ClientColumns
-            }
-
-            for key in get_args(table_columns[table]):
-                info[key] = row[key]
+            info = row.as_dict() if isinstance(row, Record) else dict(row)
         else: 
             info = row[column]
 
         return info
 
+    def search_transactions(
+        self,
+        cursor: sqlite3.Cursor,
+        client_id: int = None,
+        start_date: str = None,
+        end_date: str = None,
+        t_type: Literal["P", "V"] = None,
+        status: Literal["aberto", "fechado", "cancelado"] = None,
+        after_id: int = None,
+        limit: int = 50,
+    ) -> list[sqlite3.Row]:
+        """
+        Transactions matching every given filter, with the client name as
+        `nome_cliente`. Newest first; pass the last id as `after_id` for the
+        next page. Dates are inclusive "YYYY-MM-DD".
+        """
+        filters = {
+            "transacoes.id_cliente = :client_id": client_id,
+            "transacoes.data >= :start_date": start_date,
+            "transacoes.data <= :end_date": end_date,
+            "transacoes.tipo = :t_type": t_type,
+            "transacoes.estado = :status": status,
+            "transacoes.id_transacao < :after_id": after_id,
+        }
+        # only the given filters go in the SQL, so SQLite can pick
+        # idx_transacoes_cliente_data (client) or idx_transacoes_data_tipo_estado
+        # (date range); an open-ended date alone walks the ids newest first
+        # and stops at the limit
+        where_clause = " AND ".join(
+            condition for condition, value in filters.items() if value is not None
+        ) or "1"
+
+        source = self.transaction_sources(cursor, start_date)["transacoes"]
+        cursor.execute(
+            f"""
+            SELECT transacoes.*, clientes.nome AS nome_cliente
+            FROM {source} AS transacoes
+            LEFT JOIN clientes ON clientes.id_cliente = transacoes.id_cliente
+            WHERE {where_clause}
+            ORDER BY transacoes.id_transacao DESC
+            LIMIT :limit
+            """,
+            {
+                "client_id": client_id,
+                "start_date": start_date,
+                "end_date": end_date,
+                "t_type": t_type,
+                "status": status,
+                "after_id": after_id,
+                "limit": limit,
+            }
+        )
+        return cursor.fetchall()
+
+    def get_client_balance(
+        self, cursor: sqlite3.Cursor, client_id: int
+    ) -> sqlite3.Row | None:
+        """Row of saldos_clientes, None if the client has no transactions"""
+        self.statements.execute(cursor, "balance", "clientes", {"row_id": client_id})
+        return cursor.fetchone()
+
+    def get_ids_by_names(
+        self,
+        cursor: sqlite3.Cursor,
+        table: Literal["produtos", "clientes"],
+        names: list[str],
+    ) -> list[sqlite3.Row]:
+        """(nome, id) of every given name found, in one query (lowest id on ties)"""
+        id_column = self.statements.id_columns[table]
+        cursor.execute(
+            f"""
+            SELECT {table}.nome, min({table}.{id_column}) AS id
+            FROM json_each(:names)
+            JOIN {table} ON {table}.nome = json_each.value
+            GROUP BY {table}.nome
+            """,
+            {"names": json.dumps(names)}
+        )
+        return cursor.fetchall()
+
+    def find_name_conflicts(
+        self,
+        cursor: sqlite3.Cursor,
+        table: Literal["produtos", "clientes"],
+        entries: list[tuple[str, int | None]],
+    ) -> list[sqlite3.Row]:
+        """
+        For each (name, row_id) entry, in order: `conflito`, the id of another
+        row already using the name (or NULL), and `existe`, whether `row_id`
+        exists (always 1 for a NULL row_id, i.e. a new row). One query for
+        the whole list.
+        """
+        id_column = self.statements.id_columns[table]
+        cursor.execute(
+            f"""
+            WITH entries AS (
+                SELECT
+                    key AS idx,
+                    json_extract(value, '$[0]') AS nome,
+                    json_extract(value, '$[1]') AS row_id
+                FROM json_each(:entries)
+            )
+            SELECT
+                entries.idx,
+                (
+                    SELECT {table}.{id_column} FROM {table}
+                    WHERE {table}.nome = entries.nome
+                      AND {table}.{id_column} IS NOT entries.row_id
+                    LIMIT 1
+                ) AS conflito,
+                entries.row_id IS NULL OR EXISTS (
+                    SELECT 1 FROM {table} WHERE {id_column} = entries.row_id
+                ) AS existe
+            FROM entries
+            ORDER BY entries.idx
+            """,
+            {"entries": json.dumps(entries)}
+        )
+        return cursor.fetchall()
+
+    def get_client_balances(
+        self, cursor: sqlite3.Cursor, client_ids: list[int]
+    ) -> list[sqlite3.Row]:
+        """saldos_clientes rows of the given clients (missing ones are skipped)"""
+        cursor.execute(
+            """
+            SELECT saldos_clientes.* FROM json_each(:ids)
+            JOIN saldos_clientes ON saldos_clientes.id_cliente = json_each.value
+            """,
+            {"ids": json.dumps(client_ids)}
+        )
+        return cursor.fetchall()
+
+    def get_stock_on(
+        self,
+        cursor: sqlite3.Cursor,
+        date: str,
+        product_id: int = None,
+    ) -> list[sqlite3.Row]:
+        """
+        (id_produto, estoque) on the end of `date`: the latest snapshot up to
+        that day plus the movements it doesn't include.
+        """
+        cursor.execute(_STOCK_ON_DATE, {"date": str(date), "product_id": product_id})
+        return cursor.fetchall()
+
     def get_by_table(
         self,
         db_cursor: sqlite3.Cursor,
         table: DataBaseTables
-    ) -> list[sqlite3.Row | None]:
+    ) -> list[Record]:
+        db_cursor = self._record_cursor(db_cursor, table)
+        self.statements.execute(db_cursor, "all", table)
+        return self.records[table].from_rows(db_cursor.fetchall())
+
+    def iter_by_table(
+        self,
+        db_cursor: sqlite3.Cursor,
+        table: DataBaseTables,
+        batch_size: int = 500,
+    ) -> Iterator[Record]:
+        """Same as get_by_table, yielding rows `batch_size` at a time"""
+        db_cursor = self._record_cursor(db_cursor, table)
+        self.statements.execute(db_cursor, "all", table)
+        yield from self._iter_cursor(db_cursor, batch_size, self.records[table])
+
+    def get_page(
+        self,
+        db_cursor: sqlite3.Cursor,
+        table: DataBaseTables,
+        after_id: int = None,
+        limit: int = 50,
+        filters: dict[TableColumn, str | int | float] = None,
+    ) -> list[Record]:
+        """
+        Keyset pagination: up to `limit` rows with id > `after_id`, by id.
+        \n`filters` are column = value conditions. Pass the last id of a page
+        as `after_id` to get the next one.
+        """
+        filters = filters or {}
+        self.statements.check_columns(table, filters)
+        id_column = self.statements.id_columns[table]
+
+        where_clause = " ".join(f"AND {column} = :{column}" for column in filters)
+        db_cursor = self._record_cursor(db_cursor, table)
         db_cursor.execute(
             f"""
             SELECT * FROM {table}
-            """
+            WHERE {id_column} > :after_id {where_clause}
+            ORDER BY {id_column}
+            LIMIT :limit
+            """,
+            {**filters, "after_id": after_id or 0, "limit": limit}
         )
-        return db_cursor.fetchall()
+        return self.records[table].from_rows(db_cursor.fetchall())
     
     # ↓ HELPERS ↓
 
+    def _record_cursor(self, cursor: sqlite3.Cursor, table: DataBaseTables) -> sqlite3.Cursor:
+        """
+        New cursor on the same connection returning plain tuples, which are
+        turned into `table` records. The caller's cursor keeps its sqlite3.Row.
+        """
+        record_cursor = cursor.connection.cursor()
+        record_cursor.row_factory = None
+        return record_cursor
+
+    def _record(self, table: DataBaseTables, row: tuple | None) -> Record | None:
+        return None if row is None else self.records[table]._make(row)
+
+    def _execute_text_search(
+        self,
+        cursor: sqlite3.Cursor,
+        table: Literal["produtos", "clientes"],
+        term: str,
+        limit: int = None,
+        after_id: int = None,
+    ):
+        limit = -1 if limit is None else limit  # LIMIT -1: no limit
+        page = {"limit": limit, "after_id": after_id}
+
+        if self.fts_enabled and (match := self._fts_match_query(term)):
+            self.statements.execute(cursor, "fts", table, {"match": match, **page})
+        else:
+            self.statements.execute(cursor, "like", table, {"term": f"%{term}%", **page})
+
+    @staticmethod
+    def _iter_cursor(
+        cursor: sqlite3.Cursor, batch_size: int, record: type[Record] = None
+    ) -> Iterator[sqlite3.Row | Record]:
+        while rows := cursor.fetchmany(batch_size):
+            yield from (record.from_rows(rows) if record else rows)
+
+    @staticmethod
+    def _fts_match_query(term: str) -> str:
+        """'pizza cala' -> '"pizza"* "cala"*' (every word, as a prefix)"""
+        return " ".join(f'"{word}"*' for word in re.findall(r"\w+", term))
+
+    @staticmethod
+    def _inserted_ids(db_cursor: sqlite3.Cursor, count: int) -> list[int]:
+        """
+        Ids of the last `count` rows of an executemany INSERT.
+        \nThe write lock is held for the whole statement and AUTOINCREMENT
+        never reuses ids, so they are the `count` ids ending at last_insert_rowid.
+        """
+        if not count: return []
+        last_id = db_cursor.connection.execute("SELECT last_insert_rowid()").fetchone()[0]
+        return list(range(last_id - count + 1, last_id + 1))
+
     @classmethod
     def _get_path(cls, path: str):
         if not path: return ":memory:"
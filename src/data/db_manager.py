@@ -1,15 +1,31 @@
+from data import archive
 from data.database import MassesDatabase
-from data.table_classes import Item, ProductColumns, ClientColumns, DataBaseTables
-from sqlite3 import Cursor, Row
-from typing import Literal
+from data.entity_cache import EntityCache, MISSING
+from data.instrumentation import Instrumentation
+from data.records import Record
+from data.table_classes import (
+    Item, TransactionData, ProductColumns, ClientColumns, DataBaseTables, TableColumn,
+    ClientBalance
+)
+from data.write_queue import WriteQueue, Operation, T
+from sqlite3 import Cursor
+from typing import Callable, Iterator, Literal
 import datetime
+import os
 
 
 
 class DbManager:
-    def __init__(self, db: MassesDatabase):
+    def __init__(self, db: MassesDatabase, cache_size: int = 1000):
         self.db = db
 
+        # produtos/clientes by id and exact name, invalidated by every write here
+        self.cache = {
+            "produtos": EntityCache("id_produto", cache_size),
+            "clientes": EntityCache("id_cliente", cache_size),
+        }
+        # set by enable_write_queue: writes then go through one writer thread
+        self.write_queue: WriteQueue | None = None
 
     def add_product(
         self,
@@ -19,21 +35,40 @@ class DbManager:
         sale_price: float,
         min_stock: int,
         current_stock: int = 0,
-    ):
-        with self.db.get_connection() as conn:
-            self.db.add_product(
-                conn.cursor(),
-                name,
-                p_type,
-                production_price,
-                sale_price,
-                min_stock,
-                current_stock
-            )
+    ) -> int:
+        product_id = self._write(lambda cursor: self.db.add_product(
+            cursor,
+            name,
+            p_type,
+            production_price,
+            sale_price,
+            min_stock,
+            current_stock
+        ))
+        self.cache["produtos"].invalidate(names=[name])
+        return product_id
 
-    def add_client(self, name: str, contact: str = None):
-        with self.db.get_connection() as conn:
-            self.db.add_client(conn.cursor(), name, contact)
+    def add_client(self, name: str, contact: str = None) -> int:
+        client_id = self._write(lambda cursor: self.db.add_client(cursor, name, contact))
+        self.cache["clientes"].invalidate(names=[name])
+        return client_id
+
+    def add_products_bulk(
+        self, products: list[tuple[str, str, float, float, int, int]]
+    ) -> list[int]:
+        """
+        Add (name, p_type, production_price, sale_price, min_stock,
+        current_stock) products in one db transaction
+        """
+        product_ids = self._write(lambda cursor: self.db.add_products_many(cursor, products))
+        self.cache["produtos"].invalidate(names=[product[0] for product in products])
+        return product_ids
+
+    def add_clients_bulk(self, clients: list[tuple[str, str | None]]) -> list[int]:
+        """Add (name, contact) clients in one db transaction"""
+        client_ids = self._write(lambda cursor: self.db.add_clients_many(cursor, clients))
+        self.cache["clientes"].invalidate(names=[client[0] for client in clients])
+        return client_ids
 
     def register_transaction(
         self,
@@ -42,24 +77,90 @@ class DbManager:
         items: list[Item],
         date: str | datetime.date = None,
         payment: float = 0,
-    ):
-        with self.db.get_connection() as conn:
-            cursor = conn.cursor()
-
-            total_value = self._get_total_value(items)
-            open_value = total_value - payment
-            status = "aberto" if open_value > 0 else "fechado"
-            date = (date or datetime.date.today())
+        check_stock: bool = False,
+    ) -> int:
+        """
+        Register the transaction, its items and payment in one db transaction
+        and return its id.
+        \nWith `check_stock` a sale that would leave negative stock raises
+        InsufficientStockError and nothing is saved.
+        """
+        total_value = self._get_total_value(items)
+        open_value = total_value - payment
+        status = "aberto" if open_value > 0 else "fechado"
+        date = (date or datetime.date.today())
 
+        def write(cursor: Cursor) -> int:
             transaction = self.db.register_transaction(
                 cursor, client_id, date, t_type, status, total_value, open_value
             )
             self._register_transaction_items(cursor, transaction, items)
             
             if t_type == "V":
-                self._subtract_product_current_stock(cursor, items)
+                self._subtract_product_current_stock(
+                    cursor, [(transaction, date, items)], check_stock
+                )
             if payment and t_type == "V":
                 self.db.register_payment(cursor, transaction, date, payment)
+            return transaction
+
+        transaction_id = self._write(write)
+        if t_type == "V":
+            self.cache["produtos"].invalidate([item["item_id"] for item in items])
+        return transaction_id
+
+    def register_transactions_bulk(
+        self,
+        transactions: list[TransactionData],
+        check_stock: bool = False,
+    ) -> list[int]:
+        """
+        Register many transactions, with their items and payments, in one db
+        transaction using executemany. Returns the transaction ids in order.
+        \nIf any of them fails (e.g. InsufficientStockError) none is saved.
+        """
+        today = datetime.date.today()
+        rows = []
+        for transaction in transactions:
+            total_value = self._get_total_value(transaction["items"])
+            open_value = total_value - transaction.get("payment", 0)
+            rows.append((
+                transaction["client_id"],
+                transaction.get("date") or today,
+                transaction["t_type"],
+                "aberto" if open_value > 0 else "fechado",
+                total_value,
+                open_value,
+            ))
+
+        sold_items = [
+            item for transaction in transactions if transaction["t_type"] == "V"
+            for item in transaction["items"]
+        ]
+
+        def write(cursor: Cursor) -> list[int]:
+            transaction_ids = self.db.register_transactions_many(cursor, rows)
+
+            items, sales, payments = [], [], []
+            for t_id, transaction, row in zip(transaction_ids, transactions, rows):
+                items += [
+                    (t_id, item["item_id"], item["item_amount"], item["unit_value"])
+                    for item in transaction["items"]
+                ]
+                if transaction["t_type"] == "V":
+                    sales.append((t_id, row[1], transaction["items"]))
+                    if transaction.get("payment"):
+                        payments.append((t_id, row[1], transaction["payment"]))
+
+            self.db.register_transaction_items_many(cursor, items)
+            if sales:
+                self._subtract_product_current_stock(cursor, sales, check_stock)
+            self.db.register_payments_many(cursor, payments)
+            return transaction_ids
+
+        transaction_ids = self._write(write)
+        self.cache["produtos"].invalidate([item["item_id"] for item in sold_items])
+        return transaction_ids
 
     def _register_transaction_items(
             self,
@@ -67,42 +168,93 @@ class DbManager:
             transaction_id: int,
             items: list[Item],
     ):
-        for item in items:
-            self.db.register_transaction_items(
-                db_cursor, transaction_id, item["item_id"], item["item_amount"], item["unit_value"]
-            )
+        self.db.register_transaction_items_many(
+            db_cursor,
+            [
+                (transaction_id, item["item_id"], item["item_amount"], item["unit_value"])
+                for item in items
+            ]
+        )
 
     def register_payment(
             self,
             transaction_id: int,
             value: float,
             date: str | datetime.date = None
-    ):
+    ) -> int:
         if not date: date = datetime.date.today()
-        with self.db.get_connection() as conn:
-            self.db.register_payment(conn.cursor(), transaction_id, date, value)
+
+        def write(cursor: Cursor) -> int:
+            payment_id = self.db.register_payment(cursor, transaction_id, date, value)
+            self.db.apply_payment(cursor, transaction_id, value)
+            return payment_id
+
+        return self._write(write)
 
     def register_production(
             self,
             product_id: int,
             amount: int,
             date: str | datetime.date = None
-    ):
+    ) -> int:
         if not date: date = datetime.date.today()
-        with self.db.get_connection() as conn:
-            self.db.register_production(conn.cursor(),product_id, date, amount)
+        production_id = self._write(
+            lambda cursor: self.db.register_production(cursor, product_id, date, amount)
+        )
+        self.cache["produtos"].invalidate([product_id])
+        return production_id
+
+    def register_productions_bulk(
+            self,
+            productions: list[tuple[int, int]],
+            date: str | datetime.date = None
+    ) -> list[int]:
+        """Register (product_id, amount) productions in one db transaction"""
+        if not date: date = datetime.date.today()
+        rows = [(product_id, date, amount) for product_id, amount in productions]
+        production_ids = self._write(
+            lambda cursor: self.db.register_productions_many(cursor, rows)
+        )
+        self.cache["produtos"].invalidate([product_id for product_id, _ in productions])
+        return production_ids
+
+    def adjust_stock(
+            self,
+            product_id: int,
+            amount: int,
+            date: str | datetime.date = None
+    ) -> int:
+        """Register a signed stock correction (losses, counting errors...)"""
+        movement_id = self._write(lambda cursor: self.db.add_stock_movement(
+            cursor, product_id, "ajuste", amount, date
+        ))
+        self.cache["produtos"].invalidate([product_id])
+        return movement_id
+
+    def take_stock_snapshot(self, date: str | datetime.date = None):
+        """Store the stock of every product on `date` so older movements can be skipped"""
+        if not date: date = datetime.date.today()
+        self._write(lambda cursor: self.db.take_stock_snapshot(cursor, date))
 
     # ↑ ADDERS/REGISTERS ↑ #
     # ↓ UPDATERS ↓ #
 
-    def _subtract_product_current_stock(self, db_cursor: Cursor, items: list[Item]):
-        for item in items:
-            current_stock = self.db.get_table_row_info(
-                db_cursor, "produtos", item["item_id"], "estoque_atual"
-            )
-            new_current_stock = current_stock - item["item_amount"]
-
-            self.update_product(item["item_id"], db_cursor, current_stock=new_current_stock)
+    def _subtract_product_current_stock(
+        self,
+        db_cursor: Cursor,
+        sales: list[tuple[int, str | datetime.date, list[Item]]],
+        check_stock: bool = False,
+    ):
+        """`sales` are (transaction_id, date, items) of sale transactions"""
+        self.db.subtract_products_stock(
+            db_cursor,
+            [
+                (item["item_id"], item["item_amount"], date, t_id)
+                for t_id, date, items in sales
+                for item in items
+            ],
+            allow_negative=not check_stock,
+        )
 
     def update_product(
         self,
@@ -112,27 +264,21 @@ class DbManager:
         production_price: float,
         sale_price: float,
         min_stock: int,
-        current_stock: int,
+        current_stock: int = None,
         db_cursor: Cursor = None,
+        loaded_stock: int = None,
     ):
-        conn = None
-        if not db_cursor:
-            conn = self.db.get_connection()
-            db_cursor = conn.cursor()
-
-        try:
-            self.db.update_product(
-                db_cursor, 
+        """See MassesDatabase.update_product for `current_stock`/`loaded_stock`"""
+        self._write(
+            lambda cursor: self.db.update_product(
+                cursor,
                 product_id, name, p_type, 
-                production_price, sale_price, min_stock, current_stock
-            )
-        except Exception as e:
-            if conn: conn.rollback()
-            raise e
-        else:
-            if conn: conn.commit()
-        finally:
-            if conn: conn.close()
+                production_price, sale_price, min_stock, current_stock,
+                loaded_stock=loaded_stock,
+            ),
+            db_cursor,
+        )
+        self.cache["produtos"].invalidate([product_id], [name])
         
     def update_client(
         self,
@@ -141,22 +287,11 @@ class DbManager:
         contact: str,
         db_cursor: Cursor=None
     ):
-        conn = None
-        if not db_cursor:
-            conn = self.db.get_connection()
-            db_cursor = conn.cursor()
-
-        try:
-            self.db.update_client(
-                db_cursor, client_id, name, contact
-            )
-        except Exception as e:
-            if conn: conn.rollback()
-            raise e
-        else:
-            if conn: conn.commit()
-        finally:
-            if conn: conn.close()
+        self._write(
+            lambda cursor: self.db.update_client(cursor, client_id, name, contact),
+            db_cursor,
+        )
+        self.cache["clientes"].invalidate([client_id], [name])
     
     # ↑ UPDATERS ↑ #
     # ↓ GETTERS  ↓ #
@@ -167,29 +302,72 @@ class DbManager:
         table: Literal["produtos", "clientes", "transacoes",
                        "itens_transacao", "pagamentos", "producoes"],
     ):
+        """Get by id, produtos and clientes from the cache when possible"""
+        if (cache := self.cache.get(table)) is None:
+            with self.db.get_connection() as conn:
+                return self.db.get_by_id(conn.cursor(), table, row_id)
+
+        if (row := cache.get(row_id)) is not MISSING:
+            return row
+
+        generation = cache.generation
         with self.db.get_connection() as conn:
-            return self.db.get_by_id(conn.cursor(), table, row_id)
+            row = self.db.get_by_id(conn.cursor(), table, row_id)
+        if row is not None:
+            cache.put(row, generation)
+        return row
 
     def get_by_text(
         self,
         table: Literal["produtos", "clientes"], 
         term: str,
+        limit: int = None,
+        after_id: int = None,
     ):
         """
         Return rows that are similar or equal to the input
-        \n WHERE LIKE \%input\%
+        \n WHERE LIKE \%input\% (or FTS5, best matches first)
+        \nPaginated like get_page: pass the last id of a page as `after_id`.
         """
         with self.db.get_connection() as conn:
-            return self.db.get_by_text(conn.cursor(), table, term)
+            return self.db.get_by_text(conn.cursor(), table, term, limit, after_id)
+
+    def iter_by_text(
+        self,
+        table: Literal["produtos", "clientes"],
+        term: str,
+        batch_size: int = 500,
+    ) -> Iterator[Record]:
+        """
+        Stream get_by_text rows, `batch_size` per query. Each page checks out
+        a connection of its own: nothing is held between yields, so the
+        generator can be closed or resumed from any thread.
+        """
+        yield from self._iter_pages(
+            table, lambda after_id: self.get_by_text(table, term, batch_size, after_id),
+            batch_size,
+        )
         
     def get_by_name(
         self,
         table: Literal["produtos", "clientes"], 
         name: str,
     ):
-        """Get by exact name"""
+        """Get by exact name, from the cache when possible"""
+        cache = self.cache[table]
+        if (row := cache.get_by_name(name)) is not MISSING:
+            return row
+
+        generation = cache.generation
         with self.db.get_connection() as conn:
-            return self.db.get_by_name(conn.cursor(), table, name)
+            row = self.db.get_by_name(conn.cursor(), table, name)
+        if row is None:
+            # other processes may add it to a file db, only cache it in memory
+            if self.db.path == ":memory:":
+                cache.put_absent_name(name, generation)
+        else:
+            cache.put(row, generation)
+        return row
 
     def get_by_table(
         self,
@@ -198,19 +376,240 @@ class DbManager:
         with self.db.get_connection() as conn:
             return self.db.get_by_table(conn.cursor(), table)
 
+    def iter_by_table(
+        self,
+        table: DataBaseTables,
+        batch_size: int = 500,
+    ) -> Iterator[Record]:
+        """Stream a whole table by id, one get_page (and checkout) per batch"""
+        yield from self._iter_pages(
+            table, lambda after_id: self.get_page(table, after_id, batch_size), batch_size
+        )
+
+    def get_page(
+        self,
+        table: DataBaseTables,
+        after_id: int = None,
+        limit: int = 50,
+        filters: dict[TableColumn, str | int | float] = None,
+    ):
+        """Up to `limit` rows after `after_id`, by id (keyset pagination)"""
+        with self.db.get_connection() as conn:
+            return self.db.get_page(conn.cursor(), table, after_id, limit, filters)
+
     def get_table_row_info(
         self,
         table: DataBaseTables,
-        id_or_row: int | Row,
+        id_or_row: int | Record,
         column: ProductColumns | ClientColumns
     ):
+        row = self.get_by_id(id_or_row, table) if isinstance(id_or_row, int) else id_or_row
+        return self.db.get_table_row_info(None, table, row, column)
+
+    def search_transactions(
+        self,
+        client_id: int = None,
+        start_date: str | datetime.date = None,
+        end_date: str | datetime.date = None,
+        t_type: Literal["P", "V"] = None,
+        status: Literal["aberto", "fechado", "cancelado"] = None,
+        after_id: int = None,
+        limit: int = 50,
+    ):
+        """Filtered page of transactions, newest first (see MassesDatabase)"""
+        with self.db.get_connection() as conn:
+            return self.db.search_transactions(
+                conn.cursor(),
+                client_id,
+                str(start_date) if start_date else None,
+                str(end_date) if end_date else None,
+                t_type,
+                status,
+                after_id,
+                limit,
+            )
+
+    def get_stock_on(
+        self,
+        date: str | datetime.date,
+        product_id: int = None,
+    ) -> dict[int, int]:
+        """Stock of every product (or only `product_id`) at the end of `date`"""
+        with self.db.get_connection() as conn:
+            rows = self.db.get_stock_on(conn.cursor(), date, product_id)
+        return {row["id_produto"]: row["estoque"] for row in rows}
+
+    def get_client_balance(self, client_id: int) -> ClientBalance:
+        """Open balance, open orders, last purchase/payment and lifetime revenue"""
+        with self.db.get_connection() as conn:
+            row = self.db.get_client_balance(conn.cursor(), client_id)
+        return dict(row) if row else self._empty_balance(client_id)
+
+    def get_client_balances(self, client_ids: list[int]) -> dict[int, ClientBalance]:
+        """get_client_balance for many clients in one query"""
+        with self.db.get_connection() as conn:
+            rows = self.db.get_client_balances(conn.cursor(), client_ids)
+
+        balances = {client_id: self._empty_balance(client_id) for client_id in client_ids}
+        for row in rows:
+            balances[row["id_cliente"]] = dict(row)
+        return balances
+
+    def get_ids_by_names(
+        self,
+        table: Literal["produtos", "clientes"],
+        names: list[str],
+    ) -> dict[str, int]:
+        """Name -> id of every given name found, in one query"""
+        if not names: return {}
+        with self.db.get_connection() as conn:
+            rows = self.db.get_ids_by_names(conn.cursor(), table, names)
+        return {row["nome"]: row["id"] for row in rows}
+
+    def find_name_conflicts(
+        self,
+        table: Literal["produtos", "clientes"],
+        entries: list[tuple[str, int | None]],
+    ) -> list[tuple[int | None, bool]]:
+        """(conflicting id or None, row exists) of each (name, row_id) entry"""
+        if not entries: return []
         with self.db.get_connection() as conn:
-            return self.db.get_table_row_info(
-                conn.cursor(), table, id_or_row, column
+            rows = self.db.find_name_conflicts(conn.cursor(), table, entries)
+        return [(row["conflito"], bool(row["existe"])) for row in rows]
+
+    def archive_transactions(
+        self,
+        before: str | datetime.date,
+        archive_path: str = None,
+        batch_size: int = 5000,
+        vacuum: bool = False,
+    ) -> int:
+        """
+        Move closed/cancelled transactions dated before `before`, with their
+        items and payments, to the archive file. Returns how many were moved.
+        \nEach batch is copied (archive-only commit) and then deleted (main-only
+        commit), so a crash can at worst leave copies to be cleaned by the next
+        run. Client balances keep their lifetime totals. `vacuum` shrinks the
+        main file afterwards (rewrites all of it and blocks every writer).
+        \nIt commits batch by batch, so it refuses to run while the calling
+        thread holds a connection (inside another db_cursor/transaction).
+        Once a db has an archive every later run must use that same file.
+        """
+        if self.db.pool.held_connection() is not None:
+            raise RuntimeError(
+                "O arquivamento não pode rodar dentro de outra transação"
+            )
+        before = str(before)
+        path = archive_path or self.db.archive_path or self.db.default_archive_path()
+        if self.db.archive_path and (
+            os.path.realpath(path) != os.path.realpath(self.db.archive_path)
+        ):
+            raise ValueError(
+                f"O banco já tem arquivo morto em {self.db.archive_path}, não em {path}"
             )
+        moved = last_id = 0
+
+        with self.db.get_connection() as conn:
+            conn.commit()  # ATTACH can't run inside a transaction
+            self.db.attach_archive(conn, path)
+            cursor = conn.cursor()
+
+            # the cutoff is saved first: from here on reads before it look at both files
+            self.db.set_archive_state(cursor, path, before)
+            conn.commit()
+
+            while last_id := archive.copy_batch(cursor, before, last_id, batch_size):
+                conn.commit()
+                moved += archive.delete_copied(cursor)
+                conn.commit()
+
+            if vacuum and moved:
+                conn.commit()
+                conn.execute("VACUUM main")
+        return moved
+
+    def get_archive_info(self) -> dict[str, str | None]:
+        return {"caminho": self.db.archive_path, "data_corte": self.db.archive_cutoff}
+
+    def cache_stats(self) -> dict[str, dict[str, int | float]]:
+        """Size and hit rate of each entity cache"""
+        return {table: cache.stats() for table, cache in self.cache.items()}
+
+    def enable_instrumentation(self, slow_ms: float = 100.0) -> Instrumentation:
+        """
+        Time this manager's public methods and every statement/checkout of
+        its database. Off by default: nothing is wrapped until this is called.
+        """
+        instrumentation = self.db.enable_instrumentation(slow_ms)
+        if not getattr(self, "_instrumented", False):
+            instrumentation.instrument_methods(self, "DbManager")
+            self._instrumented = True
+        return instrumentation
+
+    def disable_instrumentation(self):
+        Instrumentation.remove_from(self)
+        self._instrumented = False
+        self.db.disable_instrumentation()
+
+    def enable_write_queue(self, window: float = 0.0, max_batch: int = 256) -> WriteQueue:
+        """
+        Send every write through one writer thread that group-commits them
+        (see WriteQueue). The write methods keep their signatures and still
+        return once their data is committed; concurrent callers just share
+        the commit. Writes made while the calling thread already holds a
+        connection run inline, in that connection's transaction.
+        """
+        if self.write_queue is None:
+            self.write_queue = WriteQueue(self.db, window, max_batch)
+        return self.write_queue
+
+    def disable_write_queue(self, wait: bool = True):
+        """Commit what is queued and go back to one transaction per write"""
+        write_queue, self.write_queue = self.write_queue, None
+        if write_queue:
+            write_queue.close(wait)
 
     # ↓ HELPERS ↓ #
 
+    def _write(self, operation: Operation[T], db_cursor: Cursor = None) -> T:
+        """
+        Run a write with the cursor it needs: the caller's `db_cursor`, the
+        writer thread's (write queue on) or a freshly checked out one.
+        """
+        if db_cursor is not None:
+            return operation(db_cursor)
+        if self.write_queue is None or self.db.pool.held_connection() is not None:
+            with self.db.get_connection() as conn:
+                return operation(conn.cursor())
+        return self.write_queue.submit(operation).result()
+
+    def _iter_pages(
+        self,
+        table: DataBaseTables,
+        get_page: Callable[[int | None], list[Record]],
+        batch_size: int,
+    ) -> Iterator[Record]:
+        """Yield `get_page(after_id)` pages until one comes back short"""
+        id_column = self.db.statements.id_columns[table]
+        after_id = None
+        while True:
+            rows = get_page(after_id)
+            yield from rows
+            if len(rows) < batch_size:
+                return
+            after_id = rows[-1][id_column]
+
+    @staticmethod
+    def _empty_balance(client_id: int) -> ClientBalance:
+        return {
+            "id_cliente": client_id,
+            "saldo_aberto": 0.0,
+            "pedidos_abertos": 0,
+            "ultima_compra": None,
+            "receita_total": 0.0,
+            "ultimo_pagamento": None,
+        }
+
     def _get_total_value(self, items: list[Item]):
         total_value = 0
         
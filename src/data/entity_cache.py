@@ -0,0 +1,106 @@
+import threading
+from collections import OrderedDict
+from data.records import Record
+from data.table_classes import TableColumn
+
+MISSING = object()  # "not cached", as opposed to a cached None ("not in the db")
+
+
+class EntityCache:
+    """
+    Thread-safe LRU of rows keyed by id, plus an exact-name index.
+    \nNames known to be absent from the db can be cached as None (DbManager
+    only does it for in-memory dbs, which no other process writes). Every
+    write must invalidate the ids/names it touches.
+    """
+
+    def __init__(self, id_column: TableColumn, max_size: int = 1000):
+        self.id_column = id_column
+        self.max_size = max_size
+
+        self._rows: OrderedDict[int, Record] = OrderedDict()
+        self._names: OrderedDict[str, int | None] = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0
+
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def generation(self) -> int:
+        """Take it before querying the db and hand it back to `put`"""
+        return self._generation
+
+    def get(self, row_id: int) -> Record | object:
+        with self._lock:
+            row = self._rows.get(row_id, MISSING)
+            if row is MISSING:
+                self.misses += 1
+            else:
+                self._rows.move_to_end(row_id)
+                self.hits += 1
+            return row
+
+    def get_by_name(self, name: str) -> Record | None | object:
+        with self._lock:
+            row_id = self._names.get(name, MISSING)
+            row = row_id if row_id in (None, MISSING) else self._rows.get(row_id, MISSING)
+            if row is MISSING:
+                self.misses += 1
+            else:
+                self._names.move_to_end(name)
+                if row is not None:
+                    self._rows.move_to_end(row_id)
+                self.hits += 1
+            return row
+
+    def put(self, row: Record, generation: int):
+        """Cache a row read at `generation`; dropped if a write happened since"""
+        with self._lock:
+            if generation != self._generation:
+                return
+            row_id = row[self.id_column]
+            self._rows[row_id] = row
+            self._rows.move_to_end(row_id)
+            self._names[row["nome"]] = row_id
+            self._names.move_to_end(row["nome"])
+            self._evict()
+
+    def put_absent_name(self, name: str, generation: int):
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._names[name] = None
+            self._evict()
+
+    def invalidate(self, row_ids: list[int] = (), names: list[str] = ()):
+        """Forget rows (and their names) and names, after a write"""
+        with self._lock:
+            self._generation += 1
+            for row_id in row_ids:
+                if (row := self._rows.pop(row_id, None)) is not None:
+                    self._names.pop(row["nome"], None)
+            for name in names:
+                self._names.pop(name, None)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._rows.clear()
+            self._names.clear()
+
+    def stats(self) -> dict[str, int | float]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._rows),
+            "names": len(self._names),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def _evict(self):
+        while len(self._rows) > self.max_size:
+            self._rows.popitem(last=False)
+        while len(self._names) > self.max_size:
+            self._names.popitem(last=False)
@@ -0,0 +1,240 @@
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+from functools import wraps
+from typing import Callable
+
+# upper bounds (ms) of the histogram buckets, the last one catches the rest
+BUCKETS_MS = (0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000, float("inf"))
+
+_SPACES = re.compile(r"\s+")
+
+
+class TimingStats:
+    """Count, rows and latency histogram of one statement/method"""
+
+    __slots__ = ("count", "rows", "total_ms", "max_ms", "buckets", "recent")
+
+    def __init__(self, window: int):
+        self.count = 0
+        self.rows = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * len(BUCKETS_MS)
+        self.recent: deque[float] = deque(maxlen=window)
+
+    def add(self, elapsed_ms: float, rows: int = 0):
+        self.count += 1
+        self.rows += max(rows, 0)
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.recent.append(elapsed_ms)
+        for i, bound in enumerate(BUCKETS_MS):
+            if elapsed_ms <= bound:
+                self.buckets[i] += 1
+                break
+
+    def as_dict(self) -> dict:
+        recent = sorted(self.recent)
+        def percentile(p): return recent[min(len(recent) - 1, int(len(recent) * p))]
+        return {
+            "count": self.count,
+            "rows": self.rows,
+            "total_ms": self.total_ms,
+            "avg_ms": self.total_ms / self.count if self.count else 0.0,
+            "max_ms": self.max_ms,
+            "p50_ms": percentile(0.50) if recent else 0.0,
+            "p95_ms": percentile(0.95) if recent else 0.0,
+            "p99_ms": percentile(0.99) if recent else 0.0,
+            "histogram": dict(zip(BUCKETS_MS, self.buckets)),
+        }
+
+
+class Instrumentation:
+    """
+    Timings of SQL statements, DbManager methods and pool checkouts.
+    \nStatements are keyed by their SQL text (whitespace collapsed); fetch
+    time and fetched rows are added to the statement that produced them.
+    Anything slower than `slow_ms` also goes to a rolling slow log with the
+    DbManager method that ran it.
+    """
+
+    def __init__(self, slow_ms: float = 100.0, window: int = 1000, slow_log_size: int = 200):
+        self.slow_ms = slow_ms
+        self.window = window
+
+        self.statements: dict[str, TimingStats] = {}
+        self.methods: dict[str, TimingStats] = {}
+        self.checkouts = TimingStats(window)
+        self.slow_log: deque[dict] = deque(maxlen=slow_log_size)
+
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def record_statement(self, sql: str, elapsed_ms: float, rows: int = 0):
+        self._record(self.statements, sql, elapsed_ms, rows, "sql")
+
+    def record_method(self, name: str, elapsed_ms: float):
+        self._record(self.methods, name, elapsed_ms, 0, "method")
+
+    def record_checkout(self, elapsed_ms: float):
+        with self._lock:
+            self.checkouts.add(elapsed_ms)
+        if elapsed_ms >= self.slow_ms:
+            self._log_slow("checkout", "get_connection", elapsed_ms)
+
+    def add_fetch(self, sql: str, elapsed_ms: float, rows: int):
+        """Rows (and the time to fetch them) of a statement already recorded"""
+        with self._lock:
+            stats = self.statements.get(sql)
+            if stats:
+                stats.rows += rows
+                stats.total_ms += elapsed_ms
+
+    def instrument_methods(self, obj: object, prefix: str = None) -> object:
+        """
+        Time every public method of `obj` by shadowing it on the instance.
+        \nStatements run inside a method are attributed to it in the slow log.
+        Undo with `remove_from`.
+        """
+        prefix = prefix or type(obj).__name__
+        for name in dir(type(obj)):
+            method = getattr(obj, name)
+            if name.startswith("_") or not callable(method):
+                continue
+            setattr(obj, name, self._timed(f"{prefix}.{name}", method))
+        return obj
+
+    @staticmethod
+    def remove_from(obj: object):
+        """Drop the wrappers added by `instrument_methods`"""
+        for name, value in list(vars(obj).items()):
+            if getattr(value, "__instrumented__", False):
+                delattr(obj, name)
+
+    def current_method(self) -> str | None:
+        return getattr(self._local, "method", None)
+
+    def report(self, top: int = 20) -> dict[str, list[dict] | dict]:
+        """The `top` statements and methods by total time, plus checkout stats"""
+        with self._lock:
+            def ranked(stats: dict[str, TimingStats]):
+                rows = [{"name": name, **s.as_dict()} for name, s in stats.items()]
+                return sorted(rows, key=lambda r: r["total_ms"], reverse=True)[:top]
+            return {
+                "statements": ranked(self.statements),
+                "methods": ranked(self.methods),
+                "checkouts": self.checkouts.as_dict(),
+                "slow": list(self.slow_log),
+            }
+
+    def reset(self):
+        with self._lock:
+            self.statements.clear()
+            self.methods.clear()
+            self.checkouts = TimingStats(self.window)
+            self.slow_log.clear()
+
+    # ↓ HELPERS ↓
+
+    @staticmethod
+    def normalize(sql: str) -> str:
+        return _SPACES.sub(" ", sql).strip()
+
+    def _record(self, stats: dict, key: str, elapsed_ms: float, rows: int, kind: str):
+        with self._lock:
+            entry = stats.get(key)
+            if entry is None:
+                entry = stats[key] = TimingStats(self.window)
+            entry.add(elapsed_ms, rows)
+        if elapsed_ms >= self.slow_ms:
+            self._log_slow(kind, key, elapsed_ms)
+
+    def _log_slow(self, kind: str, name: str, elapsed_ms: float):
+        self.slow_log.append({
+            "kind": kind,
+            "name": name,
+            "ms": elapsed_ms,
+            "method": self.current_method(),
+            "thread": threading.current_thread().name,
+            "at": time.time(),
+        })
+
+    def _timed(self, name: str, method: Callable) -> Callable:
+        local = self._local
+
+        @wraps(method)
+        def timed(*args, **kwargs):
+            outer = getattr(local, "method", None)
+            local.method = outer or name
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.record_method(name, (time.perf_counter() - start) * 1000)
+                local.method = outer
+
+        timed.__instrumented__ = True
+        return timed
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """Cursor that reports its statements to `connection.instrumentation`"""
+
+    _sql = None
+
+    def execute(self, sql, parameters=()):
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._record(sql, start)
+
+    def executemany(self, sql, seq_of_parameters):
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self._record(sql, start)
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = super().fetchone()
+        self._add_fetch(start, row is not None)
+        return row
+
+    def fetchmany(self, size=None):
+        start = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._add_fetch(start, len(rows))
+        return rows
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = super().fetchall()
+        self._add_fetch(start, len(rows))
+        return rows
+
+    def __next__(self):
+        start = time.perf_counter()
+        row = super().__next__()
+        self._add_fetch(start, 1)
+        return row
+
+    # ↓ HELPERS ↓
+
+    def _record(self, sql: str, start: float):
+        instrumentation = self.connection.instrumentation
+        if instrumentation is None:
+            return
+        self._sql = instrumentation.normalize(sql)
+        instrumentation.record_statement(
+            self._sql, (time.perf_counter() - start) * 1000, self.rowcount
+        )
+
+    def _add_fetch(self, start: float, rows: int):
+        instrumentation = self.connection.instrumentation
+        if instrumentation is not None and self._sql:
+            instrumentation.add_fetch(self._sql, (time.perf_counter() - start) * 1000, rows)
@@ -0,0 +1,422 @@
+import sqlite3
+from typing import Callable
+
+
+def fts5_available(conn: sqlite3.Connection) -> bool:
+    return bool(
+        conn.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')").fetchone()[0]
+    )
+
+
+def _create_search_index(conn: sqlite3.Connection):
+    """
+    FTS5 index over produtos(nome, tipo) and clientes(nome), kept in sync by
+    triggers. Accents are folded (remove_diacritics) so "acucar" finds "açúcar".
+    \nSkipped when this SQLite build has no FTS5, searches then use LIKE
+    until a build with FTS5 opens the db (see ensure_search_index).
+    """
+    if not fts5_available(conn):
+        return
+
+    for table, id_column, columns in (
+        ("produtos", "id_produto", ("nome", "tipo")),
+        ("clientes", "id_cliente", ("nome",)),
+    ):
+        cols = ", ".join(columns)
+        new_cols = ", ".join(f"new.{c}" for c in columns)
+        old_cols = ", ".join(f"old.{c}" for c in columns)
+        statements = (
+            f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS {table}_fts USING fts5(
+                {cols},
+                content='{table}',
+                content_rowid='{id_column}',
+                tokenize='unicode61 remove_diacritics 2'
+            )
+            """,
+            f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_fts_ai AFTER INSERT ON {table} BEGIN
+                INSERT INTO {table}_fts(rowid, {cols}) VALUES (new.{id_column}, {new_cols});
+            END
+            """,
+            f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_fts_ad AFTER DELETE ON {table} BEGIN
+                INSERT INTO {table}_fts({table}_fts, rowid, {cols})
+                VALUES ('delete', old.{id_column}, {old_cols});
+            END
+            """,
+            f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_fts_au AFTER UPDATE OF {cols} ON {table}
+            BEGIN
+                INSERT INTO {table}_fts({table}_fts, rowid, {cols})
+                VALUES ('delete', old.{id_column}, {old_cols});
+                INSERT INTO {table}_fts(rowid, {cols}) VALUES (new.{id_column}, {new_cols});
+            END
+            """,
+            f"INSERT INTO {table}_fts({table}_fts) VALUES ('rebuild')",
+        )
+        for statement in statements:
+            conn.execute(statement)
+
+
+# How one transacoes row counts towards its client's saldos_clientes row
+_OPEN = "CASE WHEN {t}.estado = 'aberto' THEN {t}.valor_aberto ELSE 0 END"
+_IS_OPEN = "({t}.estado = 'aberto')"
+_REVENUE = (
+    "CASE WHEN {t}.tipo = 'V' AND {t}.estado != 'cancelado' THEN {t}.valor_total ELSE 0 END"
+)
+_PURCHASE_DATE = "CASE WHEN {t}.estado != 'cancelado' THEN {t}.data END"
+
+
+def _add_to_client_balance(t: str) -> str:
+    return f"""
+        INSERT INTO saldos_clientes
+            (id_cliente, saldo_aberto, pedidos_abertos, ultima_compra, receita_total)
+        SELECT
+            {t}.id_cliente,
+            {_OPEN.format(t=t)},
+            {_IS_OPEN.format(t=t)},
+            {_PURCHASE_DATE.format(t=t)},
+            {_REVENUE.format(t=t)}
+        WHERE {t}.id_cliente IS NOT NULL
+        ON CONFLICT(id_cliente) DO UPDATE SET
+            saldo_aberto = saldo_aberto + excluded.saldo_aberto,
+            pedidos_abertos = pedidos_abertos + excluded.pedidos_abertos,
+            ultima_compra = nullif(max(
+                coalesce(ultima_compra, ''), coalesce(excluded.ultima_compra, '')
+            ), ''),
+            receita_total = receita_total + excluded.receita_total;
+    """
+
+
+# Per-client receivables summary kept current by triggers. Deleting a
+# transaction (archiving) only releases its open balance: lifetime revenue
+# and last purchase keep counting history.
+_CLIENT_BALANCES = [
+    """
+    CREATE TABLE IF NOT EXISTS saldos_clientes (
+        id_cliente INTEGER PRIMARY KEY,
+        saldo_aberto REAL NOT NULL DEFAULT 0,
+        pedidos_abertos INTEGER NOT NULL DEFAULT 0,
+        ultima_compra TEXT,
+        receita_total REAL NOT NULL DEFAULT 0,
+        ultimo_pagamento TEXT,
+        FOREIGN KEY(id_cliente) REFERENCES clientes(id_cliente)
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS transacoes_saldo_ai AFTER INSERT ON transacoes
+    BEGIN
+        {_add_to_client_balance("NEW")}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS transacoes_saldo_au AFTER UPDATE ON transacoes
+    BEGIN
+        UPDATE saldos_clientes SET
+            saldo_aberto = saldo_aberto - {_OPEN.format(t="OLD")},
+            pedidos_abertos = pedidos_abertos - {_IS_OPEN.format(t="OLD")},
+            receita_total = receita_total - {_REVENUE.format(t="OLD")},
+            ultima_compra = (
+                SELECT max(data) FROM transacoes
+                WHERE id_cliente = OLD.id_cliente AND estado != 'cancelado'
+                AND id_transacao != NEW.id_transacao
+            )
+        WHERE id_cliente = OLD.id_cliente;
+
+        {_add_to_client_balance("NEW")}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS transacoes_saldo_ad AFTER DELETE ON transacoes
+    WHEN OLD.id_cliente IS NOT NULL
+    BEGIN
+        UPDATE saldos_clientes SET
+            saldo_aberto = saldo_aberto - {_OPEN.format(t="OLD")},
+            pedidos_abertos = pedidos_abertos - {_IS_OPEN.format(t="OLD")}
+        WHERE id_cliente = OLD.id_cliente;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS pagamentos_saldo_ai AFTER INSERT ON pagamentos
+    BEGIN
+        UPDATE saldos_clientes
+        SET ultimo_pagamento = max(coalesce(ultimo_pagamento, ''), NEW.data)
+        WHERE id_cliente = (
+            SELECT id_cliente FROM transacoes WHERE id_transacao = NEW.id_transacao
+        );
+    END
+    """,
+    # backfill
+    "DELETE FROM saldos_clientes",
+    f"""
+    INSERT INTO saldos_clientes
+    SELECT
+        t.id_cliente,
+        sum({_OPEN.format(t="t")}),
+        sum({_IS_OPEN.format(t="t")}),
+        max({_PURCHASE_DATE.format(t="t")}),
+        sum({_REVENUE.format(t="t")}),
+        (
+            SELECT max(p.data) FROM pagamentos p
+            JOIN transacoes pt ON pt.id_transacao = p.id_transacao
+            WHERE pt.id_cliente = t.id_cliente
+        )
+    FROM transacoes t
+    WHERE t.id_cliente IS NOT NULL
+    GROUP BY t.id_cliente
+    """,
+]
+
+
+# Append-only stock ledger. Every production, sale and adjustment is a
+# signed movement; produtos.estoque_atual is only a running total kept by the
+# trigger. Snapshots store the stock at a date plus the last movement they
+# include, so "stock on date X" = latest snapshot + later movements.
+_STOCK_LEDGER = [
+    """
+    CREATE TABLE IF NOT EXISTS movimentos_estoque (
+        id_movimento INTEGER PRIMARY KEY AUTOINCREMENT,
+        id_produto INTEGER NOT NULL,
+        data TEXT NOT NULL,
+        tipo TEXT NOT NULL CHECK(tipo IN ("producao","venda","ajuste")),
+        quantidade INTEGER NOT NULL,
+        id_origem INTEGER,
+        criado_em DEFAULT (datetime('now')),
+        FOREIGN KEY(id_produto) REFERENCES produtos(id_produto)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_movimentos_estoque_produto_data "
+    "ON movimentos_estoque(id_produto, data)",
+    """
+    CREATE TABLE IF NOT EXISTS snapshots_estoque (
+        id_snapshot INTEGER PRIMARY KEY AUTOINCREMENT,
+        id_produto INTEGER NOT NULL,
+        data TEXT NOT NULL,
+        estoque INTEGER NOT NULL,
+        id_ultimo_movimento INTEGER NOT NULL,
+        FOREIGN KEY(id_produto) REFERENCES produtos(id_produto)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_snapshots_estoque_produto_data "
+    "ON snapshots_estoque(id_produto, data)",
+    """
+    CREATE TRIGGER IF NOT EXISTS movimentos_estoque_ai AFTER INSERT ON movimentos_estoque
+    BEGIN
+        UPDATE produtos SET estoque_atual = estoque_atual + NEW.quantidade
+        WHERE id_produto = NEW.id_produto;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS movimentos_estoque_bu BEFORE UPDATE ON movimentos_estoque
+    BEGIN
+        SELECT RAISE(ABORT, 'movimentos_estoque aceita apenas inserções');
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS movimentos_estoque_bd BEFORE DELETE ON movimentos_estoque
+    BEGIN
+        SELECT RAISE(ABORT, 'movimentos_estoque aceita apenas inserções');
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS producoes_estoque_ai AFTER INSERT ON producoes
+    BEGIN
+        INSERT INTO movimentos_estoque (id_produto, data, tipo, quantidade, id_origem)
+        VALUES (NEW.id_produto, NEW.data, 'producao', NEW.quantidade, NEW.id_producao);
+    END
+    """,
+    # an edited production is reverted and registered again
+    """
+    CREATE TRIGGER IF NOT EXISTS producoes_estoque_au
+    AFTER UPDATE OF id_produto, data, quantidade ON producoes
+    BEGIN
+        INSERT INTO movimentos_estoque (id_produto, data, tipo, quantidade, id_origem)
+        VALUES
+            (OLD.id_produto, OLD.data, 'producao', -OLD.quantidade, OLD.id_producao),
+            (NEW.id_produto, NEW.data, 'producao', NEW.quantidade, NEW.id_producao);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS producoes_estoque_ad AFTER DELETE ON producoes
+    BEGIN
+        INSERT INTO movimentos_estoque (id_produto, data, tipo, quantidade, id_origem)
+        VALUES (OLD.id_produto, OLD.data, 'producao', -OLD.quantidade, OLD.id_producao);
+    END
+    """,
+    # no history before the ledger: start from the current stock
+    """
+    INSERT INTO snapshots_estoque (id_produto, data, estoque, id_ultimo_movimento)
+    SELECT id_produto, date('now', 'localtime'), estoque_atual, 0 FROM produtos
+    """,
+]
+
+
+# Last purchase of each client among its archived transactions (written by
+# archive.delete_copied): triggers can't read the attached archive, so the
+# ultima_compra recompute takes the max of this and the hot rows.
+_ARCHIVED_PURCHASES = [
+    """
+    CREATE TABLE IF NOT EXISTS compras_arquivadas (
+        id_cliente INTEGER PRIMARY KEY,
+        ultima_compra TEXT NOT NULL,
+        FOREIGN KEY(id_cliente) REFERENCES clientes(id_cliente)
+    )
+    """,
+    # dbs archived before this table existed: a last purchase older than the
+    # cutoff is the best known bound
+    """
+    INSERT OR IGNORE INTO compras_arquivadas (id_cliente, ultima_compra)
+    SELECT id_cliente, ultima_compra FROM saldos_clientes
+    WHERE ultima_compra < (SELECT data_corte FROM arquivo_transacoes)
+    """,
+    "DROP TRIGGER IF EXISTS transacoes_saldo_au",
+    f"""
+    CREATE TRIGGER transacoes_saldo_au AFTER UPDATE ON transacoes
+    BEGIN
+        UPDATE saldos_clientes SET
+            saldo_aberto = saldo_aberto - {_OPEN.format(t="OLD")},
+            pedidos_abertos = pedidos_abertos - {_IS_OPEN.format(t="OLD")},
+            receita_total = receita_total - {_REVENUE.format(t="OLD")},
+            ultima_compra = (
+                SELECT max(data) FROM (
+                    SELECT max(data) AS data FROM transacoes
+                    WHERE id_cliente = OLD.id_cliente AND estado != 'cancelado'
+                    AND id_transacao != NEW.id_transacao
+                    UNION ALL
+                    SELECT ultima_compra FROM compras_arquivadas
+                    WHERE id_cliente = OLD.id_cliente
+                )
+            )
+        WHERE id_cliente = OLD.id_cliente;
+
+        {_add_to_client_balance("NEW")}
+    END
+    """,
+]
+
+
+# Numbered migrations, applied once and in order. `PRAGMA user_version` holds
+# the last applied number. Steps are SQL strings or callables taking the
+# connection, and must be idempotent (IF NOT EXISTS...) so a db created before
+# this versioning existed can go through them safely.
+MIGRATIONS: dict[int, list[str | Callable[[sqlite3.Connection], None]]] = {
+    # secondary indexes for FKs and filter columns
+    1: [
+        "CREATE INDEX IF NOT EXISTS idx_itens_transacao_transacao "
+        "ON itens_transacao(id_transacao)",
+        "CREATE INDEX IF NOT EXISTS idx_itens_transacao_produto "
+        "ON itens_transacao(id_produto)",
+        "CREATE INDEX IF NOT EXISTS idx_pagamentos_transacao "
+        "ON pagamentos(id_transacao)",
+        "CREATE INDEX IF NOT EXISTS idx_transacoes_cliente ON transacoes(id_cliente)",
+        "CREATE INDEX IF NOT EXISTS idx_transacoes_data ON transacoes(data)",
+        "CREATE INDEX IF NOT EXISTS idx_producoes_produto ON producoes(id_produto)",
+        "CREATE INDEX IF NOT EXISTS idx_produtos_tipo ON produtos(tipo)",
+    ],
+    # full-text search for produtos and clientes
+    2: [_create_search_index],
+    # materialized client balances
+    3: _CLIENT_BALANCES,
+    # transaction search by client and date; the composite index replaces
+    # the id_cliente one (same leading column)
+    4: [
+        "CREATE INDEX IF NOT EXISTS idx_transacoes_cliente_data "
+        "ON transacoes(id_cliente, data)",
+        "DROP INDEX IF EXISTS idx_transacoes_cliente",
+    ],
+    # covering indexes for the sales reports, replacing the narrower ones
+    # with the same leading column
+    5: [
+        "CREATE INDEX IF NOT EXISTS idx_transacoes_data_tipo_estado "
+        "ON transacoes(data, tipo, estado)",
+        "DROP INDEX IF EXISTS idx_transacoes_data",
+        "CREATE INDEX IF NOT EXISTS idx_itens_transacao_venda "
+        "ON itens_transacao(id_transacao, id_produto, quantidade, valor_unitario)",
+        "DROP INDEX IF EXISTS idx_itens_transacao_transacao",
+    ],
+    # stock ledger and snapshots
+    6: _STOCK_LEDGER,
+    # exact-name lookups/uniqueness checks of clients (produtos.nome is UNIQUE)
+    7: ["CREATE INDEX IF NOT EXISTS idx_clientes_nome ON clientes(nome)"],
+    # where old transactions were archived and up to which date (see data.archive)
+    8: [
+        """
+        CREATE TABLE IF NOT EXISTS arquivo_transacoes (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            caminho TEXT NOT NULL,
+            data_corte TEXT NOT NULL,
+            atualizado_em DEFAULT (datetime('now'))
+        )
+        """,
+    ],
+    # last purchases that left with the archive
+    9: _ARCHIVED_PURCHASES,
+}
+LATEST_VERSION = max(MIGRATIONS)
+
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def ensure_search_index(conn: sqlite3.Connection) -> bool:
+    """
+    Whether the FTS index exists, building it first if migration 2 ran on a
+    SQLite without FTS5 and this one has it (the version had moved on).
+    """
+    if not fts5_available(conn):
+        return False
+    present = conn.execute(
+        "SELECT count(*) FROM sqlite_master WHERE name IN ('produtos_fts', 'clientes_fts')"
+    ).fetchone()[0]
+    if present == 2:
+        return True
+
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        _create_search_index(conn)
+    except Exception:
+        conn.rollback()
+        raise
+    conn.commit()
+    return True
+
+
+def migrate(conn: sqlite3.Connection, schema: dict[str, list[str]]) -> int:
+    """
+    Bring the db up to LATEST_VERSION and return the version it ended on.
+    \nWhen the db is already current this is a single PRAGMA read, no DDL.
+    """
+    if get_schema_version(conn) >= LATEST_VERSION:
+        return LATEST_VERSION
+
+    for number in range(get_schema_version(conn) + 1, LATEST_VERSION + 1):
+        statements = MIGRATIONS.get(number, [])
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # another process may have migrated while we waited for the lock
+            if get_schema_version(conn) >= number:
+                conn.rollback()
+                continue
+
+            # the base tables come with the first migration
+            if number == 1:
+                for table, columns in schema.items():
+                    conn.execute(
+                        f"CREATE TABLE IF NOT EXISTS {table} ({','.join(columns)})"
+                    )
+            for step in statements:
+                if callable(step):
+                    step(conn)
+                else:
+                    conn.execute(step)
+
+            conn.execute(f"PRAGMA user_version = {number}")
+        except Exception:
+            conn.rollback()
+            raise
+        conn.commit()
+
+    return get_schema_version(conn)
@@ -0,0 +1,54 @@
+from functools import partial
+from operator import itemgetter
+from typing import Callable, Iterable
+from data.table_classes import DataBaseTables, TableColumn
+
+
+class Record(tuple):
+    """
+    Base of the per-table row classes built by `make_record_class`.
+    \nA plain tuple underneath (no per-row dict), readable by attribute,
+    by index or by column name like sqlite3.Row.
+    """
+
+    __slots__ = ()
+
+    _table: DataBaseTables = None
+    _fields: tuple[TableColumn, ...] = ()
+    _index: dict[TableColumn, int] = {}
+    # tuple -> record without a Python frame per row (set by make_record_class)
+    _make: Callable[[tuple], "Record"]
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[tuple]) -> list["Record"]:
+        return list(map(cls._make, rows))
+
+    def __getitem__(self, key):
+        if key.__class__ is str:
+            return tuple.__getitem__(self, self._index[key])
+        return tuple.__getitem__(self, key)
+
+    def keys(self) -> list[TableColumn]:
+        return list(self._fields)
+
+    def as_dict(self) -> dict:
+        """Column -> value, i.e. the table's *Info TypedDict"""
+        return dict(zip(self._fields, self))
+
+    def __repr__(self):
+        values = ", ".join(f"{f}={v!r}" for f, v in zip(self._fields, self))
+        return f"{type(self).__name__}({values})"
+
+
+def make_record_class(table: DataBaseTables, columns: list[TableColumn]) -> type[Record]:
+    """Record subclass of `table` with one read-only property per column"""
+    namespace = {
+        "__slots__": (),
+        "_table": table,
+        "_fields": tuple(columns),
+        "_index": {column: i for i, column in enumerate(columns)},
+        **{column: property(itemgetter(i)) for i, column in enumerate(columns)},
+    }
+    record_class = type(f"{table.title().replace('_', '')}Record", (Record,), namespace)
+    record_class._make = partial(tuple.__new__, record_class)
+    return record_class
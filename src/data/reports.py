@@ -0,0 +1,139 @@
+import datetime
+from data.db_manager import DbManager
+from typing import Literal
+
+Bucket = Literal["day", "week", "month"]
+
+# sale lines in the period: revenue from the item price, cost from the
+# product's current production price
+_SALES_CTE = """
+    WITH vendas AS (
+        SELECT
+            t.data,
+            t.id_cliente,
+            i.id_produto,
+            p.tipo,
+            i.quantidade,
+            i.quantidade * i.valor_unitario AS receita,
+            i.quantidade * p.preco_producao AS custo
+        FROM {transacoes} t
+        JOIN {itens_transacao} i ON i.id_transacao = t.id_transacao
+        JOIN produtos p ON p.id_produto = i.id_produto
+        WHERE t.tipo = 'V' AND t.estado != 'cancelado'
+        AND t.data >= :start_date AND t.data <= :end_date
+    )
+"""
+_TOTALS = """
+    sum(quantidade) AS quantidade,
+    round(sum(receita), 2) AS receita,
+    round(sum(custo), 2) AS custo,
+    round(sum(receita) - sum(custo), 2) AS margem
+"""
+_BUCKETS: dict[Bucket, str] = {
+    "day": "data",
+    "week": "strftime('%Y-W%W', data)",
+    "month": "strftime('%Y-%m', data)",
+}
+
+
+class SalesReport:
+    """
+    Sales aggregates computed in SQL (sales = "V" transactions not cancelled).
+    \nEvery method returns plain tuples. Dates are inclusive "YYYY-MM-DD",
+    None means unbounded.
+    """
+
+    def __init__(self, dbm: DbManager):
+        self.dbm = dbm
+
+    def by_product(self, start_date=None, end_date=None) -> list[tuple]:
+        """(id_produto, nome, quantidade, receita, custo, margem, participacao)"""
+        return self._query(
+            f"""
+            SELECT
+                vendas.id_produto,
+                produtos.nome,
+                {_TOTALS},
+                round(sum(receita) / sum(sum(receita)) OVER (), 4) AS participacao
+            FROM vendas
+            JOIN produtos ON produtos.id_produto = vendas.id_produto
+            GROUP BY vendas.id_produto
+            ORDER BY receita DESC
+            """,
+            start_date, end_date
+        )
+
+    def by_client(self, start_date=None, end_date=None) -> list[tuple]:
+        """(id_cliente, nome, quantidade, receita, custo, margem, participacao)"""
+        return self._query(
+            f"""
+            SELECT
+                vendas.id_cliente,
+                clientes.nome,
+                {_TOTALS},
+                round(sum(receita) / sum(sum(receita)) OVER (), 4) AS participacao
+            FROM vendas
+            LEFT JOIN clientes ON clientes.id_cliente = vendas.id_cliente
+            GROUP BY vendas.id_cliente
+            ORDER BY receita DESC
+            """,
+            start_date, end_date
+        )
+
+    def by_product_type(self, start_date=None, end_date=None) -> list[tuple]:
+        """(tipo, quantidade, receita, custo, margem, participacao)"""
+        return self._query(
+            f"""
+            SELECT
+                tipo,
+                {_TOTALS},
+                round(sum(receita) / sum(sum(receita)) OVER (), 4) AS participacao
+            FROM vendas
+            GROUP BY tipo
+            ORDER BY receita DESC
+            """,
+            start_date, end_date
+        )
+
+    def by_period(
+        self, bucket: Bucket = "month", start_date=None, end_date=None
+    ) -> list[tuple]:
+        """(periodo, quantidade, receita, custo, margem, receita_acumulada, margem_acumulada)"""
+        if bucket not in _BUCKETS:
+            raise ValueError(f"Período inválido: {bucket}. Use um de {list(_BUCKETS)}")
+
+        return self._query(
+            f"""
+            SELECT
+                {_BUCKETS[bucket]} AS periodo,
+                {_TOTALS},
+                round(sum(sum(receita)) OVER (ORDER BY {_BUCKETS[bucket]}), 2),
+                round(sum(sum(receita) - sum(custo)) OVER (ORDER BY {_BUCKETS[bucket]}), 2)
+            FROM vendas
+            GROUP BY periodo
+            ORDER BY periodo
+            """,
+            start_date, end_date
+        )
+
+    # ↓ HELPERS ↓
+
+    def _query(
+        self,
+        select: str,
+        start_date: str | datetime.date | None,
+        end_date: str | datetime.date | None,
+    ) -> list[tuple]:
+        with self.dbm.db.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = None  # plain tuples
+            # archived sales are included when the period reaches them
+            sources = self.dbm.db.transaction_sources(cursor, start_date)
+            cursor.execute(
+                _SALES_CTE.format(**sources) + select,
+                {
+                    "start_date": str(start_date) if start_date else "",
+                    "end_date": str(end_date) if end_date else "9999-12-31",
+                }
+            )
+            return cursor.fetchall()
@@ -0,0 +1,119 @@
+import sqlite3
+import threading
+from data.table_classes import DataBaseTables, TableColumn
+from typing import Literal
+
+Operation = Literal["by_id", "by_name", "all", "like", "fts", "balance"]
+
+
+class StatementRegistry:
+    """
+    SQL text of every (operation, table) pair, built once from the schema.
+    \nReusing the exact same text lets sqlite3's per-connection statement cache
+    skip re-preparing it. The sqlite3 module doesn't expose that cache, so
+    what is counted here is the first use of each registered statement on a
+    connection versus its reuses: an upper bound of the real cache hits
+    (STATEMENT_CACHE_SIZE is sized so nothing registered gets evicted).
+    """
+
+    def __init__(self, schema: dict[str, list[str]]):
+        self.columns: dict[DataBaseTables, list[TableColumn]] = {
+            table: [
+                definition.split()[0] for definition in definitions
+                if not definition.startswith("FOREIGN KEY")
+            ]
+            for table, definitions in schema.items()
+        }
+        self.id_columns = {table: cols[0] for table, cols in self.columns.items()}
+
+        self._statements: dict[tuple[Operation, DataBaseTables], str] = {}
+        for table, id_column in self.id_columns.items():
+            self._statements["by_id", table] = (
+                f"SELECT * FROM {table} WHERE {id_column} = :row_id"
+            )
+            self._statements["all", table] = f"SELECT * FROM {table}"
+
+        for table, search_columns in (
+            ("produtos", ("nome", "tipo")), ("clientes", ("nome",))
+        ):
+            like = " OR ".join(f"{column} LIKE :term" for column in search_columns)
+            self._statements["by_name", table] = (
+                f"SELECT * FROM {table} WHERE nome = :name"
+            )
+            # both pages by keyset: rows after :after_id in the same order
+            self._statements["like", table] = f"""
+                SELECT * FROM {table}
+                WHERE ({like}) AND {table}.rowid > coalesce(:after_id, 0)
+                ORDER BY {table}.rowid
+                LIMIT :limit
+            """
+            self._statements["fts", table] = f"""
+                WITH hits AS (
+                    SELECT rowid AS id, rank AS score FROM {table}_fts
+                    WHERE {table}_fts MATCH :match
+                )
+                SELECT {table}.* FROM hits
+                JOIN {table} ON {table}.rowid = hits.id
+                WHERE :after_id IS NULL
+                   OR (hits.score, hits.id) > (SELECT score, id FROM hits WHERE id = :after_id)
+                ORDER BY hits.score, hits.id
+                LIMIT :limit
+            """
+
+        self._statements["balance", "clientes"] = (
+            "SELECT * FROM saldos_clientes WHERE id_cliente = :row_id"
+        )
+
+        self._lock = threading.Lock()
+        self.first_uses = 0
+        self.reuses = 0
+
+    def __len__(self):
+        return len(self._statements)
+
+    def get(self, operation: Operation, table: DataBaseTables) -> str:
+        try:
+            return self._statements[operation, table]
+        except KeyError:
+            raise ValueError(
+                f"Operação '{operation}' inválida para a tabela '{table}'"
+            ) from None
+
+    def execute(
+        self,
+        cursor: sqlite3.Cursor,
+        operation: Operation,
+        table: DataBaseTables,
+        params: dict = None,
+    ) -> sqlite3.Cursor:
+        """Execute the registered statement, counting its first use/reuse"""
+        sql = self.get(operation, table)
+
+        prepared = getattr(cursor.connection, "prepared_statements", None)
+        if prepared is not None:
+            with self._lock:
+                if sql in prepared:
+                    self.reuses += 1
+                else:
+                    self.first_uses += 1
+                    prepared.add(sql)
+
+        return cursor.execute(sql, params or {})
+
+    def check_columns(self, table: DataBaseTables, columns) -> None:
+        """Raise ValueError if `table` or any of `columns` isn't in the schema"""
+        if table not in self.columns:
+            raise ValueError(f"Tabela inválida: {table}")
+        if unknown := set(columns) - set(self.columns[table]):
+            raise ValueError(f"Colunas inválidas para {table}: {sorted(unknown)}")
+
+    def stats(self) -> dict[str, int | float]:
+        with self._lock:
+            first_uses, reuses = self.first_uses, self.reuses
+        uses = first_uses + reuses
+        return {
+            "statements": len(self),
+            "first_uses": first_uses,
+            "reuses": reuses,
+            "reuse_rate": reuses / uses if uses else 0.0,
+        }
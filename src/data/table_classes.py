@@ -1,4 +1,5 @@
-from typing import TypedDict, TypeAlias, Literal
+from typing import TypedDict, TypeAlias, Literal, NotRequired
+import datetime
 
 
 class Item(TypedDict):
@@ -7,6 +8,14 @@ class Item(TypedDict):
     unit_value: float
 
 
+class TransactionData(TypedDict):
+    client_id: int
+    t_type: Literal["P", "V"]
+    items: list[Item]
+    date: NotRequired[str | datetime.date]
+    payment: NotRequired[float]
+
+
 TableColumn: TypeAlias = str
 DataBaseTables: TypeAlias = Literal[
     "produtos", "clientes", "transacoes",
@@ -38,4 +47,13 @@ class ClientInfo(TypedDict):
     id_cliente: int
     nome: str
     contato: str
-    ativo: int
\ No newline at end of file
+    ativo: int
+    saldo_aberto: NotRequired[float]
+
+class ClientBalance(TypedDict):
+    id_cliente: int
+    saldo_aberto: float
+    pedidos_abertos: int
+    ultima_compra: str | None
+    receita_total: float
+    ultimo_pagamento: str | None
\ No newline at end of file
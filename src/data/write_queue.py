@@ -0,0 +1,129 @@
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from queue import SimpleQueue, Empty
+from typing import Callable, TypeVar, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from data.database import MassesDatabase
+
+T = TypeVar("T")
+# a write operation gets the batch's cursor and returns its result (e.g. ids)
+Operation = Callable[[sqlite3.Cursor], T]
+
+
+class WriteQueue:
+    """
+    Single writer thread that group-commits queued write operations.
+    \nEverything queued while the previous batch was committing, plus what
+    arrives within `window` seconds (up to `max_batch`), shares one db
+    transaction and so one commit/fsync. Each operation runs inside its own
+    SAVEPOINT: one that raises is rolled back alone and its future gets the
+    error, the others still commit. Futures get their results only after
+    the commit.
+    """
+
+    def __init__(self, db: "MassesDatabase", window: float = 0.0, max_batch: int = 256):
+        if max_batch < 1:
+            raise ValueError("O lote deve ter ao menos uma operação")
+
+        self.db = db
+        self.window = window
+        self.max_batch = max_batch
+
+        self._queue: SimpleQueue[tuple[Operation, Future] | None] = SimpleQueue()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._batches = 0
+        self._operations = 0
+        self._failed = 0
+
+        self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, operation: Operation) -> Future:
+        """Queue `operation`; the future resolves after its batch commits"""
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Fila de escrita fechada")
+            self._queue.put((operation, future))
+        return future
+
+    def close(self, wait: bool = True):
+        """Stop accepting writes; the ones already queued are still committed"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(None)
+        if wait:
+            self._thread.join()
+
+    def stats(self) -> dict[str, int | float]:
+        return {
+            "batches": self._batches,
+            "operations": self._operations,
+            "failed": self._failed,
+            "per_batch": self._operations / self._batches if self._batches else 0.0,
+        }
+
+    # ↓ WRITER THREAD ↓
+
+    def _run(self):
+        while (first := self._queue.get()) is not None:
+            batch, stop = self._collect(first)
+            self._commit(batch)
+            if stop:
+                break
+
+    def _collect(self, first: tuple[Operation, Future]) -> tuple[list, bool]:
+        """The batch started by `first`, and whether close() was seen"""
+        batch = [first]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch:
+            try:
+                item = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+            except Empty:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _commit(self, batch: list[tuple[Operation, Future]]):
+        done: list[tuple[Future, object]] = []
+        try:
+            with self.db.get_connection() as conn:
+                # IMMEDIATE: take the write lock now instead of upgrading mid-batch
+                if not conn.in_transaction:
+                    conn.execute("BEGIN IMMEDIATE")
+                cursor = conn.cursor()
+                for operation, future in batch:
+                    if not future.set_running_or_notify_cancel():
+                        continue
+                    cursor.execute("SAVEPOINT operacao")
+                    try:
+                        result = operation(cursor)
+                    except Exception as e:
+                        cursor.execute("ROLLBACK TO operacao")
+                        cursor.execute("RELEASE operacao")
+                        self._failed += 1
+                        future.set_exception(e)
+                    else:
+                        cursor.execute("RELEASE operacao")
+                        done.append((future, result))
+        except Exception as e:
+            # BEGIN/COMMIT failed or SQLite dropped the transaction: nothing was saved
+            for _, future in batch:
+                if not future.done():
+                    self._failed += 1
+                    future.set_exception(e)
+            return
+        finally:
+            self._batches += 1
+            self._operations += len(batch)
+
+        for future, result in done:
+            future.set_result(result)
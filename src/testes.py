@@ -1,21 +1,21 @@
-from data.database import MassesDatabase
-from data.db_manager import DbManager
+from application.shared import shared_layer
 from ui.interface import UI
-from application.app import App
 import flet as ft
 
 
+# one data layer for the whole process: every session (browser tab in web
+# mode) shares its schema check, connection pool, caches and db executor
+data_layer = shared_layer("..\\database\\masses.db")
 
-def main(page: ft.Page):
-    memory_db = MassesDatabase("..\\database\\masses.db")
-    db_manager = DbManager(memory_db)
-    
+
+async def main(page: ft.Page):
     page.horizontal_alignment = ft.CrossAxisAlignment.CENTER
     page.snack_bar = ft.SnackBar(content=ft.Text("", size=20), duration=1000)
+    page.on_disconnect = data_layer.close_session
 
-    ui = UI(App(db_manager))
+    ui = UI(data_layer.open_session())
     page.add(ui)
-    ui.start()
+    await ui.start()
 
 
 ft.app(target=main)
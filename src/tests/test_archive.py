@@ -0,0 +1,109 @@
+"""Run from `src`: python -m unittest discover tests"""
+import os
+import tempfile
+import unittest
+from data import archive
+from data.database import MassesDatabase
+from data.db_manager import DbManager
+
+CUTOFF = "2024-01-10"
+
+
+class ArchiveTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.archive_path = os.path.join(self.directory.name, "arquivo.db")
+        self.db = MassesDatabase(None, pool_size=1)
+        self.dbm = DbManager(self.db)
+
+        self.clients = [self.dbm.add_client(name) for name in ("Ana", "Bruno")]
+        self.products = [
+            self.dbm.add_product(name, "massa", 5, 10, 0, 500) for name in ("Nhoque", "Talharim")
+        ]
+        for day in range(1, 21):
+            client = self.clients[day % 2]
+            items = [{"item_id": self.products[day % 2], "item_amount": day, "unit_value": 10}]
+            # every third sale stays open (partly paid): those are never archived
+            payment = 10 * day if day % 3 else 5
+            self.dbm.register_transaction(client, "V", items, f"2024-01-{day:02}", payment)
+            self.dbm.register_production(self.products[0], 3, f"2024-01-{day:02}")
+
+    def tearDown(self):
+        self.db.close()
+        self.directory.cleanup()
+
+    def reports(self) -> dict:
+        """Everything a user can read about the transactions"""
+        def rows(result): return [dict(row) for row in result]
+        return {
+            "saldos": self.dbm.get_client_balances(self.clients),
+            "todas": rows(self.dbm.search_transactions(limit=1000)),
+            "por_cliente": [
+                rows(self.dbm.search_transactions(client_id=c, limit=1000)) for c in self.clients
+            ],
+            "antes_do_corte": rows(self.dbm.search_transactions(end_date="2024-01-09", limit=1000)),
+            "periodo": rows(self.dbm.search_transactions(
+                start_date="2024-01-05", end_date="2024-01-15", t_type="V", limit=1000
+            )),
+            "estoque": [self.dbm.get_stock_on(f"2024-01-{day:02}") for day in (1, 9, 10, 20)],
+        }
+
+    def main_count(self) -> int:
+        with self.db.get_connection() as conn:
+            return conn.execute("SELECT count(*) FROM main.transacoes").fetchone()[0]
+
+    def test_archiving_keeps_balances_and_reports(self):
+        before = self.reports()
+
+        moved = self.dbm.archive_transactions(CUTOFF, self.archive_path)
+
+        # days 1-9 minus the open ones (3, 6, 9)
+        self.assertEqual(moved, 6)
+        self.assertEqual(self.main_count(), 20 - moved)
+        self.assertEqual(self.reports(), before)
+
+    def test_copy_left_by_an_interrupted_run_is_harmless(self):
+        before = self.reports()
+
+        # a run that crashed between copying a batch and deleting it
+        with self.db.get_connection() as conn:
+            conn.commit()
+            self.db.attach_archive(conn, self.archive_path)
+            archive.copy_batch(conn.cursor(), CUTOFF, 0, 2)
+        self.assertEqual(self.main_count(), 20)
+
+        self.assertEqual(self.dbm.archive_transactions(CUTOFF, self.archive_path), 6)
+        self.assertEqual(self.dbm.archive_transactions(CUTOFF, self.archive_path), 0)
+        self.assertEqual(self.reports(), before)
+
+    def test_last_purchase_survives_a_payment_after_archiving(self):
+        client = self.dbm.add_client("Carla")
+        item = [{"item_id": self.products[0], "item_amount": 1, "unit_value": 10}]
+        open_sale = self.dbm.register_transaction(client, "V", item, "2024-01-02", 0)
+        self.dbm.register_transaction(client, "V", item, "2024-01-08", 10)
+        self.dbm.archive_transactions(CUTOFF, self.archive_path)
+
+        # the update trigger recomputes ultima_compra: the archived sale counts
+        self.dbm.register_payment(open_sale, 10)
+        balance = self.dbm.get_client_balance(client)
+        self.assertEqual(balance["ultima_compra"], "2024-01-08")
+        self.assertEqual(balance["saldo_aberto"], 0)
+
+    def test_refuses_another_archive_file(self):
+        self.dbm.archive_transactions("2024-01-05", self.archive_path)
+        other_path = os.path.join(self.directory.name, "outro.db")
+
+        with self.assertRaises(ValueError):
+            self.dbm.archive_transactions(CUTOFF, other_path)
+        self.assertFalse(os.path.exists(other_path))
+        self.assertEqual(self.db.archive_path, self.archive_path)
+
+    def test_refuses_to_run_inside_a_held_connection(self):
+        with self.db.get_connection():
+            with self.assertRaises(RuntimeError):
+                self.dbm.archive_transactions(CUTOFF, self.archive_path)
+        self.assertEqual(self.main_count(), 20)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+"""Run from `src`: python -m unittest discover tests"""
+import unittest
+from data.database import MassesDatabase
+from data.db_manager import DbManager
+
+
+class ClientBalancesTest(unittest.TestCase):
+    def setUp(self):
+        self.db = MassesDatabase(None, pool_size=1)
+        self.dbm = DbManager(self.db)
+        self.client = self.dbm.add_client("Ana")
+        self.product = self.dbm.add_product("Nhoque", "massa", 5, 10, 0, 100)
+
+    def tearDown(self):
+        self.db.close()
+
+    def register(self, amount: int, date: str, payment: float = 0, t_type: str = "V") -> int:
+        items = [{"item_id": self.product, "item_amount": amount, "unit_value": 10}]
+        return self.dbm.register_transaction(self.client, t_type, items, date, payment)
+
+    def balance(self) -> tuple:
+        balance = self.dbm.get_client_balance(self.client)
+        return (
+            balance["saldo_aberto"],
+            balance["pedidos_abertos"],
+            balance["ultima_compra"],
+            balance["receita_total"],
+            balance["ultimo_pagamento"],
+        )
+
+    def recomputed(self) -> tuple:
+        """The balance straight from transacoes/pagamentos, as the backfill does"""
+        with self.db.get_connection() as conn:
+            return tuple(conn.execute(
+                """
+                SELECT
+                    coalesce(sum(CASE WHEN estado = 'aberto' THEN valor_aberto END), 0),
+                    count(CASE WHEN estado = 'aberto' THEN 1 END),
+                    max(CASE WHEN estado != 'cancelado' THEN data END),
+                    coalesce(sum(CASE WHEN tipo = 'V' AND estado != 'cancelado'
+                        THEN valor_total END), 0),
+                    (SELECT max(p.data) FROM pagamentos p
+                     JOIN transacoes pt USING (id_transacao) WHERE pt.id_cliente = :client)
+                FROM transacoes WHERE id_cliente = :client
+                """,
+                {"client": self.client},
+            ).fetchone())
+
+    def test_client_without_transactions(self):
+        self.assertEqual(self.balance(), (0, 0, None, 0, None))
+
+    def test_sales_and_payments(self):
+        self.register(3, "2024-01-02", payment=10)
+        paid = self.register(2, "2024-01-05", payment=20)
+        self.assertEqual(self.balance(), (20, 1, "2024-01-05", 50, "2024-01-05"))
+
+        opened = self.register(4, "2024-01-07")
+        self.dbm.register_payment(opened, 15, "2024-01-08")
+        self.assertEqual(self.balance(), (45, 2, "2024-01-07", 90, "2024-01-08"))
+
+        # paying an already closed sale changes neither the balance nor revenue
+        self.dbm.register_payment(paid, 5, "2024-01-09")
+        self.assertEqual(self.balance(), (45, 2, "2024-01-07", 90, "2024-01-09"))
+        self.assertEqual(self.balance(), self.recomputed())
+
+    def test_orders_only_count_as_purchases(self):
+        self.register(3, "2024-01-02", t_type="P")
+        self.assertEqual(self.balance(), (30, 1, "2024-01-02", 0, None))
+        self.assertEqual(self.balance(), self.recomputed())
+
+    def test_cancelling_and_moving_a_sale(self):
+        self.register(3, "2024-01-02")
+        last = self.register(2, "2024-01-05")
+
+        with self.db.get_connection() as conn:
+            conn.execute(
+                "UPDATE transacoes SET estado = 'cancelado' WHERE id_transacao = ?", (last,)
+            )
+        self.assertEqual(self.balance(), (30, 1, "2024-01-02", 30, None))
+
+        with self.db.get_connection() as conn:
+            conn.execute(
+                "UPDATE transacoes SET estado = 'aberto', data = '2024-01-01' "
+                "WHERE id_transacao = ?",
+                (last,),
+            )
+        self.assertEqual(self.balance(), (50, 2, "2024-01-02", 50, None))
+        self.assertEqual(self.balance(), self.recomputed())
+
+    def test_moving_a_sale_to_another_client(self):
+        other = self.dbm.add_client("Bruno")
+        sale = self.register(3, "2024-01-02")
+
+        with self.db.get_connection() as conn:
+            conn.execute(
+                "UPDATE transacoes SET id_cliente = ? WHERE id_transacao = ?", (other, sale)
+            )
+
+        self.assertEqual(self.balance(), (0, 0, None, 0, None))
+        self.assertEqual(self.dbm.get_client_balance(other)["saldo_aberto"], 30)
+
+
+if __name__ == "__main__":
+    unittest.main()
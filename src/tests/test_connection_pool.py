@@ -0,0 +1,84 @@
+"""Run from `src`: python -m unittest discover tests"""
+import os
+import sqlite3
+import tempfile
+import unittest
+from contextlib import closing
+from data.connection_pool import ConnectionPool
+from data.database import MassesDatabase
+
+
+class ConnectionPoolTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, "pool.db")
+        with closing(sqlite3.connect(self.path)) as conn:
+            conn.execute("CREATE TABLE t (x INTEGER)")
+        self.pool = ConnectionPool(
+            lambda: sqlite3.connect(self.path, check_same_thread=False), size=2
+        )
+        self.addCleanup(self.pool.close)
+
+    def rows(self) -> list[int]:
+        with closing(sqlite3.connect(self.path)) as conn:
+            return [row[0] for row in conn.execute("SELECT x FROM t ORDER BY x")]
+
+    def test_nested_checkouts_share_the_outer_transaction(self):
+        with self.pool.connection() as outer:
+            outer.execute("INSERT INTO t VALUES (1)")
+            with self.pool.connection() as inner:
+                self.assertIs(inner, outer)
+                inner.execute("INSERT INTO t VALUES (2)")
+            self.assertTrue(outer.in_transaction)  # the inner block didn't commit
+            self.assertEqual(self.rows(), [])
+        self.assertEqual(self.rows(), [1, 2])
+
+        with self.assertRaises(ValueError):
+            with self.pool.connection() as outer:
+                outer.execute("INSERT INTO t VALUES (3)")
+                with self.pool.connection() as inner:
+                    inner.execute("INSERT INTO t VALUES (4)")
+                raise ValueError
+        self.assertEqual(self.rows(), [1, 2])
+        self.assertIsNone(self.pool.held_connection())
+
+    def test_broken_connection_is_replaced_after_its_error(self):
+        with self.pool.connection() as conn:
+            pass
+        conn.close()
+
+        with self.assertRaises(sqlite3.ProgrammingError):
+            with self.pool.connection() as same:
+                same.execute("SELECT 1")
+        with self.pool.connection() as replacement:
+            self.assertIsNot(replacement, conn)
+            replacement.execute("INSERT INTO t VALUES (1)")
+        self.assertEqual(self.rows(), [1])
+        self.assertEqual(self.pool.stats()["created"], 1)
+
+    def test_unreplaceable_connection_is_never_discarded(self):
+        # what MassesDatabase does for ":memory:": a new connection would be empty
+        db = MassesDatabase(None)
+        self.assertFalse(db.pool.replaceable)
+        db.close()
+
+        pool = ConnectionPool(
+            lambda: sqlite3.connect(":memory:", check_same_thread=False),
+            size=1,
+            replaceable=False,
+        )
+        with pool.connection() as conn:
+            pass
+        conn.close()
+
+        for _ in range(2):
+            with self.assertRaises(sqlite3.ProgrammingError):
+                with pool.connection():
+                    pass
+        self.assertEqual(pool.stats(), {"size": 1, "created": 1, "idle": 1, "in_use": 0})
+        pool.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,37 @@
+"""Run from `src`: python -m unittest discover tests"""
+import unittest
+from data.database import MassesDatabase
+from data.db_manager import DbManager
+
+
+class EntityCacheInvalidationTest(unittest.TestCase):
+    def setUp(self):
+        self.db = MassesDatabase(None, pool_size=1)
+        self.dbm = DbManager(self.db)
+
+    def tearDown(self):
+        self.db.close()
+
+    def test_writes_invalidate_cached_rows_and_names(self):
+        client = self.dbm.add_client("Ana")
+        self.assertEqual(self.dbm.get_by_id(client, "clientes")["nome"], "Ana")
+        self.assertIsNone(self.dbm.get_by_name("clientes", "Bia"))
+
+        self.dbm.update_client(client, "Bia", None)
+
+        self.assertEqual(self.dbm.get_by_id(client, "clientes")["nome"], "Bia")
+        self.assertEqual(self.dbm.get_by_name("clientes", "Bia")["id_cliente"], client)
+        self.assertIsNone(self.dbm.get_by_name("clientes", "Ana"))
+
+    def test_stock_changes_invalidate_the_product(self):
+        product = self.dbm.add_product("Nhoque", "massa", 5, 10, 0, 3)
+        self.assertEqual(self.dbm.get_by_id(product, "produtos")["estoque_atual"], 3)
+
+        self.dbm.register_production(product, 4, "2024-01-02")
+        self.assertEqual(self.dbm.get_by_id(product, "produtos")["estoque_atual"], 7)
+        self.dbm.adjust_stock(product, -2)
+        self.assertEqual(self.dbm.get_by_name("produtos", "Nhoque")["estoque_atual"], 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+"""Run from `src`: python -m unittest discover tests"""
+import json
+import os
+import tempfile
+import unittest
+from application.app import App
+from application.importer import Importer
+from data.database import MassesDatabase
+from data.db_manager import DbManager
+
+
+class ImporterTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.db = MassesDatabase(None, pool_size=1)
+        self.dbm = DbManager(self.db)
+        # one chunk for the whole file: good and bad rows are written together
+        self.importer = Importer(App(self.dbm), chunk_size=100)
+
+    def tearDown(self):
+        self.db.close()
+        self.directory.cleanup()
+
+    def write(self, name: str, text: str) -> str:
+        path = os.path.join(self.directory.name, name)
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(text)
+        return path
+
+    def count(self, table: str) -> int:
+        with self.db.get_connection() as conn:
+            return conn.execute(f"SELECT count(*) FROM {table}").fetchone()[0]
+
+    def test_bad_product_rows_are_reported_and_the_rest_committed(self):
+        path = self.write("produtos.csv", "\n".join([
+            "nome;tipo;preco_producao;preco_venda;estoque_min;estoque_atual",
+            "Nhoque;massa;3,5;9,9;5;10",
+            "Talharim;massa;abc;9,9;5;10",    # invalid number
+            "Ravioli;massa;4;12;2;-1",        # negative stock
+            "Nhoque;massa;3;9;5;10",          # repeated inside the file
+            "Lasanha;massa;6;20;1;3",
+        ]))
+
+        report = self.importer.run("produtos", path)
+
+        self.assertEqual((report.read, report.imported, report.failed), (5, 2, 3))
+        self.assertEqual(
+            sorted((line, field) for line, field, _ in report.errors),
+            [(3, "preco_producao"), (4, "estoque_atual"), (5, "nome")],
+        )
+        self.assertEqual(
+            {row["nome"]: row["estoque_atual"] for row in self.dbm.get_by_table("produtos")},
+            {"Nhoque": 10, "Lasanha": 3},
+        )
+
+    def test_bad_transaction_rows_are_reported_and_the_rest_committed(self):
+        self.dbm.add_product("Nhoque", "massa", 5, 10, 0, 100)
+        self.dbm.add_client("Ana")
+        good = {
+            "data": "2024-01-31", "cliente": "Ana", "tipo": "V", "pagamento": 10,
+            "itens": [{"produto": "Nhoque", "quantidade": 2, "valor_unitario": 15}],
+        }
+        path = self.write("transacoes.jsonl", "\n".join([
+            json.dumps(good),
+            "{não é json",
+            json.dumps([good]),                              # not an object
+            json.dumps({**good, "itens": "Nhoque"}),         # itens not a list
+            json.dumps({**good, "itens": [3]}),              # item not an object
+            json.dumps({**good, "data": "31/01/2024"}),
+            json.dumps({**good, "cliente": "Zeca"}),
+            json.dumps({**good, "itens": [{**good["itens"][0], "quantidade": 0}]}),
+            json.dumps({**good, "tipo": "P"}),
+        ]))
+
+        report = self.importer.run("transacoes", path)
+
+        self.assertEqual((report.read, report.imported, report.failed), (9, 2, 7))
+        self.assertEqual(
+            sorted((line, field) for line, field, _ in report.errors),
+            [(2, "linha"), (3, "linha"), (4, "itens"), (5, "itens"),
+             (6, "data"), (7, "cliente"), (8, "quantidade")],
+        )
+        self.assertEqual(self.count("transacoes"), 2)
+        self.assertEqual(self.count("itens_transacao"), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
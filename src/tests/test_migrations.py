@@ -0,0 +1,122 @@
+"""Run from `src`: python -m unittest discover tests"""
+import datetime
+import hashlib
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from contextlib import closing
+from data.database import MassesDatabase
+from data.db_manager import DbManager
+from data.migrations import LATEST_VERSION, get_schema_version, migrate
+
+# the committed db, still at version 0: only ever read, tests work on copies
+SHIPPED_DB = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "database", "masses.db"
+)
+
+
+def digest(path: str) -> str:
+    with open(path, "rb") as file:
+        return hashlib.sha256(file.read()).hexdigest()
+
+
+@unittest.skipUnless(os.path.exists(SHIPPED_DB), "database/masses.db ausente")
+class ShippedDatabaseMigrationTest(unittest.TestCase):
+    def setUp(self):
+        self.shipped_digest = digest(SHIPPED_DB)
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)  # runs after the dbs are closed
+        self.path = os.path.join(self.directory.name, "masses.db")
+        shutil.copyfile(SHIPPED_DB, self.path)
+
+        with closing(sqlite3.connect(self.path)) as conn:
+            self.products = conn.execute(
+                "SELECT id_produto, nome, estoque_atual FROM produtos ORDER BY id_produto"
+            ).fetchall()
+            self.clients = conn.execute("SELECT count(*) FROM clientes").fetchone()[0]
+            self.version = get_schema_version(conn)
+
+    def tearDown(self):
+        self.assertEqual(digest(SHIPPED_DB), self.shipped_digest)
+
+    def open(self) -> MassesDatabase:
+        db = MassesDatabase(self.path)
+        self.addCleanup(db.close)
+        return db
+
+    def objects(self, conn: sqlite3.Connection, kind: str) -> set[str]:
+        return {
+            row[0] for row in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = ? AND name NOT LIKE 'sqlite_%'",
+                (kind,),
+            )
+        }
+
+    def test_every_migration_runs_on_the_shipped_db(self):
+        self.assertLess(self.version, LATEST_VERSION)
+        db = self.open()
+
+        with db.get_connection() as conn:
+            self.assertEqual(get_schema_version(conn), LATEST_VERSION)
+            self.assertEqual(
+                [tuple(row) for row in conn.execute(
+                    "SELECT id_produto, nome, estoque_atual FROM produtos ORDER BY id_produto"
+                )],
+                self.products,
+            )
+            self.assertEqual(
+                conn.execute("SELECT count(*) FROM clientes").fetchone()[0], self.clients
+            )
+            self.assertLessEqual(
+                {
+                    "saldos_clientes", "movimentos_estoque", "snapshots_estoque",
+                    "arquivo_transacoes", "compras_arquivadas",
+                },
+                self.objects(conn, "table"),
+            )
+            indexes = self.objects(conn, "index")
+            self.assertLessEqual(
+                {
+                    "idx_transacoes_cliente_data", "idx_transacoes_data_tipo_estado",
+                    "idx_itens_transacao_venda", "idx_clientes_nome",
+                },
+                indexes,
+            )
+            # replaced by the composite indexes of migrations 4 and 5
+            self.assertFalse({"idx_transacoes_cliente", "idx_transacoes_data"} & indexes)
+
+    def test_migrated_data_keeps_working(self):
+        dbm = DbManager(self.open())
+        today = datetime.date.today()
+
+        # migration 6 starts the ledger from a snapshot of the current stock
+        self.assertEqual(dbm.get_stock_on(today), {row[0]: row[2] for row in self.products})
+        product_id, name, stock = self.products[0]
+        dbm.register_production(product_id, 5, today)
+        self.assertEqual(dbm.get_stock_on(today, product_id), {product_id: stock + 5})
+
+        if dbm.db.fts_enabled:
+            self.assertIn(name, [row["nome"] for row in dbm.get_by_text("produtos", name)])
+
+        client_id = dbm.get_by_table("clientes")[0]["id_cliente"]
+        items = [{"item_id": product_id, "item_amount": 2, "unit_value": 10}]
+        dbm.register_transaction(client_id, "V", items, today, 5)
+        self.assertEqual(dbm.get_client_balance(client_id)["saldo_aberto"], 15)
+
+    def test_reopening_a_current_db_changes_nothing(self):
+        self.open().close()
+        schema_query = "SELECT sql FROM sqlite_master ORDER BY name"
+        with closing(sqlite3.connect(self.path)) as conn:
+            schema = conn.execute(schema_query).fetchall()
+
+        db = self.open()
+        with db.get_connection() as conn:
+            self.assertEqual(migrate(conn, db.schema), LATEST_VERSION)
+            self.assertFalse(conn.in_transaction)
+            self.assertEqual([tuple(row) for row in conn.execute(schema_query)], schema)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+"""Run from `src`: python -m unittest discover tests"""
+import sqlite3
+import unittest
+from data.database import MassesDatabase
+from data.db_manager import DbManager
+from data.migrations import ensure_search_index, fts5_available
+
+
+def names(rows) -> list[str]:
+    return [row["nome"] for row in rows]
+
+
+@unittest.skipUnless(fts5_available(sqlite3.connect(":memory:")), "SQLite sem FTS5")
+class SearchIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.db = MassesDatabase(None, pool_size=1)
+        self.dbm = DbManager(self.db)
+        self.products = {
+            name: self.dbm.add_product(name, kind, 5, 10, 0)
+            for name, kind in (
+                ("pão de queijo", "salgado"),
+                ("bolo de açúcar", "doce"),
+                ("pizza calabresa", "pizza"),
+            )
+        }
+
+    def tearDown(self):
+        self.db.close()
+
+    def test_search_is_accent_insensitive_and_prefix_matched(self):
+        self.assertTrue(self.db.fts_enabled)
+        self.assertEqual(names(self.dbm.get_by_text("produtos", "acucar")), ["bolo de açúcar"])
+        self.assertEqual(names(self.dbm.get_by_text("produtos", "pao qu")), ["pão de queijo"])
+        self.assertEqual(names(self.dbm.get_by_text("produtos", "doce")), ["bolo de açúcar"])
+
+    def test_triggers_follow_inserts_updates_and_deletes(self):
+        pizza = self.products["pizza calabresa"]
+        self.dbm.update_product(pizza, "pizza portuguesa", "pizza", 5, 10, 0)
+        self.assertEqual(names(self.dbm.get_by_text("produtos", "calabresa")), [])
+        self.assertEqual(names(self.dbm.get_by_text("produtos", "portug")), ["pizza portuguesa"])
+
+        with self.db.get_connection() as conn:
+            conn.execute("DELETE FROM produtos WHERE id_produto = ?", (pizza,))
+        self.assertEqual(names(self.dbm.get_by_text("produtos", "pizza")), [])
+
+        client = self.dbm.add_client("Valéria")
+        self.assertEqual(
+            [row["id_cliente"] for row in self.dbm.get_by_text("clientes", "valeria")], [client]
+        )
+
+    def test_ensure_search_index_rebuilds_a_missing_index(self):
+        with self.db.get_connection() as conn:
+            for table in ("produtos", "clientes"):
+                for suffix in ("ai", "ad", "au"):
+                    conn.execute(f"DROP TRIGGER {table}_fts_{suffix}")
+                conn.execute(f"DROP TABLE {table}_fts")
+        self.dbm.add_product("pastel de vento", "salgado", 1, 2, 0)
+
+        with self.db.get_connection() as conn:
+            self.assertTrue(ensure_search_index(conn))
+            self.assertTrue(ensure_search_index(conn))  # present: nothing to do
+
+        self.assertEqual(
+            names(self.dbm.get_by_text("produtos", "salgado")),
+            ["pão de queijo", "pastel de vento"],
+        )
+
+    def test_like_mode_searches_without_the_index(self):
+        like_db = MassesDatabase(None, pool_size=1, search_mode="like")
+        try:
+            like_dbm = DbManager(like_db)
+            for name in self.products:
+                like_dbm.add_product(name, "massa", 5, 10, 0)
+            self.assertFalse(like_db.fts_enabled)
+            self.assertEqual(
+                names(like_dbm.get_by_text("produtos", "de")),
+                ["pão de queijo", "bolo de açúcar"],
+            )
+        finally:
+            like_db.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+"""Run from `src`: python -m unittest discover tests"""
+import sqlite3
+import unittest
+from data.database import MassesDatabase
+from data.db_manager import DbManager
+
+
+class StockLedgerTest(unittest.TestCase):
+    def setUp(self):
+        self.db = MassesDatabase(None, pool_size=1)
+        self.dbm = DbManager(self.db)
+        self.client = self.dbm.add_client("Ana")
+        self.product = self.dbm.add_product("Nhoque", "massa", 5, 10, 0, 20)
+
+    def tearDown(self):
+        self.db.close()
+
+    def stock(self) -> int:
+        with self.db.get_connection() as conn:
+            return conn.execute(
+                "SELECT estoque_atual FROM produtos WHERE id_produto = ?", (self.product,)
+            ).fetchone()[0]
+
+    def movements(self) -> list[tuple[str, int]]:
+        with self.db.get_connection() as conn:
+            return [
+                (row["tipo"], row["quantidade"]) for row in conn.execute(
+                    "SELECT tipo, quantidade FROM movimentos_estoque "
+                    "WHERE id_produto = ? ORDER BY id_movimento",
+                    (self.product,),
+                )
+            ]
+
+    def sell(self, amount: int, date: str) -> int:
+        items = [{"item_id": self.product, "item_amount": amount, "unit_value": 10}]
+        return self.dbm.register_transaction(self.client, "V", items, date, 10 * amount)
+
+    def test_every_change_is_a_movement_summed_by_the_trigger(self):
+        self.dbm.register_production(self.product, 7, "2024-01-02")
+        self.sell(4, "2024-01-03")
+        self.dbm.adjust_stock(self.product, -1, "2024-01-04")
+
+        self.assertEqual(
+            self.movements(),
+            [("ajuste", 20), ("producao", 7), ("venda", -4), ("ajuste", -1)],
+        )
+        self.assertEqual(self.stock(), 22)
+
+    def test_movements_are_append_only(self):
+        with self.assertRaises(sqlite3.IntegrityError):
+            with self.db.get_connection() as conn:
+                conn.execute("UPDATE movimentos_estoque SET quantidade = 0")
+        with self.assertRaises(sqlite3.IntegrityError):
+            with self.db.get_connection() as conn:
+                conn.execute("DELETE FROM movimentos_estoque")
+        self.assertEqual(self.movements(), [("ajuste", 20)])
+
+    def test_edited_and_deleted_productions_are_reverted(self):
+        production = self.dbm.register_production(self.product, 7, "2024-01-02")
+        with self.db.get_connection() as conn:
+            conn.execute(
+                "UPDATE producoes SET quantidade = 5 WHERE id_producao = ?", (production,)
+            )
+        self.assertEqual(self.stock(), 25)
+
+        with self.db.get_connection() as conn:
+            conn.execute("DELETE FROM producoes WHERE id_producao = ?", (production,))
+        self.assertEqual(self.stock(), 20)
+        self.assertEqual(
+            self.movements()[1:],
+            [("producao", 7), ("producao", -7), ("producao", 5), ("producao", -5)],
+        )
+
+    def test_stock_on_a_date_is_the_same_with_or_without_snapshots(self):
+        self.dbm.register_production(self.product, 10, "2024-01-01")
+        self.sell(3, "2024-01-02")
+        self.dbm.register_production(self.product, 5, "2024-01-05")
+        self.sell(8, "2024-01-06")
+        days = [f"2024-01-{day:02}" for day in range(1, 8)]
+        without = [self.dbm.get_stock_on(day, self.product) for day in days]
+
+        self.dbm.take_stock_snapshot("2024-01-03")
+        self.dbm.take_stock_snapshot("2024-01-05")
+
+        # the initial stock (20) is an adjustment dated today, after all of these
+        self.assertEqual(
+            without, [{self.product: stock} for stock in (10, 7, 7, 7, 12, 4, 4)]
+        )
+        self.assertEqual([self.dbm.get_stock_on(day, self.product) for day in days], without)
+
+    def test_update_keeps_sales_made_after_the_form_was_loaded(self):
+        loaded = self.stock()
+        self.sell(4, "2024-01-03")  # while the user edits the form
+
+        self.dbm.update_product(
+            self.product, "Nhoque", "massa", 5, 10, 0, loaded + 2, loaded_stock=loaded
+        )
+
+        self.assertEqual(self.stock(), loaded - 4 + 2)
+        self.assertEqual(self.movements()[-1], ("ajuste", 2))
+
+
+if __name__ == "__main__":
+    unittest.main()
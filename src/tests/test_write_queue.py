@@ -0,0 +1,59 @@
+"""Run from `src`: python -m unittest discover tests"""
+import sqlite3
+import unittest
+from data.database import MassesDatabase
+from data.write_queue import WriteQueue
+
+
+class WriteQueueTest(unittest.TestCase):
+    def setUp(self):
+        self.db = MassesDatabase(None, pool_size=1)
+
+    def tearDown(self):
+        self.db.close()
+
+    def client_names(self) -> set[str]:
+        with self.db.get_connection() as conn:
+            return {row["nome"] for row in conn.execute("SELECT nome FROM clientes")}
+
+    def test_failing_operation_only_rolls_back_its_savepoint(self):
+        def add_then_fail(cursor: sqlite3.Cursor):
+            self.db.add_client(cursor, "Bruno")
+            raise ValueError("falhou")
+
+        # a long window: the three operations share one batch
+        queue = WriteQueue(self.db, window=0.5)
+        first = queue.submit(lambda cursor: self.db.add_client(cursor, "Ana"))
+        failing = queue.submit(add_then_fail)
+        last = queue.submit(lambda cursor: self.db.add_client(cursor, "Carla"))
+        queue.close()
+
+        self.assertEqual(queue.stats()["batches"], 1)
+        self.assertEqual(queue.stats()["failed"], 1)
+        self.assertIsInstance(first.result(), int)
+        self.assertIsInstance(last.result(), int)
+        with self.assertRaises(ValueError):
+            failing.result()
+        self.assertEqual(self.client_names(), {"Ana", "Carla"})
+
+    def test_constraint_error_keeps_the_rest_of_the_batch(self):
+        def duplicate(cursor: sqlite3.Cursor):
+            self.db.add_product(cursor, "Nhoque", "massa", 1, 2, 0, 0)
+
+        queue = WriteQueue(self.db, window=0.5)
+        first = queue.submit(duplicate)
+        second = queue.submit(duplicate)  # produtos.nome is UNIQUE
+        third = queue.submit(lambda cursor: self.db.add_client(cursor, "Ana"))
+        queue.close()
+
+        first.result()
+        third.result()
+        with self.assertRaises(sqlite3.IntegrityError):
+            second.result()
+        with self.db.get_connection() as conn:
+            self.assertEqual(conn.execute("SELECT count(*) FROM produtos").fetchone()[0], 1)
+        self.assertEqual(self.client_names(), {"Ana"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,7 @@
 import flet as ft
-from application.app import App
+from application.async_app import AsyncApp
 from data.table_classes import TableColumn
-from typing import TypeAlias, Dict, Callable
+from typing import TypeAlias, Dict, Callable, Awaitable
 from datetime import date
 
 FieldDict: TypeAlias = Dict[TableColumn, ft.TextField]
@@ -113,9 +113,12 @@ class BaseItem(ft.GestureDetector):
 
 
 class BaseView(ft.Container):
+    page_size = 50  # rows loaded per scroll step
+    id_column: TableColumn = None  # key of the row id in BaseItem.values
+
     def __init__(
         self,
-        app: App,
+        app: AsyncApp,
         search_layout: ft.Container,
         lv_headers: tuple[str, ...],
         add_layout: ft.Container,
@@ -128,9 +131,14 @@ class BaseView(ft.Container):
         self.lv = ft.ListView(
             expand=True,
             spacing=5,
+            on_scroll=self._on_lv_scroll,
         )
         self.clicked_item: BaseItem = None
         self.lv_context_menu: BaseContextMenu = None
+        self.last_item_id: int = None
+        self.has_more_items = False
+        self._loading = False  # a load_more_lv is running
+        self._lv_request = 0  # bumped by every update_lv, older results are dropped
 
         self.tabs = ft.Tabs(
             selected_index=0,
@@ -200,7 +208,7 @@ class BaseView(ft.Container):
 
         if update: self.update()
         
-    def db_action_error_handling(
+    async def db_action_error_handling(
         self,
         error_messages: dict,
         target_field_dict: FieldDict,
@@ -214,7 +222,7 @@ class BaseView(ft.Container):
 
         if not has_errors:
             self.clear_fields(target_field_dict, update=False)
-            self.update_lv(update=False)
+            await self.update_lv(update=False)
             self.page.snack_bar.content.value = snack_bar_message
             self.page.snack_bar.bgcolor = ft.Colors.GREEN
             self.page.snack_bar.open = True
@@ -222,17 +230,53 @@ class BaseView(ft.Container):
 
         self.page.update()
 
-    def update_lv(self, update=True):
+    async def update_lv(self, update=True):
+        """Reload from the first page; a newer call (e.g. a keystroke) wins"""
+        self._lv_request += 1
+        self.has_more_items = False  # no load_more_lv until this page arrives
+        if not await self._load_lv_page(self._lv_request, first_page=True):
+            return
 
-        self.lv.controls.clear()
-        raw_base_items_list = self.get_raw_base_items_list()
+        if update: self.update()
+
+    async def load_more_lv(self, update=True):
+        """Append the next page of items, if there is one"""
+        if not self.has_more_items or self._loading: return
+        self._loading = True
+        try:
+            loaded = await self._load_lv_page(self._lv_request)
+        finally:
+            self._loading = False
+
+        if loaded and update: self.update()
+
+    async def search_changed(self, e: ft.ControlEvent):
+        await self.update_lv()
 
+    async def _load_lv_page(self, request: int, first_page=False) -> bool:
+        """False (page dropped) if update_lv was called again meanwhile"""
+        raw_base_items_list = await self.get_raw_base_items_list(
+            None if first_page else self.last_item_id, self.page_size
+        )
+        if request != self._lv_request:
+            return False
+
+        if first_page:
+            self.lv.controls.clear()
+            self.last_item_id = None
         for raw_base_item in raw_base_items_list:
             self.lv.controls.append(
                 BaseItem(**raw_base_item)
             )
-        
-        if update: self.update()
+
+        self.has_more_items = len(raw_base_items_list) == self.page_size
+        if raw_base_items_list:
+            self.last_item_id = raw_base_items_list[-1]["values"][self.id_column]
+        return True
+
+    async def _on_lv_scroll(self, e: ft.OnScrollEvent):
+        if e.pixels >= e.max_scroll_extent - 50:
+            await self.load_more_lv()
 
     def clear_fields(
         self,
@@ -268,16 +312,19 @@ class BaseView(ft.Container):
             "child class must implement '_item_left_clicked' method"
         )
 
-    def add_action(self):
+    async def add_action(self, e=None):
         """Try to add, get the errors and call BaseView's db action error handler"""
         raise NotImplementedError("child class must implement 'add' method")
 
-    def update_action(self):
+    async def update_action(self, e=None):
         """Try to update, get the errors and call BaseView's db action error handler"""
         raise NotImplementedError("child class must implement 'update' method")
 
-    def get_raw_base_items_list(self) -> list[Dict]:
-        """Dicts must contain the same key words as BaseItem's args"""
+    async def get_raw_base_items_list(self, after_id: int = None, limit: int = None) -> list[Dict]:
+        """
+        Dicts must contain the same key words as BaseItem's args.
+        \nReturn at most `limit` items whose id comes after `after_id`.
+        """
         raise NotImplementedError("child class must implement 'get_raw_base_items_list' method")
     
     # HELPERS
@@ -355,11 +402,16 @@ class BaseView(ft.Container):
     
 
 class Calendar(ft.ElevatedButton):
-    def __init__(self, help_text:str):
+    def __init__(
+        self,
+        help_text:str,
+        on_date_change: Callable[[], Awaitable[None]] = None,
+    ):
         super().__init__()
 
         self.calendar = self._build_date_picker(help_text)
         self.on_click = lambda e: self.page.open(self.calendar)
+        self.on_date_change = on_date_change
 
         self.date = None
         self.icon = ft.Icons.CALENDAR_MONTH
@@ -370,6 +422,10 @@ class Calendar(ft.ElevatedButton):
         self.date = self.calendar.value.strftime("%Y-%m-%d")
         if update: self.update()
 
+    async def _date_picked(self, e: ft.ControlEvent):
+        self._on_change()
+        if self.on_date_change:
+            await self.on_date_change()
 
     # BUILDER
 
@@ -379,17 +435,23 @@ class Calendar(ft.ElevatedButton):
             last_date=dt,
             value=dt,
             help_text=help_text,
-            on_change=lambda e: self._on_change()
+            on_change=self._date_picked
         )
     
 
 class ItemPicker(ft.Container):
-    def __init__(self, app: App, table: str):
+    def __init__(
+        self,
+        app: AsyncApp,
+        table: str,
+        on_choose: Callable[[ft.TextField], Awaitable[None]] = None,
+    ):
         super().__init__()
 
         self.app = app
         self.table = table
         self.target_text_field: ft.TextField = None
+        self.on_choose = on_choose
 
         self.expand=True
         self.visible=False
@@ -397,7 +459,7 @@ class ItemPicker(ft.Container):
         self.search_bar = BaseView.create_text_field(
             label=f"Buscar {table}",
             icon=ft.Icons.SEARCH,
-            on_change=lambda e: self.update_lv(),
+            on_change=self.search_changed,
             expand=False
         )
 
@@ -406,6 +468,7 @@ class ItemPicker(ft.Container):
             spacing=5,
         )
         self.clicked_item: BaseItem = None
+        self._lv_request = 0  # see BaseView.update_lv
         
         self.chosen_item_text = ft.Text(
             value="Nenhum selecionado", 
@@ -422,14 +485,14 @@ class ItemPicker(ft.Container):
         )
 
 
-    def appear(self, target_text_field: ft.TextField):
+    async def appear(self, target_text_field: ft.TextField):
         self.target_text_field = target_text_field
 
         self.visible = True
         if self not in self.page.overlay:
             self.page.overlay.append(self)
 
-        self.update_lv(False)
+        await self.update_lv(False)
         self.page.update()
         self.search_bar.focus()
 
@@ -439,25 +502,40 @@ class ItemPicker(ft.Container):
         self.page.overlay.remove(self)
         self.page.update()
 
-    def chose_item(self):
+    async def chose_item(self, e=None):
         if self.clicked_item:
             self.target_text_field.value = self.clicked_item.values["nome"]
         self.disappear()
+        if self.on_choose:
+            await self.on_choose(self.target_text_field)
 
-    def cancel(self):
+    async def cancel(self, e=None):
         self.target_text_field.value = None
         self.disappear()
+        if self.on_choose:
+            await self.on_choose(self.target_text_field)
+
+    async def search_changed(self, e: ft.ControlEvent):
+        await self.update_lv()
 
-    def update_lv(self, update=True):
+    async def update_lv(self, update=True):
+        self._lv_request += 1
+        request = self._lv_request
         if self.table == "cliente":
-            items = self.app.search_client(self.search_bar.value)
+            items = await self.app.search_client(
+                self.search_bar.value, limit=BaseView.page_size
+            )
         else:
-            items = self.app.search_product(self.search_bar.value)
+            items = await self.app.search_product(
+                self.search_bar.value, limit=BaseView.page_size
+            )
+        if request != self._lv_request:
+            return  # a newer search already answered or will
 
         self.lv.controls.clear()
 
         for item in items:
-            name = self.app.get_client_info(item, "nome")
+            name = item["nome"]
             self.lv.controls.append(
                 BaseItem(
                     {"nome": name}, [name,], self.on_left_click
@@ -510,13 +588,13 @@ class ItemPicker(ft.Container):
                             ft.IconButton(
                                 icon=ft.Icons.CHECK,
                                 tooltip="confirmar",
-                                on_click=lambda _: self.chose_item()
+                                on_click=self.chose_item
                             ),
                             ft.IconButton(
                                 icon=ft.Icons.CANCEL,
                                 icon_color=ft.Colors.RED,
                                 tooltip="cancelar",
-                                on_click=lambda _: self.cancel()   
+                                on_click=self.cancel
                             ),
                         ],
                         alignment=ft.MainAxisAlignment.CENTER
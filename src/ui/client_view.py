@@ -1,17 +1,19 @@
 import flet as ft
-from application.app import App
+from application.async_app import AsyncApp
 from ui.base_view import BaseView, FieldDict
 from data.table_classes import ClientColumns
 from typing import get_args
 
 
 class ClientView(BaseView):
-    def __init__(self, app: App):
+    id_column = "id_cliente"
+
+    def __init__(self, app: AsyncApp):
 
         self.search_bar = self.create_text_field(
             label="Buscar clientes",
             icon=ft.Icons.SEARCH,
-            on_change=lambda e: self.update_lv()
+            on_change=self.search_changed
         )
 
         self.add_fields = self._build_add_fields()
@@ -21,7 +23,7 @@ class ClientView(BaseView):
         add_layout = self._build_add_tab_layout()       
         update_layout = self._build_update_tab_layout()
 
-        lv_headers = get_args(ClientColumns)[:-1]
+        lv_headers = (*get_args(ClientColumns)[:-1], "saldo_aberto")
 
         super().__init__(
             app,
@@ -31,12 +33,11 @@ class ClientView(BaseView):
             update_layout=update_layout
         )
 
-    def get_raw_base_items_list(self):
+    async def get_raw_base_items_list(self, after_id=None, limit=None):
         raw_base_items_list = []
-        rows = self.app.search_client(self.search_bar.value)
+        infos = await self.app.search_client_info(self.search_bar.value, after_id, limit)
 
-        for row in rows:
-            info = self.app.get_client_info(row)
+        for info in infos:
             raw_base_items_list.append(
                 {
                     "values":info,
@@ -44,6 +45,7 @@ class ClientView(BaseView):
                         info["id_cliente"],
                         info["nome"],
                         info["contato"],
+                        f"R$ {info["saldo_aberto"]}",
                     ],
                     "on_left_click": self.on_item_left_click,
                     "context_menu_options": {
@@ -56,19 +58,19 @@ class ClientView(BaseView):
         
         return raw_base_items_list
     
-    def add_action(self):
-        error_messages = self.app.try_add_client(
+    async def add_action(self, e=None):
+        error_messages = await self.app.try_add_client(
             **self.get_field_data(self.add_fields)
         )
-        self.db_action_error_handling(
+        await self.db_action_error_handling(
             error_messages, self.add_fields, "Cliente salvo com sucesso"
         )
 
-    def update_action(self):
-        error_messages = self.app.try_update_client(
+    async def update_action(self, e=None):
+        error_messages = await self.app.try_update_client(
             **self.get_field_data(self.update_fields)
         )
-        self.db_action_error_handling(
+        await self.db_action_error_handling(
             error_messages, self.update_fields, "Cliente alterado com sucesso"
         )
 
@@ -91,7 +93,7 @@ class ClientView(BaseView):
         # Configura eventos em lote
         for field in fields.values():
             field.on_change = self.clear_error_field
-            field.on_submit = lambda e: self.add_action() 
+            field.on_submit = self.add_action
         return fields
     
     def _build_update_fields(self) -> FieldDict:
@@ -102,7 +104,7 @@ class ClientView(BaseView):
         }
         for field in fields.values():
             field.on_change = self.clear_error_field
-            field.on_submit = lambda e: self.update_action()
+            field.on_submit = self.update_action
         return fields
     
     def _build_add_tab_layout(self):
@@ -112,7 +114,7 @@ class ClientView(BaseView):
                 ft.Row(
                     controls=[
                         self._create_main_button(
-                            "Adicionar", ft.Icons.ADD, lambda e: self.add_action()
+                            "Adicionar", ft.Icons.ADD, self.add_action
                         ),
                         self._create_rubber_button(
                             on_click=lambda e: self.clear_fields(self.add_fields)
@@ -130,7 +132,7 @@ class ClientView(BaseView):
                 ft.Row(
                     controls=[
                         self._create_main_button(
-                            "Atualizar", ft.Icons.UPDATE, lambda e: self.update_action()
+                            "Atualizar", ft.Icons.UPDATE, self.update_action
                         ),
                         self._create_rubber_button(
                             on_click=lambda e: self.on_item_left_click(self.clicked_item)
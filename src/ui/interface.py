@@ -1,53 +1,104 @@
 import flet as ft
 from application.app import App
+from application.async_app import AsyncApp
+from ui.base_view import BaseView
 from ui.product_view import ProductView
 from ui.client_view import ClientView
 from ui.transaction_view import TransactionView
 
 
 class UI(ft.Container):
-    def __init__(self, app: App):
+    """
+    Main window: one tab per view.
+    \nWith `lazy` (default) only the selected tab's view is built up front;
+    the others are built, and their lists loaded, the first time their tab
+    is opened. `start` never delays the first frame: list loads run as
+    page tasks.
+    """
+
+    view_classes: tuple[type[BaseView], ...] = (ProductView, ClientView, TransactionView)
+
+    def __init__(self, app: App | AsyncApp, lazy: bool = True):
         super().__init__()
 
-        self.app = app
+        # an AsyncApp (e.g. SharedDataLayer's) is shared as is
+        self.app = app if isinstance(app, AsyncApp) else AsyncApp(app)
+        self.lazy = lazy
         self.expand = True
         self.width=1000
 
-        # VIEWS
-        self.product_view = ProductView(self.app)
-        self.client_view = ClientView(self.app)
-        self.transaction_view = TransactionView(self.app)
+        # VIEWS (None until built)
+        self.views: list[BaseView | None] = [None] * len(self.view_classes)
 
         # TABS
         self.tabs = self._build_tabs()
+        for index in ([0] if lazy else range(len(self.view_classes))):
+            self._build_view(index)
 
         self.content=self.tabs
-        
-    def start(self,):
-        self.product_view.update_lv()
-        self.client_view.update_lv()
+
+    @property
+    def product_view(self) -> ProductView | None:
+        return self.views[0]
+
+    @property
+    def client_view(self) -> ClientView | None:
+        return self.views[1]
+
+    @property
+    def transaction_view(self) -> TransactionView | None:
+        return self.views[2]
+
+    async def start(self,):
+        """Call after `page.add(ui)`: schedules the list loads and returns"""
+        for view in self.views:
+            if view is not None:
+                self.page.run_task(view.update_lv)
+
+    async def tab_changed(self, e: ft.ControlEvent):
+        index = self.tabs.selected_index
+        if self.views[index] is not None:
+            return
+
+        view = self._build_view(index)
+        self.tabs.update()
+        await view.update_lv()
 
     # BUILDERS
 
+    def _build_view(self, index: int) -> BaseView:
+        view = self.views[index] = self.view_classes[index](self.app)
+        self.tabs.tabs[index].content = view
+        return view
+
     def _build_tabs(self):
         return ft.Tabs(
             selected_index=0,
             animation_duration=300,
+            on_change=self.tab_changed,
             tabs=[
                 ft.Tab(
                     text="Produtos",
                     icon=ft.Icons.INVENTORY_2,
-                    content=self.product_view,
+                    content=self._build_placeholder(),
                 ),
                 ft.Tab(
                     text="Clientes",
                     icon=ft.Icons.PEOPLE,
-                    content=self.client_view
+                    content=self._build_placeholder(),
                 ),
                 ft.Tab(
                     text="Transações",
                     icon=ft.Icons.RECEIPT,
-                    content=self.transaction_view
+                    content=self._build_placeholder(),
                 )
             ]
-        )
\ No newline at end of file
+        )
+
+    @staticmethod
+    def _build_placeholder():
+        return ft.Container(
+            content=ft.ProgressRing(),
+            alignment=ft.alignment.center,
+            padding=40,
+        )
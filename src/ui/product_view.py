@@ -1,5 +1,5 @@
 import flet as ft
-from application.app import App
+from application.async_app import AsyncApp
 from ui.base_view import BaseView, FieldDict
 from data.table_classes import ProductColumns
 from typing import get_args
@@ -7,16 +7,19 @@ from typing import get_args
 
 
 class ProductView(BaseView):
-    def __init__(self, app: App):
+    id_column = "id_produto"
+
+    def __init__(self, app: AsyncApp):
 
         self.search_bar = self.create_text_field(
             label="Buscar produtos",
             icon=ft.Icons.SEARCH,
-            on_change=lambda e: self.update_lv()
+            on_change=self.search_changed
         )
 
         self.add_fields = self._build_add_fields()
         self.update_fields = self._build_update_fields()
+        self.loaded_stock: int = None  # estoque_atual of the clicked item
 
         search_layout = self._create_container_display(self.search_bar)
         add_layout = self._build_add_tab_layout()       
@@ -33,12 +36,11 @@ class ProductView(BaseView):
         )
 
 
-    def get_raw_base_items_list(self):
+    async def get_raw_base_items_list(self, after_id=None, limit=None):
         raw_base_items_list = []
-        rows = self.app.search_product(self.search_bar.value)
+        infos = await self.app.search_product_info(self.search_bar.value, after_id, limit)
 
-        for row in rows:
-            info = self.app.get_product_info(row)
+        for info in infos:
             raw_base_items_list.append(
                 {
                     "values":info,
@@ -62,19 +64,20 @@ class ProductView(BaseView):
         
         return raw_base_items_list
     
-    def add_action(self):
-        error_messages = self.app.try_add_product(
+    async def add_action(self, e=None):
+        error_messages = await self.app.try_add_product(
             **self.get_field_data(self.add_fields)
         )
-        self.db_action_error_handling(
+        await self.db_action_error_handling(
             error_messages, self.add_fields, "Produto salvo com sucesso"
         )
 
-    def update_action(self):
-        error_messages = self.app.try_update_product(
-            **self.get_field_data(self.update_fields)
+    async def update_action(self, e=None):
+        error_messages = await self.app.try_update_product(
+            **self.get_field_data(self.update_fields),
+            estoque_carregado=self.loaded_stock,
         )
-        self.db_action_error_handling(
+        await self.db_action_error_handling(
             error_messages, self.update_fields, "Produto alterado com sucesso"
         )
 
@@ -84,8 +87,10 @@ class ProductView(BaseView):
             for key, value in self.clicked_item.values.items():
                 if key in self.update_fields:
                     self.update_fields[key].value = value
+            self.loaded_stock = self.clicked_item.values["estoque_atual"]
         else:
             self.clear_fields(self.update_fields, update=False)
+            self.loaded_stock = None
 
     # BUILDERS
 
@@ -100,7 +105,7 @@ class ProductView(BaseView):
         }
         for field in fields.values():
             field.on_change = self.clear_error_field
-            field.on_submit = lambda e: self.add_action() 
+            field.on_submit = self.add_action
         return fields
     
     def _build_update_fields(self) -> FieldDict:
@@ -117,7 +122,7 @@ class ProductView(BaseView):
         }
         for field in fields.values():
             field.on_change = self.clear_error_field
-            field.on_submit = lambda e: self.update_action()
+            field.on_submit = self.update_action
         return fields
     
     def _build_add_tab_layout(self):
@@ -140,7 +145,7 @@ class ProductView(BaseView):
                 ft.Row(
                     controls=[
                         self._create_main_button(
-                            "Adicionar", ft.Icons.ADD, lambda e: self.add_action()
+                            "Adicionar", ft.Icons.ADD, self.add_action
                         ),
                         self._create_rubber_button(
                             on_click=lambda e: self.clear_fields(self.add_fields)
@@ -172,7 +177,7 @@ class ProductView(BaseView):
                 ft.Row(
                     controls=[
                         self._create_main_button(
-                            "Atualizar", ft.Icons.UPDATE, lambda e: self.update_action()
+                            "Atualizar", ft.Icons.UPDATE, self.update_action
                         ),
                         self._create_rubber_button(
                             on_click=lambda e: self.on_item_left_click(self.clicked_item)
@@ -1,24 +1,22 @@
 import flet as ft
-from application.app import App
+from application.async_app import AsyncApp
 from ui.base_view import BaseView, Calendar, ItemPicker, BaseItem
-from data.table_classes import TransactionColumns
-from typing import get_args
 
 
 class ItemsListView(ft.Container):
-    def __init__(self, lv: ft.ListView, app: App):
+    def __init__(self, lv: ft.ListView, app: AsyncApp):
         super().__init__()
 
         self.lv = lv
         self.app = app
-        self.product_picker = ItemPicker(app, "produtos")
+        self._product_picker: ItemPicker = None
 
         self.expand=True
         self.visible=False
 
         self.add_product_field = BaseView.create_text_field(
             hint_text="Procurar Produto",
-            on_focus=lambda _: self.open_product_picker(self.add_product_field),
+            on_focus=self.open_product_picker,
             icon=ft.Icons.SEARCH,
             expand=3
         )
@@ -36,9 +34,16 @@ class ItemsListView(ft.Container):
             alignment=ft.alignment.center,
         )
 
-    def open_product_picker(self, target_text_field):
+    @property
+    def product_picker(self) -> ItemPicker:
+        """Built on first open"""
+        if self._product_picker is None:
+            self._product_picker = ItemPicker(self.app, "produtos")
+        return self._product_picker
+
+    async def open_product_picker(self, e: ft.ControlEvent):
         self.product_picker.page = self.page
-        self.product_picker.appear(target_text_field)
+        await self.product_picker.appear(e.control)
 
     def appear(self):
         self.visible = True
@@ -151,18 +156,23 @@ class ItemsListView(ft.Container):
         )
 
 class TransactionView(BaseView):
-    def __init__(self, app: App):
+    id_column = "id_transacao"
+
+    def __init__(self, app: AsyncApp):
+
+        # overlays are built on first open
+        self._client_picker: ItemPicker = None
+        self._items_view: ItemsListView = None
 
-        self.client_picker = ItemPicker(app, "cliente")
         self.search_client_field = BaseView.create_text_field(
             hint_text="Procurar cliente",
-            on_focus=lambda _: self.open_client_picker(self.search_client_field),
+            on_focus=self.open_client_picker,
             expand=False,
             icon=ft.Icons.SEARCH
         )
 
-        self.start_date = Calendar("INÍCIO")
-        self.end_date = Calendar("FIM")
+        self.start_date = Calendar("INÍCIO", on_date_change=self.update_lv)
+        self.end_date = Calendar("FIM", on_date_change=self.update_lv)
 
         self.add_fields = self._build_add_fields()
 
@@ -170,7 +180,6 @@ class TransactionView(BaseView):
             expand=True,
             spacing=5,
         )
-        self.items_view = ItemsListView(self.items_list_lv, app)
 
         super().__init__(
             app,
@@ -184,21 +193,69 @@ class TransactionView(BaseView):
         )
 
 
-    def get_raw_base_items_list(self):
-        ...
+    @property
+    def client_picker(self) -> ItemPicker:
+        if self._client_picker is None:
+            self._client_picker = ItemPicker(
+                self.app, "cliente", on_choose=self.client_chosen
+            )
+        return self._client_picker
+
+    @property
+    def items_view(self) -> ItemsListView:
+        if self._items_view is None:
+            self._items_view = ItemsListView(self.items_list_lv, self.app)
+        return self._items_view
+
+    async def get_raw_base_items_list(self, after_id=None, limit=None):
+        raw_base_items_list = []
+        rows = await self.app.search_transactions(
+            client_name=self.search_client_field.value or None,
+            start_date=self.start_date.date,
+            end_date=self.end_date.date,
+            after_id=after_id,
+            limit=limit,
+        )
+
+        for row in rows:
+            raw_base_items_list.append(
+                {
+                    "values": dict(row),
+                    "display_values": [
+                        row["id_transacao"],
+                        row["nome_cliente"] or "-",
+                        row["data"],
+                        row["tipo"],
+                        row["estado"],
+                        f"R$ {row["valor_total"]}",
+                        f"R$ {row["valor_aberto"]}",
+                    ],
+                    "on_left_click": self.on_item_left_click,
+                }
+            )
+
+        return raw_base_items_list
     
-    def add_action(self):
+    async def add_action(self, e=None):
         ...
 
-    def update_action(self):
+    async def update_action(self, e=None):
         ...
 
     def _item_left_clicked(self, cliked):
         ...
 
-    def open_client_picker(self, target_text_field):
+    async def client_chosen(self, target_text_field: ft.TextField):
+        if target_text_field is self.search_client_field:
+            await self.update_lv()
+
+    async def clear_search_client(self, e: ft.ControlEvent):
+        self.clear_fields(self.search_client_field, update=False)
+        await self.update_lv()
+
+    async def open_client_picker(self, e: ft.ControlEvent):
         self.client_picker.page = self.page
-        self.client_picker.appear(target_text_field)
+        await self.client_picker.appear(e.control)
 
     def open_items_view(self):
         self.items_view.page = self.page
@@ -226,7 +283,7 @@ class TransactionView(BaseView):
                             self._create_rubber_button(
                                 ft.Colors.RED,
                                 "apagar",
-                                lambda _: self.clear_fields(self.search_client_field)
+                                self.clear_search_client
                             ),
                         ]
                     ),
@@ -241,9 +298,7 @@ class TransactionView(BaseView):
         fields = {
             "cliente": BaseView.create_text_field(
                                 hint_text="procurar cliente",
-                                on_focus=lambda e: self.open_client_picker(
-                                    self.add_fields["cliente"]
-                                ),
+                                on_focus=self.open_client_picker,
                                 icon=ft.Icons.SEARCH
                             ),
             "tipo": BaseView.create_text_field(
@@ -255,7 +310,7 @@ class TransactionView(BaseView):
         for field in fields.values():
             if isinstance(field, ft.TextField):
                 field.on_change = self.clear_error_field
-                field.on_submit = lambda e: self.add_action() 
+                field.on_submit = self.add_action
         return fields
 
     def _build_add_layout(self):